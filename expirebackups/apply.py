@@ -0,0 +1,292 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import json
+import os
+import stat
+import sys
+import time
+from itertools import islice
+from typing import Iterator, Optional, Set, TextIO
+
+from expirebackups.delete import Deleter, DeleteResult
+from expirebackups.plan import JsonLinesPlanWriter
+
+
+class PlanFileWriter(JsonLinesPlanWriter):
+    """
+    writer for a plan file to be applied later - JSON lines with a header line
+    that identifies the plan and tells how the files are to be verified
+    """
+
+    def __init__(self, stream: TextIO = None, rootPath: str = None, nameTime: bool = False, directories: bool = False):
+        """
+        constructor
+
+        Args:
+            stream(TextIO): the stream to write to (default: sys.stdout)
+            rootPath(str): the root path the plan was made for
+            nameTime(bool): True if the times of the plan were taken from the file names
+            directories(bool): True if directories are backups
+        """
+        super().__init__(stream)
+        self.header = {
+            "type": "header",
+            "planId": f"{time.time_ns():x}-{os.getpid()}",
+            "rootPath": rootPath,
+            "nameTime": nameTime,
+            "directories": directories,
+        }
+
+    def writeHeader(self, count: int, withDelete: bool):
+        """
+        write the header line
+        """
+        self.stream.write(json.dumps({**self.header, "count": count}, ensure_ascii=False) + "\n")
+
+
+class ApplyResult(DeleteResult):
+    """
+    the result of applying a plan
+    """
+
+    def __init__(self):
+        """
+        constructor
+        """
+        super().__init__()
+        # files that were modified since the plan was made
+        self.changed = []
+        # files that were done in a previous run according to the journal
+        self.resumed = 0
+
+    def add(self, other: DeleteResult):
+        super().add(other)
+        if isinstance(other, ApplyResult):
+            self.changed.extend(other.changed)
+            self.resumed += other.resumed
+
+    def __str__(self):
+        """
+        return a string representation of me
+        """
+        text = f"{super().__str__()} {len(self.changed)} changed {self.resumed} done before"
+        return text
+
+
+class PlanApplier:
+    """
+    apply a saved expiration plan without a rescan
+
+    the plan is streamed and the files to expire are deleted in chunks - each file is verified with a single
+    stat to still have the size and modification time of the plan. The indices of the handled files are
+    appended to a journal after each chunk so that an interrupted apply resumes where it stopped
+    """
+
+    journalSuffix = ".journal"
+
+    def __init__(
+        self,
+        planPath: str,
+        journalPath: str = None,
+        deleteWorkers: int = 1,
+        chunkSize: int = 1000,
+        debug: bool = False,
+        quarantine: str = None,
+    ):
+        """
+        constructor
+
+        Args:
+            planPath(str): the path of the plan file
+            journalPath(str): the path of the journal (default: the planPath with a .journal suffix)
+            deleteWorkers(int): the number of concurrent workers for deleting
+            chunkSize(int): the number of files to delete between journal updates
+            debug(bool): if True show debug information
+            quarantine(str): the path of a trash directory to rename the files into instead of deleting them (if any)
+        """
+        if chunkSize < 1:
+            raise Exception(f"{chunkSize} chunkSize is invalid - chunkSize must be >=1")
+        self.planPath = planPath
+        if journalPath is None:
+            journalPath = planPath + PlanApplier.journalSuffix
+        self.journalPath = journalPath
+        self.deleteWorkers = deleteWorkers
+        self.chunkSize = chunkSize
+        self.debug = debug
+        self.quarantine = quarantine
+        self.header = None
+
+    def readPlan(self) -> Iterator[dict]:
+        """
+        stream the records of my plan file after reading its header
+
+        Yields:
+            dict: the plan records
+        """
+        with open(self.planPath) as planFile:
+            line = planFile.readline()
+            try:
+                header = json.loads(line)
+            except ValueError:
+                header = None
+            if not isinstance(header, dict) or header.get("type") != "header":
+                raise Exception(f"invalid plan {self.planPath} - the header line is missing")
+            self.header = header
+            for line in planFile:
+                yield json.loads(line)
+
+    def readJournal(self) -> Set[int]:
+        """
+        read the indices of the files handled by a previous apply of my plan
+
+        Returns:
+            set: the indices - empty if the journal is missing or belongs to another plan
+        """
+        done = set()
+        try:
+            with open(self.journalPath) as journal:
+                if journal.readline().strip() != self.header["planId"]:
+                    return set()
+                for line in journal:
+                    # the last line might be incomplete after a crash
+                    if line.endswith("\n") and line[:-1].isdigit():
+                        done.add(int(line))
+        except OSError:
+            pass
+        return done
+
+    def verify(self, record: dict) -> Optional[str]:
+        """
+        check that the file of the given record is unchanged since the plan was made
+
+        Args:
+            record(dict): the plan record
+
+        Returns:
+            str: "missing" or "changed" - None if the file is unchanged
+        """
+        try:
+            # like the scan a symbolic link is verified with the file it points to
+            stats = os.stat(record["path"])
+        except FileNotFoundError:
+            return "missing"
+        except OSError:
+            return "changed"
+        if stat.S_ISDIR(stats.st_mode):
+            # the scan does not follow symbolic links to directories
+            if not self.header.get("directories") or os.path.islink(record["path"]):
+                return "changed"
+        elif stats.st_size != record["size"]:
+            return "changed"
+        if not self.header.get("nameTime") and stats.st_mtime != record["mtime"]:
+            return "changed"
+        return None
+
+    def apply(self, withDelete: bool = True) -> ApplyResult:
+        """
+        apply my plan
+
+        Args:
+            withDelete(bool): if True delete the files and journal the progress - otherwise only verify them
+
+        Returns:
+            ApplyResult: the counts, failures and changed files
+        """
+        result = ApplyResult()
+        records = (record for record in self.readPlan() if record["action"] == "expire")
+        # reading the first record reads the header
+        first = next(records, None)
+        done = self.readJournal() if first is not None else set()
+        if self.quarantine is not None and withDelete:
+            from expirebackups.quarantine import Quarantine
+
+            deleter = Quarantine(self.quarantine, debug=self.debug)
+            deleter.open(self.header["rootPath"])
+        else:
+            deleter = Deleter(workers=self.deleteWorkers, debug=self.debug, directories=self.header.get("directories"))
+        journal = None
+        if withDelete:
+            journal = self.openJournal(bool(done))
+        try:
+            pending = records if first is None else self.chain(first, records)
+            for chunk in iter(lambda: list(islice(pending, self.chunkSize)), []):
+                result.add(self.applyChunk(chunk, done, deleter, journal))
+        finally:
+            if journal is not None:
+                journal.close()
+        return result
+
+    @classmethod
+    def chain(cls, first: dict, records: Iterator[dict]) -> Iterator[dict]:
+        """
+        put the given first record back in front of the records
+        """
+        yield first
+        yield from records
+
+    def openJournal(self, resume: bool) -> TextIO:
+        """
+        open my journal for appending - a new journal starts with the id of my plan
+
+        Args:
+            resume(bool): True if the journal of a previous apply of my plan is continued
+
+        Returns:
+            TextIO: the journal
+        """
+        journal = open(self.journalPath, "a" if resume else "w")
+        if not resume:
+            journal.write(f"{self.header['planId']}\n")
+            journal.flush()
+        return journal
+
+    def applyChunk(self, chunk: list, done: Set[int], deleter: Deleter, journal: TextIO) -> ApplyResult:
+        """
+        verify and delete the files of the given chunk of records and journal them
+
+        Args:
+            chunk(list): the plan records
+            done(set): the indices handled by a previous apply
+            deleter(Deleter|Quarantine): the deleter to use
+            journal(TextIO): the journal - None for a dry run
+
+        Returns:
+            ApplyResult: the result for the chunk
+        """
+        result = ApplyResult()
+        handled = []
+        toDelete = []
+        for record in chunk:
+            index = record["index"]
+            if index in done:
+                result.resumed += 1
+                continue
+            problem = self.verify(record)
+            if problem == "missing":
+                result.missing += 1
+                handled.append(index)
+            elif problem == "changed":
+                result.changed.append(record["path"])
+                handled.append(index)
+            else:
+                toDelete.append(record)
+        if journal is None:
+            result.deleted += len(toDelete)
+            result.freed += sum(record["size"] for record in toDelete)
+            return result
+        deleteResult = deleter.delete([(record["path"], record["size"]) for record in toDelete])
+        result.add(deleteResult)
+        # failed files are not journaled so that they are retried
+        failedPaths = {filePath for filePath, _error in deleteResult.failures}
+        handled.extend(record["index"] for record in toDelete if record["path"] not in failedPaths)
+        if handled:
+            journal.write("".join(f"{index}\n" for index in handled))
+            journal.flush()
+            os.fsync(journal.fileno())
+        if self.debug:
+            print(f"applied {len(chunk)} records: {result}", file=sys.stderr)
+        return result
@@ -0,0 +1,522 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from expirebackups.delete import Deleter
+from expirebackups.engine import VectorizedRuleEngine
+from expirebackups.expire import BackupFile, BackupFileTable, Expiration, ExpireBackups
+from expirebackups.plan import PlanSummary, PlanWriter
+from expirebackups.scan import BackupScanner
+from expirebackups.version import Version
+
+
+class StatCounter:
+    """
+    count the calls to os.stat while active
+    """
+
+    def __init__(self):
+        """
+        constructor
+        """
+        self.count = 0
+        self.origStat = os.stat
+
+    def __enter__(self):
+        def countingStat(*args, **kwargs):
+            self.count += 1
+            return self.origStat(*args, **kwargs)
+
+        os.stat = countingStat
+        return self
+
+    def __exit__(self, *_args):
+        os.stat = self.origStat
+
+
+class ScanBenchmark:
+    """
+    compare the legacy os.walk/os.stat scan with the scandir based BackupScanner
+    """
+
+    def __init__(self, numberOfFiles: int = 10000, filesPerDir: int = 100, ext: str = ".tst"):
+        """
+        constructor
+
+        Args:
+            numberOfFiles(int): the number of backup files to create
+            filesPerDir(int): the number of files per sub directory
+            ext(str): the extension of the backup files
+        """
+        self.numberOfFiles = numberOfFiles
+        self.filesPerDir = filesPerDir
+        self.ext = ext
+
+    def createTree(self, rootPath: str):
+        """
+        create a test tree with my number of empty files
+
+        Args:
+            rootPath(str): the directory to create the files in
+        """
+        for i in range(self.numberOfFiles):
+            dirPath = os.path.join(rootPath, f"d{i // self.filesPerDir:05d}")
+            if i % self.filesPerDir == 0:
+                os.makedirs(dirPath, exist_ok=True)
+            with open(os.path.join(dirPath, f"backup-{i:07d}{self.ext}"), "w"):
+                pass
+
+    def legacyScan(self, rootPath: str) -> list:
+        """
+        the scan as done before the BackupScanner was introduced
+        """
+        backupFiles = []
+        for root, _dirs, files in os.walk(rootPath):
+            for file in files:
+                if file.endswith(self.ext):
+                    backupFiles.append(BackupFile(os.path.join(root, file)))
+        return backupFiles
+
+    def run(self) -> dict:
+        """
+        run the benchmark
+
+        Returns:
+            dict: the number of files, elapsed seconds and path based/directory relative stat calls per file
+            of both scans
+        """
+        rootPath = tempfile.mkdtemp(prefix="expireBackupsBenchmark-")
+        try:
+            self.createTree(rootPath)
+            with StatCounter() as counter:
+                start = time.perf_counter()
+                legacyFiles = self.legacyScan(rootPath)
+                legacyTime = time.perf_counter() - start
+            with StatCounter() as scanCounter:
+                scanner = BackupScanner(rootPath, ext=self.ext)
+                start = time.perf_counter()
+                scanFiles = scanner.scan()
+                scanTime = time.perf_counter() - start
+        finally:
+            shutil.rmtree(rootPath)
+        result = {
+            "files": len(scanFiles),
+            "legacy": {
+                "seconds": legacyTime,
+                "pathStatsPerFile": counter.count / max(len(legacyFiles), 1),
+                "relativeStatsPerFile": 0.0,
+            },
+            "scandir": {
+                "seconds": scanTime,
+                "pathStatsPerFile": scanCounter.count / max(len(scanFiles), 1),
+                "relativeStatsPerFile": scanner.stats.statCalls / max(len(scanFiles), 1),
+                "dirfd": scanner.useFd,
+            },
+        }
+        return result
+
+
+class RuleBenchmark:
+    """
+    compare the python and the vectorized rule engine on in memory tables of hourly backups
+    """
+
+    def __init__(self, sizes: list = None):
+        """
+        constructor
+
+        Args:
+            sizes(list): the numbers of files to benchmark with
+        """
+        if sizes is None:
+            sizes = [10000, 100000, 1000000]
+        self.sizes = sizes
+
+    def createTable(self, numberOfFiles: int, now: float) -> BackupFileTable:
+        """
+        create a table of backups taken about every hour in random order
+
+        Args:
+            numberOfFiles(int): the number of backup files
+            now(float): the current timestamp
+
+        Returns:
+            BackupFileTable: the table
+        """
+        rnd = random.Random(numberOfFiles)
+        table = BackupFileTable()
+        for i in range(numberOfFiles):
+            table.append(f"/backup/db/db-{i:08d}.tgz", rnd.randint(1, 10**9), now - i * 3600 - rnd.random() * 600)
+        table.reorder(rnd.sample(range(numberOfFiles), numberOfFiles))
+        return table
+
+    def run(self) -> list:
+        """
+        run the benchmark
+
+        Returns:
+            list: a dict with the number of files and the seconds per engine for each size
+        """
+        results = []
+        expiration = Expiration()
+        for size in self.sizes:
+            now = time.time()
+            result = {"files": size}
+            marks = []
+            engines = {
+                "python": lambda table: expiration.applyRules(table, verbose=False),
+                "array": lambda table: VectorizedRuleEngine(expiration, useNumpy=False).apply(table, now=now),
+            }
+            if VectorizedRuleEngine(expiration).useNumpy:
+                engines["numpy"] = lambda table: VectorizedRuleEngine(expiration, useNumpy=True).apply(table, now=now)
+            for name, engine in engines.items():
+                table = self.createTable(size, now)
+                start = time.perf_counter()
+                filesByAge = engine(table)
+                result[name] = time.perf_counter() - start
+                marks.append(filesByAge.expires)
+            result["sameMarks"] = all(mark == marks[0] for mark in marks)
+            results.append(result)
+        return results
+
+
+class TreeGenerator:
+    """
+    generator for large and deep synthetic backup trees
+
+    files are created relative to directory file descriptors and get their size
+    by ftruncate so that big files are sparse and cost no disk space
+    """
+
+    def __init__(
+        self,
+        numberOfFiles: int = 10000,
+        series: int = 10,
+        depth: int = 3,
+        filesPerDir: int = 100,
+        sizeDistribution: str = "lognormal:12:2",
+        sparseAbove: int = 65536,
+        seed: int = 42,
+    ):
+        """
+        constructor
+
+        Args:
+            numberOfFiles(int): the total number of backup files
+            series(int): the number of backup series - each series has one backup per day
+            depth(int): the number of directory levels below the root
+            filesPerDir(int): the number of files per leaf directory
+            sizeDistribution(str): fixed:size, uniform:min:max or lognormal:mu:sigma
+            sparseAbove(int): files bigger than this are created sparse - smaller ones get real content
+            seed(int): the seed for the random sizes
+        """
+        self.numberOfFiles = numberOfFiles
+        self.series = series
+        self.depth = depth
+        self.filesPerDir = filesPerDir
+        self.sizeDistribution = sizeDistribution
+        self.sparseAbove = sparseAbove
+        self.rnd = random.Random(seed)
+        kind, *params = sizeDistribution.split(":")
+        self.sizeKind = kind
+        self.sizeParams = [float(param) for param in params]
+        if kind not in ["fixed", "uniform", "lognormal"]:
+            raise Exception(f"invalid size distribution {sizeDistribution}")
+
+    def getSize(self) -> int:
+        """
+        get a random size according to my size distribution
+
+        Returns:
+            int: the size in bytes
+        """
+        if self.sizeKind == "fixed":
+            size = self.sizeParams[0]
+        elif self.sizeKind == "uniform":
+            size = self.rnd.uniform(self.sizeParams[0], self.sizeParams[1])
+        else:
+            size = self.rnd.lognormvariate(self.sizeParams[0], self.sizeParams[1])
+        return int(size)
+
+    def getDirPath(self, dirIndex: int) -> str:
+        """
+        get the relative path of the leaf directory with the given index
+
+        Args:
+            dirIndex(int): the index of the leaf directory
+
+        Returns:
+            str: a path with my depth levels e.g. d00/d01/d07
+        """
+        parts = []
+        for _level in range(self.depth):
+            parts.append(f"d{dirIndex % 16:02d}")
+            dirIndex //= 16
+        parts.reverse()
+        return os.path.join(*parts) if parts else ""
+
+    def generate(self, rootPath: str, now: float = None) -> dict:
+        """
+        generate my tree below the given rootPath
+
+        Args:
+            rootPath(str): the root directory - is created if needed
+            now(float): the timestamp of the youngest backups (default: the current time)
+
+        Returns:
+            dict: the number of files and directories and the apparent size in bytes
+        """
+        if now is None:
+            now = time.time()
+        os.makedirs(rootPath, exist_ok=True)
+        filesPerSeries = max(1, self.numberOfFiles // max(1, self.series))
+        total = 0
+        dirs = 0
+        dirPath = None
+        dirFd = None
+        chunk = b"\0" * 65536
+        try:
+            for i in range(self.numberOfFiles):
+                newDirPath = self.getDirPath(i // self.filesPerDir)
+                if newDirPath != dirPath or dirFd is None:
+                    if dirFd is not None:
+                        os.close(dirFd)
+                    dirPath = newDirPath
+                    fullPath = os.path.join(rootPath, dirPath)
+                    os.makedirs(fullPath, exist_ok=True)
+                    dirFd = os.open(fullPath, os.O_RDONLY | os.O_DIRECTORY)
+                    dirs += 1
+                series = i % self.series
+                age = i // self.series % filesPerSeries
+                mtime = now - age * 86400 - self.rnd.random() * 3600
+                isoDate = datetime.datetime.fromtimestamp(mtime).strftime("%Y-%m-%d_%H%M")
+                name = f"series{series:03d}-{isoDate}-{i}.tgz"
+                size = self.getSize()
+                fd = os.open(name, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644, dir_fd=dirFd)
+                try:
+                    if size > self.sparseAbove:
+                        os.ftruncate(fd, size)
+                    else:
+                        remaining = size
+                        while remaining > 0:
+                            remaining -= os.write(fd, chunk[:remaining])
+                    os.utime(fd, (mtime, mtime))
+                finally:
+                    os.close(fd)
+                total += size
+        finally:
+            if dirFd is not None:
+                os.close(dirFd)
+        result = {"files": self.numberOfFiles, "dirs": dirs, "bytes": total}
+        return result
+
+
+class BenchmarkSuite:
+    """
+    time the scan, rule application, reporting and deletion phases of an expiration
+    on a generated tree and keep the results in a JSON baseline file
+    """
+
+    phases = ["generate", "scan", "rules", "report", "delete"]
+    # generating the tree is the fixture and not compared against the baseline
+    comparedPhases = ["scan", "rules", "report", "delete"]
+
+    def __init__(self, generator: TreeGenerator, engine: str = "python", deleteWorkers: int = 4):
+        """
+        constructor
+
+        Args:
+            generator(TreeGenerator): the generator for the tree to benchmark on
+            engine(str): the rule engine to use
+            deleteWorkers(int): the number of delete workers
+        """
+        self.generator = generator
+        self.engine = engine
+        self.deleteWorkers = deleteWorkers
+
+    def timed(self, timings: dict, phase: str, func, *args, **kwargs):
+        """
+        call the given function and record its elapsed time for the given phase
+        """
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[phase] = time.perf_counter() - start
+        return result
+
+    def run(self) -> dict:
+        """
+        run all phases
+
+        Returns:
+            dict: the environment, parameters, counts and the seconds per phase
+        """
+        rootPath = tempfile.mkdtemp(prefix="expireBackupsSuite-")
+        timings = {}
+        try:
+            tree = self.timed(timings, "generate", self.generator.generate, rootPath)
+            eb = ExpireBackups(
+                rootPath=rootPath,
+                expiration=Expiration(engine=self.engine),
+                series=["auto"],
+                seriesWorkers=1,
+                deleteWorkers=self.deleteWorkers,
+            )
+            backupFiles = self.timed(timings, "scan", eb.getBackupFiles)
+            filesByAge, seriesNames, count = self.timed(timings, "rules", eb.applyRules, backupFiles)
+            summary = PlanSummary(collectExpired=True)
+            with open(os.devnull, "w") as devnull:
+                writer = PlanWriter.create("jsonl", devnull)
+                records = PlanWriter.records(filesByAge, seriesNames)
+                self.timed(timings, "report", writer.writePlan, records, count, summary, True)
+            deleter = Deleter(workers=self.deleteWorkers)
+            deleteResult = self.timed(timings, "delete", deleter.delete, summary.expired)
+        finally:
+            shutil.rmtree(rootPath)
+        result = {
+            "version": Version.version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "params": {
+                "files": self.generator.numberOfFiles,
+                "series": self.generator.series,
+                "depth": self.generator.depth,
+                "filesPerDir": self.generator.filesPerDir,
+                "sizeDistribution": self.generator.sizeDistribution,
+                "engine": self.engine,
+                "deleteWorkers": self.deleteWorkers,
+            },
+            "counts": {
+                "files": tree["files"],
+                "dirs": tree["dirs"],
+                "bytes": tree["bytes"],
+                "kept": summary.kept,
+                "deleted": deleteResult.deleted,
+            },
+            "seconds": timings,
+        }
+        return result
+
+    @classmethod
+    def save(cls, result: dict, baselinePath: str):
+        """
+        save the given result as a JSON baseline
+
+        Args:
+            result(dict): the benchmark result
+            baselinePath(str): the path of the JSON file
+        """
+        with open(baselinePath, "w") as jsonFile:
+            json.dump(result, jsonFile, indent=2)
+
+    @classmethod
+    def compare(cls, result: dict, baselinePath: str, tolerance: float = 1.2) -> list:
+        """
+        compare the given result with a baseline
+
+        Args:
+            result(dict): the benchmark result
+            baselinePath(str): the path of the JSON baseline file
+            tolerance(float): the factor by which a phase may be slower than the baseline
+
+        Returns:
+            list: (phase,baseline seconds,seconds) tuples of the phases that regressed
+        """
+        with open(baselinePath) as jsonFile:
+            baseline = json.load(jsonFile)
+        regressions = []
+        for phase in cls.comparedPhases:
+            before = baseline["seconds"].get(phase)
+            after = result["seconds"].get(phase)
+            if before is not None and after is not None and after > before * tolerance:
+                regressions.append((phase, before, after))
+        return regressions
+
+
+def main(argv=None):
+    """
+    run the benchmarks from the command line
+    """
+    if argv is None:
+        argv = sys.argv
+    parser = ArgumentParser(description="benchmark the backup file scan and rule application")
+    parser.add_argument("--benchmark", choices=["suite", "scan", "rules"], default="suite", help="the benchmark to run")
+    parser.add_argument("--files", type=int, default=10000, help="number of files (default: %(default)s)")
+    parser.add_argument("--filesPerDir", type=int, default=100, help="files per directory (default: %(default)s)")
+    parser.add_argument(
+        "--sizes",
+        default="10000,100000,1000000",
+        help="numbers of files for the rules benchmark (default: %(default)s)",
+    )
+    parser.add_argument("--series", type=int, default=10, help="number of backup series (default: %(default)s)")
+    parser.add_argument("--depth", type=int, default=3, help="directory depth of the tree (default: %(default)s)")
+    parser.add_argument(
+        "--sizeDistribution",
+        default="lognormal:12:2",
+        help="fixed:size, uniform:min:max or lognormal:mu:sigma (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--sparseAbove",
+        type=int,
+        default=65536,
+        help="create files bigger than this many bytes as sparse files (default: %(default)s)",
+    )
+    parser.add_argument("--engine", choices=Expiration.engines, default="python", help="the rule engine to use")
+    parser.add_argument("--deleteWorkers", type=int, default=4, help="number of delete workers (default: %(default)s)")
+    parser.add_argument("--baseline", help="JSON file to save the suite results to")
+    parser.add_argument("--compare", help="JSON baseline file to compare the suite results with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.2,
+        help="factor by which a phase may be slower than the baseline (default: %(default)s)",
+    )
+    args = parser.parse_args(argv[1:])
+    if args.benchmark == "suite":
+        generator = TreeGenerator(
+            args.files, args.series, args.depth, args.filesPerDir, args.sizeDistribution, args.sparseAbove
+        )
+        result = BenchmarkSuite(generator, engine=args.engine, deleteWorkers=args.deleteWorkers).run()
+        for phase in BenchmarkSuite.phases:
+            print(f"{phase:8}: {result['seconds'][phase]:7.3f} s")
+        print(f"{result['counts']}")
+        if args.compare:
+            regressions = BenchmarkSuite.compare(result, args.compare, args.tolerance)
+            for phase, before, after in regressions:
+                print(f"regression in {phase}: {before:.3f} s -> {after:.3f} s")
+            if regressions:
+                return 1
+        if args.baseline:
+            BenchmarkSuite.save(result, args.baseline)
+    elif args.benchmark == "rules":
+        sizes = [int(size) for size in args.sizes.split(",")]
+        for result in RuleBenchmark(sizes).run():
+            timings = " ".join(
+                f"{name}: {result[name]:7.3f} s" for name in ["python", "array", "numpy"] if name in result
+            )
+            print(f"{result['files']:8d} files {timings} same marks: {result['sameMarks']}")
+    else:
+        result = ScanBenchmark(args.files, args.filesPerDir).run()
+        for name in ["legacy", "scandir"]:
+            r = result[name]
+            print(
+                f"{name:8}: {r['seconds']:7.3f} s {r['pathStatsPerFile']:4.2f} path stat calls/file "
+                f"{r['relativeStatsPerFile']:4.2f} directory relative stat calls/file for {result['files']} files"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
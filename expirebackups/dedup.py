@@ -0,0 +1,240 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class HashCache:
+    """
+    persistent SQLite cache of the content hashes of backup files
+
+    a hash is keyed by the device and inode of the file and only reused
+    if the size and the modification time in nanoseconds are unchanged
+    """
+
+    cacheName = ".expireBackups.hashes"
+
+    def __init__(self, rootPath: str, cachePath: str = None, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            rootPath(str): the root path of the backup tree
+            cachePath(str): the path of the cache file (default: a dot file in the rootPath)
+            debug(bool): if True show debug information
+        """
+        if cachePath is None:
+            cachePath = os.path.join(rootPath, HashCache.cacheName)
+        self.cachePath = cachePath
+        self.debug = debug
+        self.db = None
+
+    def open(self) -> bool:
+        """
+        open my cache database - an unusable cache file is recreated
+
+        Returns:
+            bool: True if the cache could be opened
+        """
+        try:
+            self.db = self.connect()
+        except sqlite3.DatabaseError as ex:
+            if self.debug:
+                print(f"hash cache {self.cachePath} unusable ({ex}) - recreating")
+            try:
+                os.remove(self.cachePath)
+                self.db = self.connect()
+            except (OSError, sqlite3.DatabaseError):
+                self.db = None
+                return False
+        return True
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        connect to my cache file and make sure the schema exists
+
+        Returns:
+            sqlite3.Connection: the connection
+        """
+        db = sqlite3.connect(self.cachePath)
+        db.execute("PRAGMA journal_mode=MEMORY")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS hashes(dev INTEGER, inode INTEGER, size INTEGER, mtimeNs INTEGER, hash TEXT, "
+            "PRIMARY KEY(dev, inode))"
+        )
+        return db
+
+    def get(self, stats: os.stat_result) -> Optional[str]:
+        """
+        get the cached hash of the file with the given stat result
+
+        Args:
+            stats(os.stat_result): the stat result of the file
+
+        Returns:
+            str: the hash or None if the file is not cached or changed
+        """
+        row = self.db.execute(
+            "SELECT hash FROM hashes WHERE dev=? AND inode=? AND size=? AND mtimeNs=?",
+            (stats.st_dev, stats.st_ino, stats.st_size, stats.st_mtime_ns),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, entries: List[Tuple[os.stat_result, str]]):
+        """
+        record the hashes of the given files
+
+        Args:
+            entries(list): (stats,hash) tuples
+        """
+        self.db.executemany(
+            "INSERT OR REPLACE INTO hashes(dev, inode, size, mtimeNs, hash) VALUES(?,?,?,?,?)",
+            [(stats.st_dev, stats.st_ino, stats.st_size, stats.st_mtime_ns, digest) for stats, digest in entries],
+        )
+
+    def close(self):
+        """
+        commit and close my cache
+        """
+        if self.db is None:
+            return
+        self.db.commit()
+        self.db.close()
+        self.db = None
+
+
+class DuplicateDetector:
+    """
+    find backup files with identical content
+
+    only files that share their size with another file are candidates and
+    only candidates whose hash is not cached are read - by a pool of threads
+    since hashlib releases the global interpreter lock for large buffers
+    """
+
+    blockSize = 1 << 20
+
+    def __init__(self, workers: int = 1, cache: HashCache = None, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            workers(int): the number of threads to hash files with
+            cache(HashCache): an opened hash cache (if any)
+            debug(bool): if True show debug information
+        """
+        if workers < 1:
+            raise Exception(f"{workers} hashWorkers is invalid - hashWorkers must be >=1")
+        self.workers = workers
+        self.cache = cache
+        self.debug = debug
+        self.hashed = 0
+        self.cached = 0
+
+    @classmethod
+    def hashFile(cls, filePath: str) -> Optional[str]:
+        """
+        hash the content of the given file reading it in large blocks into a reused buffer
+
+        Args:
+            filePath(str): the path of the file
+
+        Returns:
+            str: the hex digest of the content or None if the file could not be read
+        """
+        digest = hashlib.blake2b()
+        buffer = bytearray(DuplicateDetector.blockSize)
+        view = memoryview(buffer)
+        try:
+            with open(filePath, "rb", buffering=0) as file:
+                while True:
+                    count = file.readinto(buffer)
+                    if not count:
+                        break
+                    digest.update(view[:count])
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def getHashes(self, filePaths: List[str]) -> Dict[str, str]:
+        """
+        get the content hashes of the given files
+
+        Args:
+            filePaths(list): the paths of the files
+
+        Returns:
+            dict: the hash by path of the files that could be read
+        """
+        hashes = {}
+        toHash = []
+        for filePath in filePaths:
+            try:
+                stats = os.stat(filePath)
+            except OSError:
+                continue
+            digest = self.cache.get(stats) if self.cache is not None else None
+            if digest is not None:
+                hashes[filePath] = digest
+                self.cached += 1
+            else:
+                toHash.append((filePath, stats))
+        paths = [filePath for filePath, _stats in toHash]
+        if self.workers > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                digests = list(executor.map(DuplicateDetector.hashFile, paths))
+        else:
+            digests = [DuplicateDetector.hashFile(filePath) for filePath in paths]
+        computed = []
+        for (filePath, stats), digest in zip(toHash, digests):
+            if digest is None:
+                continue
+            hashes[filePath] = digest
+            computed.append((stats, digest))
+        self.hashed += len(computed)
+        if self.cache is not None:
+            self.cache.put(computed)
+        return hashes
+
+    def findDuplicates(self, filePaths: Sequence[str], sizes: Sequence[int], mtimes: Sequence[float]) -> List[int]:
+        """
+        find the files whose content is identical to a younger file
+
+        Args:
+            filePaths(Sequence): the paths of the files
+            sizes(Sequence): the sizes of the files
+            mtimes(Sequence): the modification timestamps of the files
+
+        Returns:
+            list: the indices of the duplicates - the youngest file of each group of identical files is not included
+        """
+        bySize = {}
+        for i, size in enumerate(sizes):
+            if size > 0:
+                bySize.setdefault(size, []).append(i)
+        candidates = [i for rows in bySize.values() if len(rows) > 1 for i in rows]
+        hashes = self.getHashes([filePaths[i] for i in candidates])
+        groups = {}
+        for i in candidates:
+            digest = hashes.get(filePaths[i])
+            if digest is not None:
+                groups.setdefault((sizes[i], digest), []).append(i)
+        duplicates = []
+        for rows in groups.values():
+            if len(rows) > 1:
+                rows.sort(key=lambda i: mtimes[i], reverse=True)
+                duplicates.extend(rows[1:])
+        duplicates.sort()
+        if self.debug:
+            print(
+                f"{len(candidates)} candidates {self.hashed} hashed {self.cached} cached {len(duplicates)} duplicates"
+            )
+        return duplicates
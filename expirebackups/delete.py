@@ -0,0 +1,233 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+class DeleteResult:
+    """
+    the result of deleting expired backup files
+    """
+
+    def __init__(self):
+        """
+        constructor
+        """
+        self.deleted = 0
+        self.freed = 0
+        self.missing = 0
+        self.failures = []
+
+    def add(self, other: "DeleteResult"):
+        """
+        add the counts of the other result to mine
+
+        Args:
+            other(DeleteResult): the result to add
+        """
+        self.deleted += other.deleted
+        self.freed += other.freed
+        self.missing += other.missing
+        self.failures.extend(other.failures)
+
+    def __str__(self):
+        """
+        return a string representation of me
+        """
+        text = f"deleted {self.deleted} files {self.missing} already gone {len(self.failures)} failed"
+        return text
+
+
+class Deleter:
+    """
+    deletion stage for expired backup files
+
+    the files are grouped by directory and each directory is handled by a worker of a bounded
+    thread pool that unlinks the files relative to a file descriptor of the directory
+    failures are collected per file and do not abort the run
+    """
+
+    # the freed bytes are available as soon as the files are deleted
+    freesSpace = True
+
+    def __init__(self, workers: int = 1, debug: bool = False, directories: bool = False):
+        """
+        constructor
+
+        Args:
+            workers(int): the maximum number of concurrent delete workers
+            debug(bool): if True show debug information
+            directories(bool): if True directories are backups that are removed recursively
+        """
+        if workers < 1:
+            raise Exception(f"{workers} deleteWorkers is invalid - deleteWorkers must be >=1")
+        self.workers = workers
+        self.debug = debug
+        self.directories = directories
+        self.useFd = os.unlink in os.supports_dir_fd
+
+    def groupByDir(self, files: List[Tuple[str, int]]) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        group the given files by directory
+
+        Args:
+            files(list): (filePath,size) tuples
+
+        Returns:
+            dict: the (name,size) tuples by directory
+        """
+        byDir = {}
+        for filePath, size in files:
+            dirPath, name = os.path.split(filePath)
+            byDir.setdefault(dirPath, []).append((name, size))
+        return byDir
+
+    def delete(self, files: List[Tuple[str, int]]) -> DeleteResult:
+        """
+        delete the given files
+
+        Args:
+            files(list): (filePath,size) tuples of the files to delete
+
+        Returns:
+            DeleteResult: the counts and failures
+        """
+        result = DeleteResult()
+        if self.directories:
+            trees = [(filePath, size) for filePath, size in files if os.path.isdir(filePath)]
+            if trees:
+                treePaths = {filePath for filePath, _size in trees}
+                files = [(filePath, size) for filePath, size in files if filePath not in treePaths]
+                result.add(self.deleteTrees(trees))
+        byDir = self.groupByDir(files)
+        if self.workers == 1:
+            for dirPath, entries in byDir.items():
+                result.add(self.deleteInDir(dirPath, entries))
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # a directory with many files is split into chunks to keep all workers busy
+                chunkSize = max(1, len(files) // (self.workers * 4))
+                futures = []
+                for dirPath, entries in byDir.items():
+                    for start in range(0, len(entries), chunkSize):
+                        futures.append(executor.submit(self.deleteInDir, dirPath, entries[start : start + chunkSize]))
+                for future in futures:
+                    result.add(future.result())
+        for filePath, error in result.failures:
+            sys.stderr.write(f"failed to delete {filePath}: {error}\n")
+        return result
+
+    def deleteInDir(self, dirPath: str, entries: List[Tuple[str, int]]) -> DeleteResult:
+        """
+        delete the given files of a single directory
+
+        Args:
+            dirPath(str): the directory
+            entries(list): (name,size) tuples of the files in the directory
+
+        Returns:
+            DeleteResult: the counts and failures
+        """
+        result = DeleteResult()
+        dirFd = None
+        if self.useFd:
+            try:
+                dirFd = os.open(dirPath or ".", os.O_RDONLY | os.O_DIRECTORY)
+            except OSError as ex:
+                for name, _size in entries:
+                    result.failures.append((os.path.join(dirPath, name), ex))
+                return result
+        try:
+            for name, size in entries:
+                try:
+                    if dirFd is not None:
+                        os.unlink(name, dir_fd=dirFd)
+                    else:
+                        os.remove(os.path.join(dirPath, name))
+                    result.deleted += 1
+                    result.freed += size
+                except FileNotFoundError:
+                    result.missing += 1
+                except OSError as ex:
+                    result.failures.append((os.path.join(dirPath, name), ex))
+        finally:
+            if dirFd is not None:
+                os.close(dirFd)
+        return result
+
+    @classmethod
+    def removeEntry(cls, path: str, isDir: bool) -> Optional[OSError]:
+        """
+        remove the given directory tree or file
+
+        Args:
+            path(str): the path to remove
+            isDir(bool): True if the path is a directory (not a symbolic link to one)
+
+        Returns:
+            OSError: the error or None if the path was removed
+        """
+        try:
+            if isDir:
+                shutil.rmtree(path)
+            else:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as ex:
+            return ex
+        return None
+
+    def deleteTrees(self, trees: List[Tuple[str, int]]) -> DeleteResult:
+        """
+        delete the given directory backups recursively
+
+        the top level entries of all trees are removed concurrently so that the workers are
+        kept busy even for a single huge tree - then the emptied tree roots are removed
+
+        Args:
+            trees(list): (dirPath,size) tuples of the directories to delete
+
+        Returns:
+            DeleteResult: the counts and failures - a tree counts as one deleted backup
+        """
+        result = DeleteResult()
+        children = []
+        listed = []
+        for treePath, size in trees:
+            try:
+                with os.scandir(treePath) as entries:
+                    treeChildren = [(entry.path, entry.is_dir(follow_symlinks=False)) for entry in entries]
+            except FileNotFoundError:
+                result.missing += 1
+                continue
+            except OSError as ex:
+                result.failures.append((treePath, ex))
+                continue
+            listed.append((treePath, size, len(children), len(children) + len(treeChildren)))
+            children.extend(treeChildren)
+        if self.workers > 1 and len(children) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                errors = list(executor.map(lambda child: Deleter.removeEntry(*child), children))
+        else:
+            errors = [Deleter.removeEntry(path, isDir) for path, isDir in children]
+        for treePath, size, start, end in listed:
+            error = next((error for error in errors[start:end] if error is not None), None)
+            if error is None:
+                try:
+                    os.rmdir(treePath)
+                except OSError as ex:
+                    error = ex
+            if error is not None:
+                result.failures.append((treePath, error))
+            else:
+                result.deleted += 1
+                result.freed += size
+        return result
@@ -0,0 +1,237 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import json
+import os
+import sqlite3
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# the recorded content of a directory: size of the files with a single link,
+# (dev,inode,size) of the files with several links and the sub directory names
+DirEntry = Tuple[int, List[Tuple[int, int, int]], List[str]]
+
+
+class DirSizeCache:
+    """
+    persistent SQLite cache of the directory content needed to compute the size of directory backups
+
+    an entry is keyed by the path of the directory and only reused while the modification time of the directory
+    in nanoseconds is unchanged - backups are expected not to be modified in place
+    """
+
+    cacheName = ".expireBackups.dirsizes"
+
+    def __init__(self, rootPath: str, cachePath: str = None, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            rootPath(str): the root path of the backup tree
+            cachePath(str): the path of the cache file (default: a dot file in the rootPath)
+            debug(bool): if True show debug information
+        """
+        if cachePath is None:
+            cachePath = os.path.join(rootPath, DirSizeCache.cacheName)
+        self.cachePath = cachePath
+        self.debug = debug
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        connect to my cache file and make sure the schema exists
+
+        Returns:
+            sqlite3.Connection: the connection
+        """
+        db = sqlite3.connect(self.cachePath)
+        db.execute("PRAGMA journal_mode=MEMORY")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS dirs(path TEXT PRIMARY KEY, mtimeNs INTEGER, size INTEGER, links TEXT, "
+            "subDirs TEXT)"
+        )
+        return db
+
+    def load(self) -> Dict[str, Tuple[int, DirEntry]]:
+        """
+        load all recorded directories - an unusable cache file is ignored
+
+        Returns:
+            dict: the mtimeNs and content by directory path
+        """
+        try:
+            db = self.connect()
+            try:
+                rows = db.execute("SELECT path, mtimeNs, size, links, subDirs FROM dirs").fetchall()
+            finally:
+                db.close()
+        except sqlite3.DatabaseError as ex:
+            if self.debug:
+                print(f"directory size cache {self.cachePath} unusable ({ex}) - ignoring")
+            return {}
+        return {
+            path: (mtimeNs, (size, [tuple(link) for link in json.loads(links)], json.loads(subDirs)))
+            for path, mtimeNs, size, links, subDirs in rows
+        }
+
+    def save(self, entries: Dict[str, Tuple[int, DirEntry]]):
+        """
+        replace the recorded directories with the given ones - an unusable cache file is recreated
+
+        Args:
+            entries(dict): the mtimeNs and content by directory path
+        """
+        rows = [
+            (path, mtimeNs, size, json.dumps(links), json.dumps(subDirs))
+            for path, (mtimeNs, (size, links, subDirs)) in entries.items()
+        ]
+        try:
+            db = self.connect()
+        except sqlite3.DatabaseError:
+            try:
+                os.remove(self.cachePath)
+                db = self.connect()
+            except (OSError, sqlite3.DatabaseError):
+                return
+        try:
+            db.execute("DELETE FROM dirs")
+            db.executemany("INSERT INTO dirs(path, mtimeNs, size, links, subDirs) VALUES(?,?,?,?,?)", rows)
+            db.commit()
+        finally:
+            db.close()
+
+
+class DirectorySizer:
+    """
+    compute the size of directory backups like du - each inode is counted once per backup
+
+    the backups are sized concurrently by a pool of threads since the listing and stat calls release
+    the global interpreter lock. Directories whose modification time did not change since the
+    previous run are taken from the cache without listing them
+    """
+
+    def __init__(self, workers: int = 1, cache: DirSizeCache = None, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            workers(int): the number of threads to size the backups with
+            cache(DirSizeCache): the cache of the directory content (if any)
+            debug(bool): if True show debug information
+        """
+        if workers < 1:
+            raise Exception(f"{workers} sizeWorkers is invalid - sizeWorkers must be >=1")
+        self.workers = workers
+        self.cache = cache
+        self.debug = debug
+        self.cached = {}
+        # the directories seen in this run and whether they were listed
+        self.visited = {}
+
+    @property
+    def listed(self) -> int:
+        """
+        the number of directories that had to be listed
+        """
+        return sum(1 for _entry, listed in self.visited.values() if listed)
+
+    def getDirEntry(self, dirPath: str) -> Optional[DirEntry]:
+        """
+        get the content of the given directory - from the cache if the directory did not change
+
+        Args:
+            dirPath(str): the path of the directory
+
+        Returns:
+            DirEntry: the size of the single link files, the multi link files and the sub directory names or None
+            if the directory vanished
+        """
+        try:
+            mtimeNs = os.stat(dirPath, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            return None
+        cached = self.cached.get(dirPath)
+        if cached is not None and cached[0] == mtimeNs:
+            self.visited[dirPath] = ((mtimeNs, cached[1]), False)
+            return cached[1]
+        size = 0
+        links = []
+        subDirs = []
+        try:
+            with os.scandir(dirPath) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subDirs.append(entry.name)
+                            continue
+                        stats = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stats.st_nlink > 1:
+                        links.append((stats.st_dev, stats.st_ino, stats.st_size))
+                    else:
+                        size += stats.st_size
+        except OSError:
+            return None
+        dirEntry = (size, links, subDirs)
+        self.visited[dirPath] = ((mtimeNs, dirEntry), True)
+        return dirEntry
+
+    def getSize(self, path: str) -> int:
+        """
+        get the size of the given backup
+
+        Args:
+            path(str): the path of a backup directory or file
+
+        Returns:
+            int: the size in bytes of the files in the directory tree - each inode counted once -
+            or the size of the file - 0 if the backup vanished
+        """
+        try:
+            stats = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return 0
+        if not stat.S_ISDIR(stats.st_mode):
+            return stats.st_size
+        total = 0
+        linked = {}
+        stack = [path]
+        while stack:
+            dirPath = stack.pop()
+            dirEntry = self.getDirEntry(dirPath)
+            if dirEntry is None:
+                continue
+            size, links, subDirs = dirEntry
+            total += size
+            for dev, inode, linkSize in links:
+                linked[(dev, inode)] = linkSize
+            stack.extend(os.path.join(dirPath, name) for name in subDirs)
+        return total + sum(linked.values())
+
+    def getSizes(self, paths: List[str]) -> List[int]:
+        """
+        get the sizes of the given backups and update my cache
+
+        Args:
+            paths(list): the paths of the backup directories or files
+
+        Returns:
+            list: the size of each backup
+        """
+        if self.cache is not None:
+            self.cached = self.cache.load()
+        if self.workers > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                sizes = list(executor.map(self.getSize, paths))
+        else:
+            sizes = [self.getSize(path) for path in paths]
+        if self.cache is not None:
+            self.cache.save({dirPath: entry for dirPath, (entry, _listed) in self.visited.items()})
+        if self.debug:
+            print(f"{len(paths)} backups sized {len(self.visited)} directories {self.listed} listed")
+        return sizes
@@ -0,0 +1,249 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+from array import array
+from bisect import bisect_left
+
+from expirebackups.expire import BackupFile, BackupFileTable, ExpirationRule
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+class VectorizedRuleEngine:
+    """
+    rule engine that applies the rules of an Expiration
+    on a precomputed array of ages instead of file by file
+
+    the files are sorted once by an age array computed for a single snapshot of the current time
+    and for each kept file the next file that is old enough for the current rule is found by
+    binary search so that the work is O(n log n) for the sort and O(kept * log n) for the selection
+    numpy is used if available - otherwise the array and bisect modules
+    """
+
+    def __init__(self, expiration, useNumpy: bool = None):
+        """
+        constructor
+
+        Args:
+            expiration(Expiration): the expiration with the rules to apply
+            useNumpy(bool): if True use numpy - default: use numpy if it is installed
+        """
+        self.expiration = expiration
+        if useNumpy is None:
+            useNumpy = np is not None
+        self.useNumpy = useNumpy
+
+    def apply(self, backupFiles, verbose: bool = False, now: float = None, stream=None):
+        """
+        apply the rules of my expiration to the given backupFiles
+
+        Args:
+            backupFiles(list|BackupFileTable): the backup files to apply the rules to
+            verbose(bool): if True show which rules are applied
+            now(float): the timestamp to compute the ages for (default: the current time)
+            stream(TextIO): the stream to show which rules are applied on (default: sys.stdout)
+
+        Returns:
+            list|BackupFileTable: the sorted and marked backupFiles - a table is sorted in place
+        """
+        if now is None:
+            now = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
+        if isinstance(backupFiles, BackupFileTable):
+            if self.useNumpy:
+                self.sortTable(backupFiles, now)
+            else:
+                backupFiles.setAges(now, self.expiration.ageUnit)
+                backupFiles.reorder(self.argsort(backupFiles.ages))
+            sizes = backupFiles.sizes if self.expiration.minFileSize > 0 else None
+            expires, keptBy = self.select(backupFiles.ages, sizes, verbose, stream)
+            backupFiles.expires = bytearray(expires)
+            backupFiles.keptBy = keptBy
+            return backupFiles
+        ageUnit = self.expiration.ageUnit
+        ages = array("d", (backupFile.getAgeInDays(now, ageUnit) for backupFile in backupFiles))
+        order = self.argsort(ages)
+        filesByAge = [backupFiles[i] for i in order]
+        sortedAges = array("d", (ages[i] for i in order))
+        sizes = None
+        if self.expiration.minFileSize > 0:
+            sizes = array("q", (backupFile.size for backupFile in filesByAge))
+        expires, keptBy = self.select(sortedAges, sizes, verbose, stream)
+        for backupFile, ageInDays, expire, ruleName in zip(filesByAge, sortedAges, expires, keptBy):
+            backupFile.ageInDays = ageInDays
+            backupFile.expire = bool(expire)
+            backupFile.keptBy = ruleName
+        return filesByAge
+
+    def sortTable(self, table: BackupFileTable, now: float):
+        """
+        compute the ages of the given table and sort it by age with numpy
+
+        Args:
+            table(BackupFileTable): the table to sort in place
+            now(float): the timestamp to compute the ages for
+        """
+        mtimes = np.frombuffer(table.mtimes, dtype=np.float64)
+        # same as BackupFile.getAge
+        ageUnit = self.expiration.ageUnit
+        ages = np.floor_divide(now - mtimes, float(ageUnit))
+        if ageUnit != BackupFile.daySeconds:
+            ages = ages * ageUnit / BackupFile.daySeconds
+        order = np.argsort(ages, kind="stable")
+        table.now = now
+        table.ageUnit = ageUnit
+        table.filePaths = [table.filePaths[i] for i in order.tolist()]
+        for name, typecode, column in [
+            ("ages", "d", ages),
+            ("mtimes", "d", mtimes),
+            # sizes that are not known yet stay unknown
+            ("sizes", "q", np.frombuffer(table._sizes, dtype=np.int64)),
+        ]:
+            sortedColumn = array(typecode)
+            sortedColumn.frombytes(column[order].tobytes())
+            setattr(table, name, sortedColumn)
+
+    def argsort(self, ages) -> list:
+        """
+        get the stable sort order of the given ages
+
+        Args:
+            ages(array): the ages
+
+        Returns:
+            list: the indices of the ages in ascending order
+        """
+        if self.useNumpy:
+            order = np.argsort(np.frombuffer(ages, dtype=np.float64), kind="stable").tolist()
+        else:
+            order = sorted(range(len(ages)), key=ages.__getitem__)
+        return order
+
+    def select(self, ages, sizes, verbose: bool, stream=None) -> bytes:
+        """
+        select the files to keep
+
+        Args:
+            ages(array): the ages in days sorted ascending
+            sizes(array): the sizes in the same order - None if there is no minFileSize
+            verbose(bool): if True show which rules are applied
+            stream(TextIO): the stream to show which rules are applied on (default: sys.stdout)
+
+        Returns:
+            tuple(bytes,list): 1 for each file to expire 0 for each file to keep and
+            the name of the rule that kept each file (if any)
+        """
+        minFileSize = self.expiration.minFileSize
+        if self.useNumpy:
+            if sizes is None:
+                eligible = np.arange(len(ages))
+            else:
+                eligible = np.flatnonzero(np.frombuffer(sizes, dtype=np.int64) >= minFileSize)
+            eAges = np.frombuffer(ages, dtype=np.float64)[eligible]
+
+            def search(value: float, lo: int) -> int:
+                return lo + int(eAges[lo:].searchsorted(value, side="left"))
+
+        else:
+            if sizes is None:
+                eligible = list(range(len(ages)))
+            else:
+                eligible = [i for i, size in enumerate(sizes) if size >= minFileSize]
+            eAges = array("d", (ages[i] for i in eligible))
+
+            def search(value: float, lo: int) -> int:
+                return bisect_left(eAges, value, lo)
+
+        keptPositions, keptRules = self.selectKept(eAges, search, verbose, stream)
+        keptBy = [None] * len(ages)
+        if self.useNumpy:
+            expires = np.ones(len(ages), dtype=np.uint8)
+            keptIndices = eligible[keptPositions]
+            expires[keptIndices] = 0
+            for index, ruleName in zip(keptIndices.tolist(), keptRules):
+                keptBy[index] = ruleName
+            return expires.tobytes(), keptBy
+        expires = bytearray(b"\x01") * len(ages)
+        for pos, ruleName in zip(keptPositions, keptRules):
+            expires[eligible[pos]] = 0
+            keptBy[eligible[pos]] = ruleName
+        return bytes(expires), keptBy
+
+    def selectKept(self, eAges, search, verbose: bool, stream=None) -> list:
+        """
+        select the positions of the files to keep tier by tier
+
+        Args:
+            eAges: the sorted ages of the files that are big enough to be kept
+            search(Callable): binary search for the first position >= lo with an age >= a value
+            verbose(bool): if True show which rules are applied
+            stream(TextIO): the stream to show which rules are applied on (default: sys.stdout)
+
+        Returns:
+            tuple(list,list): the positions in eAges of the files to keep and the names of the rules that kept them
+        """
+        n = len(eAges)
+        kept = []
+        keptRules = []
+        pos = 0
+        prevAge = None
+        for ruleKey, rule in self.expiration.rules.items():
+            if pos >= n:
+                break
+            rule.ruleName = ruleKey
+            if verbose:
+                print(f"keeping {rule.minAmount} files for {rule.ruleName} backup", file=stream)
+            if rule.minAmount == 0:
+                # a rule with a minimum of 0 files still decides about exactly one file
+                if prevAge is None or eAges[pos] - prevAge >= rule.freq - ExpirationRule.tolerance:
+                    kept.append(pos)
+                    keptRules.append(ruleKey)
+                    prevAge = eAges[pos]
+                pos += 1
+                continue
+            count = 0
+            while count < rule.minAmount and pos < n:
+                if prevAge is None:
+                    nextPos = pos
+                else:
+                    nextPos = self.findNext(eAges, search, pos, prevAge, rule.freq)
+                    if nextPos >= n:
+                        pos = n
+                        break
+                kept.append(nextPos)
+                keptRules.append(ruleKey)
+                prevAge = eAges[nextPos]
+                pos = nextPos + 1
+                count += 1
+        return kept, keptRules
+
+    def findNext(self, eAges, search, pos: int, prevAge: float, freq: float) -> int:
+        """
+        find the first position >= pos whose age differs from prevAge by at least freq
+
+        Args:
+            eAges: the sorted ages
+            search(Callable): binary search for the first position >= lo with an age >= a value
+            pos(int): the position to start searching at
+            prevAge(float): the age of the previously kept file
+            freq(float): the frequency of the rule in days
+
+        Returns:
+            int: the position found - len(eAges) if there is none
+        """
+        n = len(eAges)
+        # the same tolerance for fractions of days as ExpirationRule.apply
+        freq = freq - ExpirationRule.tolerance
+        nextPos = search(prevAge + freq, pos)
+        # make the result consistent with the age difference check of ExpirationRule.apply
+        while nextPos > pos and eAges[nextPos - 1] - prevAge >= freq:
+            nextPos -= 1
+        while nextPos < n and eAges[nextPos] - prevAge < freq:
+            nextPos += 1
+        return nextPos
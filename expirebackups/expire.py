@@ -5,14 +5,19 @@ Created on 2022-04-01
 """
 
 import datetime
+import itertools
 import os
 import pathlib
+import re
 import sys
 import traceback
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from array import array
+from contextlib import contextmanager
 from tempfile import NamedTemporaryFile
-from typing import Tuple
+from typing import Iterable, Iterator, Tuple
 
+from expirebackups.metrics import RunMetrics
 from expirebackups.version import Version
 
 __version__ = Version.version
@@ -32,20 +37,128 @@ class BackupFile:
     a Backup file which is potentially to be expired
     """
 
-    def __init__(self, filePath: str):
+    # no per instance __dict__ - there might be millions of BackupFiles
+    __slots__ = ("filePath", "mtime", "_size", "expire", "keptBy", "_ageInDays")
+    # the size of a file whose timestamp was taken from its name - looked up on first access
+    unknownSize = -1
+    daySeconds = 86400
+
+    def __init__(self, filePath: str, stats: os.stat_result = None):
         """
         constructor
 
         Args:
             filePath(str): the filePath of this backup File
+            stats(os.stat_result): the stat result if already known e.g. from a scandir DirEntry (default: None)
         """
         self.filePath = filePath
-        self.modified, self.size = self.getStats()
-        self.sizeValue, self.unit, self.factor = BackupFile.getSize(self.size)
-        self.sizeString = BackupFile.getSizeString(self.size)
-        self.ageInDays = self.getAgeInDays()
-        self.isoDate = self.getIsoDateOfModification()
+        self.mtime, self._size = self.getStats(stats)
+        self._ageInDays = None
         self.expire = False
+        # the name of the rule that kept me (if any)
+        self.keptBy = None
+
+    @property
+    def size(self) -> int:
+        """
+        my size in bytes - looked up on first access if it is not known yet
+        """
+        if self._size < 0:
+            self._size = BackupFile.statSize(self.filePath)
+        return self._size
+
+    @size.setter
+    def size(self, size: int):
+        """
+        set my size in bytes
+        """
+        self._size = size
+
+    @classmethod
+    def statSize(cls, filePath: str) -> int:
+        """
+        look up the size of the given file
+
+        Args:
+            filePath(str): the path of the file
+
+        Returns:
+            int: the size in bytes - 0 if the file vanished
+
+        Raises:
+            OSError: if the file exists but can not be stat'ed e.g. EACCES or EIO - a file must not look empty
+            and be expired by the minFileSize because of a transient error
+        """
+        try:
+            return os.stat(filePath).st_size
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def sizeKnown(self) -> bool:
+        """
+        True if my size is known without looking it up
+        """
+        return self._size >= 0
+
+    @property
+    def modified(self) -> datetime.datetime:
+        """
+        the modification time of my file
+        """
+        modified = datetime.datetime.fromtimestamp(self.mtime, tz=datetime.timezone.utc)
+        return modified
+
+    @property
+    def ageInDays(self) -> float:
+        """
+        my age in days - computed on first access
+        """
+        if self._ageInDays is None:
+            self._ageInDays = self.getAgeInDays()
+        return self._ageInDays
+
+    @ageInDays.setter
+    def ageInDays(self, ageInDays: float):
+        """
+        set my age in days e.g. from a snapshot of the current time shared by many files
+        """
+        self._ageInDays = ageInDays
+
+    @property
+    def sizeValue(self) -> float:
+        """
+        my size in my unit
+        """
+        return BackupFile.getSize(self.size)[0]
+
+    @property
+    def unit(self) -> str:
+        """
+        my size unit e.g. "KB"
+        """
+        return BackupFile.getSize(self.size)[1]
+
+    @property
+    def factor(self) -> float:
+        """
+        the factor of my size unit e.g. 1024
+        """
+        return BackupFile.getSize(self.size)[2]
+
+    @property
+    def sizeString(self) -> str:
+        """
+        my size in human readable terms
+        """
+        return BackupFile.getSizeString(self.size)
+
+    @property
+    def isoDate(self) -> str:
+        """
+        the date of modification as an ISO date string
+        """
+        return self.getIsoDateOfModification()
 
     def __str__(self):
         """
@@ -99,28 +212,74 @@ class BackupFile:
             unitIndex += 1
         return size, units[unitIndex], factor
 
-    def getStats(self) -> Tuple[datetime.datetime, float]:
+    @classmethod
+    def parseSize(cls, text: str) -> int:
         """
-        get the datetime when the file was modified
+        parse the given human readable size
+
+        Args:
+            text(str): the size e.g. "500GB", "1.5 TB", "2K" or "4096"
 
         Returns:
-            datetime: the file modification time
+            int: the size in bytes
+        """
+        factors = {"": 1, "B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4, "P": 1024**5}
+        value = text.strip().upper()
+        if value.endswith("B") and len(value) > 1 and value[-2] in factors:
+            value = value[:-1]
+        unit = value[-1:] if value[-1:] in factors else ""
+        number = value[: len(value) - len(unit)].strip()
+        try:
+            size = int(float(number) * factors[unit])
+        except ValueError:
+            raise Exception(f"invalid size {text} - must be a number with an optional unit B,KB,MB,GB,TB or PB")
+        return size
+
+    def getStats(self, stats: os.stat_result = None) -> Tuple[float, int]:
         """
-        stats = os.stat(self.filePath)
-        modified = datetime.datetime.fromtimestamp(stats.st_mtime, tz=datetime.timezone.utc)
-        size = stats.st_size
-        return modified, size
+        get the time when the file was modified and its size
+
+        Args:
+            stats(os.stat_result): the stat result to use - if None my filePath is stat'ed
 
-    def getAgeInDays(self) -> float:
+        Returns:
+            Tuple(float,int): the file modification timestamp and size
+        """
+        if stats is None:
+            stats = os.stat(self.filePath)
+        return stats.st_mtime, stats.st_size
+
+    @classmethod
+    def getAge(cls, mtime: float, now: float, ageUnit: float = 86400) -> float:
+        """
+        get the age in days of a file with the given modification timestamp counting full age units
+
+        Args:
+            mtime(float): the modification timestamp
+            now(float): the timestamp to compute the age for
+            ageUnit(float): the resolution of the age in seconds - a day or the period of the finest sub-day tier
+
+        Returns:
+            float: the number of full days between mtime and now - or of full age units expressed in days
+        """
+        if ageUnit == BackupFile.daySeconds:
+            return int((now - mtime) // BackupFile.daySeconds)
+        return (now - mtime) // ageUnit * ageUnit / BackupFile.daySeconds
+
+    def getAgeInDays(self, now: float = None, ageUnit: float = 86400) -> float:
         """
         get the age of this backup file in days
 
+        Args:
+            now(float): the timestamp to compute the age for (default: the current time)
+            ageUnit(float): the resolution of the age in seconds (default: a day)
+
         Returns:
             float: the number of days this file is old
         """
-        now = datetime.datetime.now(tz=datetime.timezone.utc)
-        age = now - self.modified
-        return age.days
+        if now is None:
+            now = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
+        return BackupFile.getAge(self.mtime, now, ageUnit)
 
     def getIsoDateOfModification(self):
         """
@@ -132,12 +291,299 @@ class BackupFile:
         isoDate = self.modified.strftime("%Y-%m-%d_%H:%M")
         return isoDate
 
-    def delete(self):
+    def delete(self, storage=None):
         """
         delete my file
+
+        Args:
+            storage(StorageBackend): the storage of my file (default: the local filesystem)
         """
-        if os.path.isfile(self.filePath):
+        if storage is not None:
+            storage.remove(self.filePath)
+            return
+        try:
             os.remove(self.filePath)
+        except FileNotFoundError:
+            pass
+
+
+class BackupFileRow(BackupFile):
+    """
+    a view on a row of a BackupFileTable that behaves like a BackupFile
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: "BackupFileTable", row: int):
+        """
+        constructor
+
+        Args:
+            table(BackupFileTable): the table to view
+            row(int): the index of the row
+        """
+        self.table = table
+        self.row = row
+
+    @property
+    def filePath(self) -> str:
+        """
+        the path of my row
+        """
+        return self.table.filePaths[self.row]
+
+    @property
+    def mtime(self) -> float:
+        """
+        the modification timestamp of my row
+        """
+        return self.table.mtimes[self.row]
+
+    @property
+    def size(self) -> int:
+        """
+        the size of my row
+        """
+        return self.table.getSize(self.row)
+
+    @property
+    def sizeKnown(self) -> bool:
+        """
+        True if the size of my row is known without looking it up
+        """
+        return self.table._sizes[self.row] >= 0
+
+    @property
+    def expire(self) -> bool:
+        """
+        the expiration mark of my row
+        """
+        return bool(self.table.expires[self.row])
+
+    @expire.setter
+    def expire(self, expire: bool):
+        """
+        set the expiration mark of my row
+        """
+        self.table.expires[self.row] = 1 if expire else 0
+
+    @property
+    def keptBy(self) -> str:
+        """
+        the name of the rule that kept my row (if any)
+        """
+        return self.table.keptBy[self.row]
+
+    @keptBy.setter
+    def keptBy(self, keptBy: str):
+        """
+        set the name of the rule that kept my row
+        """
+        self.table.keptBy[self.row] = keptBy
+
+    @property
+    def ageInDays(self) -> float:
+        """
+        the age of my row as computed for the table's snapshot of the current time
+        """
+        if self.table.ages is None:
+            return self.getAgeInDays()
+        return self.table.ages[self.row]
+
+    @ageInDays.setter
+    def ageInDays(self, ageInDays: float):
+        """
+        set the age of my row
+        """
+        self.table.setAges()
+        self.table.ages[self.row] = ageInDays
+
+
+class BackupFileTable:
+    """
+    a compact columnar table of BackupFiles
+
+    paths, sizes, modification times and expiration marks are kept in parallel arrays
+    so that memory scales with the bytes per file instead of the objects per file
+    """
+
+    def __init__(self):
+        """
+        constructor
+        """
+        self.filePaths = []
+        self._sizes = array("q")
+        # True if some sizes are not known yet
+        self.lazySizes = False
+        self.mtimes = array("d")
+        self.expires = bytearray()
+        self.keptBy = []
+        # ages are computed on demand for a single snapshot of the current time
+        self.ages = None
+        self.now = None
+        self.ageUnit = BackupFile.daySeconds
+
+    @classmethod
+    def fromBackupFiles(cls, backupFiles: list) -> "BackupFileTable":
+        """
+        create a table from the given list of BackupFiles
+
+        Args:
+            backupFiles(list): the BackupFiles to take over
+
+        Returns:
+            BackupFileTable: the table
+        """
+        table = cls()
+        for backupFile in backupFiles:
+            table.append(backupFile.filePath, backupFile.size, backupFile.mtime)
+        return table
+
+    def append(self, filePath: str, size: int, mtime: float):
+        """
+        append a row
+
+        Args:
+            filePath(str): the path of the file
+            size(int): the size in bytes
+            mtime(float): the modification timestamp
+        """
+        self.filePaths.append(filePath)
+        self._sizes.append(size)
+        if size < 0:
+            self.lazySizes = True
+        self.mtimes.append(mtime)
+        self.expires.append(0)
+        self.keptBy.append(None)
+        if self.ages is not None:
+            self.ages.append(BackupFile.getAge(mtime, self.now, self.ageUnit))
+
+    def __len__(self):
+        """
+        the number of rows
+        """
+        return len(self.filePaths)
+
+    @property
+    def sizes(self) -> array:
+        """
+        the sizes of all rows - sizes that are not known yet are looked up
+        """
+        if self.lazySizes:
+            for row, size in enumerate(self._sizes):
+                if size < 0:
+                    self._sizes[row] = BackupFile.statSize(self.filePaths[row])
+            self.lazySizes = False
+        return self._sizes
+
+    @sizes.setter
+    def sizes(self, sizes: array):
+        """
+        set the sizes of all rows
+        """
+        self._sizes = sizes
+        self.lazySizes = any(size < 0 for size in sizes)
+
+    def getSize(self, row: int) -> int:
+        """
+        get the size of the given row - looked up on first access if it is not known yet
+
+        Args:
+            row(int): the index of the row
+
+        Returns:
+            int: the size in bytes
+        """
+        size = self._sizes[row]
+        if size < 0:
+            size = BackupFile.statSize(self.filePaths[row])
+            self._sizes[row] = size
+        return size
+
+    def setSize(self, row: int, size: int):
+        """
+        set the size of the given row
+
+        Args:
+            row(int): the index of the row
+            size(int): the size in bytes
+        """
+        self._sizes[row] = size
+
+    def getLazyRows(self) -> list:
+        """
+        get the rows whose size is not known yet
+
+        Returns:
+            list: the indices of the rows
+        """
+        if not self.lazySizes:
+            return []
+        return [row for row, size in enumerate(self._sizes) if size < 0]
+
+    def __getitem__(self, row: int) -> BackupFileRow:
+        """
+        get a view on the given row
+        """
+        if row < 0:
+            row += len(self)
+        if row < 0 or row >= len(self):
+            raise IndexError(f"row {row} out of range")
+        return BackupFileRow(self, row)
+
+    def __iter__(self):
+        """
+        iterate over views on my rows
+        """
+        for row in range(len(self)):
+            yield BackupFileRow(self, row)
+
+    def setAges(self, now: float = None, ageUnit: float = 86400):
+        """
+        compute the ages of all rows for the given snapshot of the current time if not done yet
+
+        Args:
+            now(float): the timestamp to compute the ages for (default: the current time)
+            ageUnit(float): the resolution of the ages in seconds (default: a day)
+        """
+        if self.ages is not None and now is None:
+            return
+        if now is None:
+            now = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
+        self.now = now
+        self.ageUnit = ageUnit
+        getAge = BackupFile.getAge
+        self.ages = array("d", [getAge(mtime, now, ageUnit) for mtime in self.mtimes])
+
+    def sortByAge(self, now: float = None, ageUnit: float = 86400) -> "BackupFileTable":
+        """
+        sort my rows in place by age - youngest first
+
+        Args:
+            now(float): the timestamp to compute the ages for (default: the current time)
+            ageUnit(float): the resolution of the ages in seconds (default: a day)
+
+        Returns:
+            BackupFileTable: myself
+        """
+        self.setAges(now, ageUnit)
+        self.reorder(sorted(range(len(self)), key=self.ages.__getitem__))
+        return self
+
+    def reorder(self, order: list):
+        """
+        reorder my rows
+
+        Args:
+            order(list): the row indices in the wanted order
+        """
+        self.filePaths = [self.filePaths[i] for i in order]
+        self._sizes = array("q", [self._sizes[i] for i in order])
+        self.mtimes = array("d", [self.mtimes[i] for i in order])
+        self.expires = bytearray([self.expires[i] for i in order])
+        self.keptBy = [self.keptBy[i] for i in order]
+        if self.ages is not None:
+            self.ages = array("d", [self.ages[i] for i in order])
 
 
 class ExpirationRule:
@@ -145,6 +591,9 @@ class ExpirationRule:
     an expiration rule keeps files at a certain
     """
 
+    # sub-day ages and frequencies are fractions of days - differences are compared with this tolerance in days
+    tolerance = 1e-9
+
     def __init__(self, name, freq: float, minAmount: int):
         """
         constructor
@@ -159,6 +608,8 @@ class ExpirationRule:
         self.minAmount = minAmount
         if minAmount < 0:
             raise Exception(f"{self.minAmount} {self.name} is invalid - {self.name} must be >=0")
+        if freq <= 0:
+            raise Exception(f"frequency {freq} of {self.name} is invalid - must be >0 days")
 
     def reset(self, prevFile: BackupFile):
         """
@@ -185,12 +636,13 @@ class ExpirationRule:
         """
         if prevFile is not None:
             ageDiff = file.ageInDays - prevFile.ageInDays
-            keep = ageDiff >= self.freq
+            keep = ageDiff >= self.freq - ExpirationRule.tolerance
         else:
             ageDiff = file.ageInDays - self.startAge
             keep = True
         if keep:
             self.kept += 1
+            file.keptBy = self.ruleName
         else:
             file.expire = True
         if debug:
@@ -205,6 +657,10 @@ class Expiration:
     Expiration pattern
     """
 
+    engines = ["python", "vectorized"]
+    # the units of the periods of custom tiers in seconds
+    periodUnits = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
     def __init__(
         self,
         days: int = defaultDays,
@@ -213,6 +669,9 @@ class Expiration:
         years: int = defaultYears,
         minFileSize: int = defaultMinFileSize,
         debug: bool = False,
+        engine: str = "python",
+        hours: int = 0,
+        tiers: list = None,
     ):
         """
         constructor
@@ -222,20 +681,63 @@ class Expiration:
             weeks(float): how many files to keep for the weekly backup
             months(float): how many files to keep for the monthly backup
             years(float):  how many files to keep for the yearly backup
+            minFileSize(int): the minimum size of a file to be kept - with 0 the rules do not need the sizes
+            so that sizes which are not known yet e.g. with times from the file names are not looked up for them
             debug(bool): if true show debug information (rule application)
+            engine(str): the rule engine to use: "python" (file by file) or "vectorized" (batched on an age array)
+            hours(int): how many files to keep for the hourly backup - 0 for no hourly tier
+            tiers(list): additional tiers as (name,frequency in days,count) tuples or "name:period:count" strings
+            e.g. "quarterhourly:15m:8" - the tiers are applied from the finest to the coarsest frequency
         """
-        self.rules = {
-            "dayly": ExpirationRule("days", 1.0, days),
-            "weekly": ExpirationRule("weeks", 7.0, weeks),
-            # the month is in fact 4 weeks
-            "monthly": ExpirationRule("months", 28.0, months),
-            # the year is in fact 52 weeks or 13 of the 4 week months
-            "yearly": ExpirationRule("years", 364.0, years),
-        }
+        if engine not in Expiration.engines:
+            raise Exception(f"invalid engine {engine} - must be one of {','.join(Expiration.engines)}")
+        rules = []
+        if hours:
+            rules.append(("hourly", ExpirationRule("hours", 1 / 24, hours)))
+        rules.extend(
+            [
+                ("dayly", ExpirationRule("days", 1.0, days)),
+                ("weekly", ExpirationRule("weeks", 7.0, weeks)),
+                # the month is in fact 4 weeks
+                ("monthly", ExpirationRule("months", 28.0, months)),
+                # the year is in fact 52 weeks or 13 of the 4 week months
+                ("yearly", ExpirationRule("years", 364.0, years)),
+            ]
+        )
+        for tier in tiers or []:
+            name, freq, minAmount = Expiration.parseTier(tier) if isinstance(tier, str) else tier
+            if name in dict(rules):
+                raise Exception(f"duplicate tier {name}")
+            rules.append((name, ExpirationRule(name, freq, minAmount)))
+        # a stable sort keeps the order of the standard tiers
+        rules.sort(key=lambda item: item[1].freq)
+        self.rules = dict(rules)
+        # the ages are counted in full periods of the finest sub-day tier - otherwise in full days
+        finest = min(rule.freq for rule in self.rules.values())
+        self.ageUnit = BackupFile.daySeconds if finest >= 1.0 else round(finest * BackupFile.daySeconds, 6)
         self.minFileSize = minFileSize
         self.debug = debug
+        self.engine = engine
 
-    def getNextRule(self, ruleIter, prevFile: BackupFile, verbose: bool) -> ExpirationRule:
+    @classmethod
+    def parseTier(cls, text: str) -> tuple:
+        """
+        parse the given tier specification
+
+        Args:
+            text(str): the tier as name:period:count e.g. "quarterhourly:15m:8" - the period has
+            one of the units s,m,h,d or w
+
+        Returns:
+            tuple(str,float,int): the name, the frequency in days and the number of files to keep
+        """
+        match = re.fullmatch(r"([^:]+):(\d+(?:\.\d+)?)([smhdw]):(\d+)", text.strip())
+        if match is None:
+            raise Exception(f"invalid tier {text} - must be name:period:count e.g. quarterhourly:15m:8")
+        name, period, unit, count = match.groups()
+        return name, float(period) * Expiration.periodUnits[unit] / BackupFile.daySeconds, int(count)
+
+    def getNextRule(self, ruleIter, prevFile: BackupFile, verbose: bool, stream=None) -> ExpirationRule:
         """
         get the next rule for the given ruleIterator
 
@@ -243,41 +745,115 @@ class Expiration:
             ruleIter(Iter): Iterator over ExpirationRules
             prevFile(BackupFile): the previousFile to take into account / reset/anchor the rule with
             verbose(bool): if True show a message that the rule will be applied
+            stream(TextIO): the stream to show the message on (default: sys.stdout)
         Returns:
-            ExpirationRule: the next ExpirationRule
+            ExpirationRule: the next ExpirationRule or None if all rules have been applied
         """
-        ruleKey = next(ruleIter)
+        ruleKey = next(ruleIter, None)
+        if ruleKey is None:
+            return None
         rule = self.rules[ruleKey]
         rule.ruleName = ruleKey
         if verbose:
-            print(f"keeping {rule.minAmount} files for {rule.ruleName} backup")
+            print(f"keeping {rule.minAmount} files for {rule.ruleName} backup", file=stream)
         rule.reset(prevFile)
         return rule
 
-    def applyRules(self, backupFiles: list, verbose: bool = True):
+    def applyRules(self, backupFiles: list, verbose: bool = True, now: float = None, stream=None):
         """
         apply my expiration rules to the given list of
         backup Files
 
         Args:
-            backupFiles(list): the list of backupFiles to apply the rules to
+            backupFiles(list|BackupFileTable): the list or table of backupFiles to apply the rules to
             verbose(debug): if true show what the rules are doing
+            now(float): the timestamp to compute the ages for (default: the current time)
+            stream(TextIO): the stream to show what the rules are doing on (default: sys.stdout)
         Returns:
-            list: the sorted and marked list of backupFiles
+            list|BackupFileTable: the sorted and marked list of backupFiles - a table is sorted in place
+        """
+        if self.engine == "vectorized":
+            from expirebackups.engine import VectorizedRuleEngine
+
+            return VectorizedRuleEngine(self).apply(backupFiles, verbose=verbose, now=now, stream=stream)
+        # a single snapshot of the current time for all files
+        if now is None:
+            now = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
+        if isinstance(backupFiles, BackupFileTable):
+            filesByAge = backupFiles.sortByAge(now, self.ageUnit)
+            filesByAge.expires = bytearray(len(filesByAge))
+            filesByAge.keptBy = [None] * len(filesByAge)
+        else:
+            for backupFile in backupFiles:
+                backupFile.ageInDays = backupFile.getAgeInDays(now, self.ageUnit)
+                backupFile.expire = False
+                backupFile.keptBy = None
+            filesByAge = sorted(backupFiles, key=lambda backupFile: backupFile.ageInDays)
+        for _file in self.markFiles(filesByAge, verbose, stream=stream):
+            pass
+        return filesByAge
+
+    def markFiles(self, filesByAge: Iterable[BackupFile], verbose: bool = True, stream=None) -> Iterator[BackupFile]:
+        """
+        apply my expiration rules in a single pass to the given files sorted by age
+
+        Args:
+            filesByAge(Iterable): the backup files youngest first with their ageInDays set and not marked yet
+            verbose(bool): if true show what the rules are doing
+            stream(TextIO): the stream to show what the rules are doing on (default: sys.stdout)
+
+        Yields:
+            BackupFile: each file as soon as it is marked - only the previously kept file is held on to
         """
-        filesByAge = sorted(backupFiles, key=lambda backupFile: backupFile.getAgeInDays())
         ruleIter = iter(self.rules)
-        rule = self.getNextRule(ruleIter, None, verbose)
+        rule = self.getNextRule(ruleIter, None, verbose, stream)
         prevFile = None
         for file in filesByAge:
-            if file.size < self.minFileSize:
+            # files beyond the last rule and files that are too small are expired
+            if rule is None or (self.minFileSize > 0 and file.size < self.minFileSize):
                 file.expire = True
             else:
                 ruleDone = rule.apply(file, prevFile, debug=self.debug)
                 if not file.expire:
                     prevFile = file
                 if ruleDone:
-                    rule = self.getNextRule(ruleIter, prevFile, verbose)
+                    rule = self.getNextRule(ruleIter, prevFile, verbose, stream)
+            yield file
+
+    def applyRulesIncremental(
+        self, backupFiles: list, planPath: str, filterKey: str = "", verbose: bool = True, stream=None
+    ):
+        """
+        apply my expiration rules reusing the plan of the previous run saved at the given path
+        and save the new plan - if the set of files changed unexpectedly all files are evaluated
+
+        Args:
+            backupFiles(list|BackupFileTable): the list or table of backupFiles to apply the rules to
+            planPath(str): the path of the plan of the previous run
+            filterKey(str): a key for the file filter the backupFiles were selected with
+            verbose(debug): if true show what the rules are doing
+            stream(TextIO): the stream to show what the rules are doing on (default: sys.stdout)
+        Returns:
+            list|BackupFileTable: the sorted and marked list of backupFiles - a table is sorted in place
+        """
+        if self.ageUnit != BackupFile.daySeconds:
+            # the plan reuse relies on ages in full days - sub-day tiers are evaluated fully
+            return self.applyRules(backupFiles, verbose=verbose, stream=stream)
+        from expirebackups.incremental import RulePlan
+
+        key = RulePlan.getKey(self, filterKey)
+        now = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
+        plan = RulePlan.load(planPath)
+        result = None
+        if plan is not None:
+            result = plan.reapply(self, key, backupFiles, now, verbose=verbose, stream=stream)
+        if result is None:
+            backupFiles = RulePlan.sortByMtime(backupFiles)
+            filesByAge = self.applyRules(backupFiles, verbose=verbose, now=now, stream=stream)
+            newPlan = RulePlan.fromFiles(self, key, filesByAge, now)
+        else:
+            filesByAge, newPlan = result
+        newPlan.save(planPath)
         return filesByAge
 
 
@@ -294,6 +870,32 @@ class ExpireBackups(object):
         expiration: Expiration = None,
         dryRun: bool = True,
         debug: bool = False,
+        useIndex: bool = False,
+        reindex: bool = False,
+        compact: bool = False,
+        deleteWorkers: int = 1,
+        outputFormat: str = "text",
+        series: list = None,
+        seriesWorkers: int = 1,
+        incremental: bool = False,
+        includes: list = None,
+        excludes: list = None,
+        maxDepth: int = None,
+        targetFree: str = None,
+        targetOrder: list = None,
+        dedup: bool = False,
+        hashWorkers: int = 1,
+        nameTime: str = None,
+        directories: bool = False,
+        sizeWorkers: int = 1,
+        quarantine: str = None,
+        purgeRate: str = None,
+        backgroundPurge: bool = False,
+        memoryBudget: str = None,
+        accounting: bool = False,
+        storage=None,
+        endpoint: str = None,
+        listWorkers: int = 1,
     ):
         """
         Constructor
@@ -304,7 +906,78 @@ class ExpireBackups(object):
             ext(str): file extensions to filter for e.g. ".tgz" (if any)
             expiration(Expiration): the Expiration Rules to apply
             dryRun(bool): donot delete any files but only show deletion plan
+            debug(bool): if True show debug information
+            useIndex(bool): if True keep a persistent scan index in the rootPath and only rescan changed directories
+            reindex(bool): if True rebuild the scan index from scratch
+            compact(bool): if True keep the backup files in a columnar BackupFileTable
+            deleteWorkers(int): the number of concurrent workers for deleting expired files
+            outputFormat(str): the format of the expiration plan: text, jsonl or csv
+            series(list): glob patterns of backup series to expire independently in a single walk -
+            "auto" derives the series from the timestamps or numbers in the file names
+            seriesWorkers(int): the number of worker processes for applying the rules to the series
+            incremental(bool): if True save the plan of each run in the rootPath and only reevaluate
+            the files affected by the changes since the previous run
+            includes(list): glob or "re:" patterns of the relative paths of the files to include (if any)
+            excludes(list): glob or "re:" patterns of the relative paths of the files and directories to exclude -
+            excluded directories are not descended into
+            maxDepth(int): the maximum depth of the directories to descend into - 0 for the rootPath only
+            targetFree(str): the free space to reach on the filesystem of the rootPath e.g. "20%" or "500GB" -
+            if the rules do not free enough space further kept files are expired (if any)
+            targetOrder(list): the names of the rules whose files to expire first to reach the targetFree
+            dedup(bool): if True expire files with the same content as a younger file before applying the rules
+            hashWorkers(int): the number of threads for hashing the content of the files
+            nameTime(str): a strptime-like pattern e.g. "%Y-%m-%d_%H%M" or a "re:" prefixed regular expression
+            with named groups for the backup time in the file names - used instead of the modification time (if any)
+            directories(bool): if True matching directories are backups e.g. snapshots - their size is computed
+            recursively with a cache in the rootPath and they are deleted recursively
+            sizeWorkers(int): the number of threads for computing the size of directory backups
+            quarantine(str): the path of a trash directory on the filesystem of the rootPath to rename
+            expired files into instead of deleting them (if any)
+            purgeRate(str): the maximum bytes per second to free when purging the quarantine e.g. "200MB"
+            backgroundPurge(bool): if True purge the quarantine in a detached process after deleting
+            memoryBudget(str): the memory for holding the scanned files e.g. "256MB" - if set the files are
+            expired as a stream with an external sort that spills to temporary files (if any)
+            accounting(bool): if True report the allocated and the reclaimable size of the plan taking
+            hard links and sparse files into account
+            storage(StorageBackend): the storage of the backups (default: an object store for an s3://bucket/prefix
+            rootPath else the local filesystem)
+            endpoint(str): the endpoint url of an S3 compatible object store e.g. a MinIO server (if any)
+            listWorkers(int): the number of threads for listing the prefixes of an object store
         """
+        if incremental and series:
+            raise Exception("incremental rule evaluation can not be combined with series")
+        if memoryBudget is not None:
+            conflicts = {
+                "series": series,
+                "incremental": incremental,
+                "targetFree": targetFree,
+                "dedup": dedup,
+                "directories": directories,
+                "accounting": accounting,
+            }
+            conflicting = [name for name, value in conflicts.items() if value]
+            if conflicting:
+                raise Exception(f"a memoryBudget can not be combined with {','.join(conflicting)}")
+        if accounting and directories:
+            raise Exception("accounting can not be combined with directories - their sizes are already hard link aware")
+        if storage is None:
+            from expirebackups.storage import StorageBackend
+
+            storage = StorageBackend.forRoot(rootPath, endpoint=endpoint, listWorkers=listWorkers)
+        if not storage.local:
+            needsFilesystem = {
+                "useIndex": useIndex or reindex,
+                "incremental": incremental,
+                "targetFree": targetFree,
+                "dedup": dedup,
+                "directories": directories,
+                "quarantine": quarantine,
+                "accounting": accounting,
+            }
+            conflicting = [name for name, value in needsFilesystem.items() if value]
+            if conflicting:
+                raise Exception(f"an object store can not be combined with {','.join(conflicting)}")
+        self.storage = storage
         self.rootPath = rootPath
         self.baseName = baseName
         self.ext = ext
@@ -314,6 +987,44 @@ class ExpireBackups(object):
         self.expiration = expiration
         self.dryRun = dryRun
         self.debug = debug
+        self.useIndex = useIndex
+        self.reindex = reindex
+        self.compact = compact
+        self.deleteWorkers = deleteWorkers
+        self.outputFormat = outputFormat
+        self.series = series
+        self.seriesWorkers = seriesWorkers
+        self.incremental = incremental
+        self.pathFilter = None
+        if includes or excludes or maxDepth is not None:
+            from expirebackups.pathfilter import PathFilter
+
+            self.pathFilter = PathFilter(includes, excludes, maxDepth)
+        self.freeSpaceTarget = None
+        if targetFree:
+            from expirebackups.space import FreeSpaceTarget
+
+            self.freeSpaceTarget = FreeSpaceTarget(targetFree, targetOrder, list(self.expiration.rules))
+        self.dedup = dedup
+        self.hashWorkers = hashWorkers
+        self.nameParser = None
+        if nameTime:
+            from expirebackups.nametime import NameTimeParser
+
+            self.nameParser = NameTimeParser(nameTime)
+        self.directories = directories
+        self.sizeWorkers = sizeWorkers
+        self.quarantine = quarantine
+        self.purgeRate = purgeRate
+        self.backgroundPurge = backgroundPurge
+        self.memoryBudget = BackupFile.parseSize(memoryBudget) if memoryBudget is not None else None
+        self.accounting = accounting
+        self.usage = None
+        self.filterKey = None
+        self.summary = None
+        self.deleteResult = None
+        self.scanStats = None
+        self.metrics = RunMetrics()
 
     @classmethod
     def createTestFile(cls, ageInDays: float, baseName: str = None, ext: str = ".tst"):
@@ -363,52 +1074,343 @@ class ExpireBackups(object):
     def getBackupFiles(self) -> list:
         """
         get the list of my backup Files
+
+        Returns:
+            list|BackupFileTable: the backup files - as a table if i am compact or expire series
         """
-        backupFiles = []
-        for root, _dirs, files in os.walk(self.rootPath):
-            for file in files:
-                include = False
-                if self.baseName is not None:
-                    include = file.startswith(self.baseName)
-                if self.ext is not None:
-                    include = file.endswith(self.ext)
-                if include:
-                    backupFile = BackupFile(os.path.join(root, file))
-                    backupFiles.append(backupFile)
-        return backupFiles
-
-    def doexpire(self, withDelete: bool = False, show=True, showLimit: int = None):
+        with self.openScanner() as scanner:
+            scan = scanner.scanTable if self.compact or self.series else scanner.scan
+            return scan()
+
+    @contextmanager
+    def openScanner(self):
+        """
+        open a scanner for my backup files with my scan index if i keep one
+
+        Yields:
+            BackupScanner: the scanner - the index is only recorded as complete if the scan was not interrupted
+        """
+        from expirebackups.index import ScanIndex
+
+        scanner = self.getScanner()
+        if self.useIndex:
+            index = ScanIndex(self.rootPath, scanner.getFilterKey(), debug=self.debug)
+            if index.open(reindex=self.reindex):
+                scanner.index = index
+                scanner.recheckSize = self.expiration.minFileSize
+        self.scanStats = scanner.stats
+        self.filterKey = scanner.getFilterKey()
+        if scanner.index is None:
+            yield scanner
+            return
+        try:
+            yield scanner
+        except BaseException:
+            scanner.index.close(complete=False)
+            raise
+        scanner.index.close()
+
+    def getScanner(self):
+        """
+        get a scanner for my backup files
+
+        Returns:
+            BackupScanner: the scanner for my rootPath and file filter
+        """
+        scanner = self.storage.getScanner(
+            baseName=self.baseName,
+            ext=self.ext,
+            matcher=self.getPartitioner(),
+            pathFilter=self.pathFilter,
+            nameParser=self.nameParser,
+            directories=self.directories,
+        )
+        if self.usage is not None:
+            scanner.onFile = self.usage.record
+        return scanner
+
+    def getPartitioner(self):
+        """
+        get the partitioner for my backup series
+
+        Returns:
+            SeriesPartitioner: the partitioner or None if i do not expire series
+        """
+        if not self.series:
+            return None
+        from expirebackups.series import SeriesPartitioner
+
+        return SeriesPartitioner(self.series)
+
+    def applyRules(self, backupFiles, stream=None) -> tuple:
+        """
+        apply my expiration to the given backup files - per series if i expire series
+
+        Args:
+            backupFiles(list|BackupFileTable): the backup files
+            stream(TextIO): the stream to show what the rules are doing on (default: sys.stdout)
+
+        Returns:
+            tuple(Iterable,Iterable,int): the sorted and marked files, the series name of each file (if any)
+            and the number of files
+        """
+        if not self.series:
+            # only the human readable plan may be interleaved with the rule messages
+            verbose = self.outputFormat == "text"
+            if self.incremental:
+                from expirebackups.incremental import RulePlan
+
+                planPath = os.path.join(self.rootPath, RulePlan.planName)
+                filesByAge = self.expiration.applyRulesIncremental(
+                    backupFiles, planPath, self.filterKey, verbose, stream=stream
+                )
+            else:
+                filesByAge = self.expiration.applyRules(backupFiles, verbose=verbose, stream=stream)
+            return filesByAge, None, len(filesByAge)
+        from expirebackups.series import SeriesExpiration
+
+        seriesTables = self.getPartitioner().partition(backupFiles)
+        seriesExpiration = SeriesExpiration(self.expiration, workers=self.seriesWorkers)
+        results = seriesExpiration.apply(seriesTables)
+        filesByAge = itertools.chain.from_iterable(table for _name, table in results)
+        seriesNames = itertools.chain.from_iterable(itertools.repeat(name, len(table)) for name, table in results)
+        count = sum(len(table) for _name, table in results)
+        return filesByAge, seriesNames, count
+
+    def sizeDirectories(self, backupFiles):
+        """
+        compute the sizes of the directory backups in the given backup files
+
+        Args:
+            backupFiles(list|BackupFileTable): the backup files - the sizes are set in place
+        """
+        from expirebackups.dirsize import DirectorySizer, DirSizeCache
+
+        if isinstance(backupFiles, BackupFileTable):
+            rows = backupFiles.getLazyRows()
+            paths = [backupFiles.filePaths[row] for row in rows]
+        else:
+            lazyFiles = [backupFile for backupFile in backupFiles if not backupFile.sizeKnown]
+            paths = [backupFile.filePath for backupFile in lazyFiles]
+        sizer = DirectorySizer(
+            workers=self.sizeWorkers, cache=DirSizeCache(self.rootPath, debug=self.debug), debug=self.debug
+        )
+        sizes = sizer.getSizes(paths)
+        if isinstance(backupFiles, BackupFileTable):
+            for row, size in zip(rows, sizes):
+                backupFiles.setSize(row, size)
+            backupFiles.lazySizes = False
+        else:
+            for backupFile, size in zip(lazyFiles, sizes):
+                backupFile.size = size
+        self.metrics.count("dirsSized", sizer.listed)
+
+    def collapseDuplicates(self, backupFiles) -> tuple:
+        """
+        remove the files whose content is identical to a younger file from the given backup files
+        so that the retention slots cover distinct data
+
+        Args:
+            backupFiles(list|BackupFileTable): the backup files
+
+        Returns:
+            tuple: the remaining backup files and the duplicates marked for expiration - a table is reduced in place
+        """
+        from expirebackups.dedup import DuplicateDetector, HashCache
+
+        if isinstance(backupFiles, BackupFileTable):
+            filePaths, sizes, mtimes = backupFiles.filePaths, backupFiles.sizes, backupFiles.mtimes
+        else:
+            filePaths = [backupFile.filePath for backupFile in backupFiles]
+            sizes = [backupFile.size for backupFile in backupFiles]
+            mtimes = [backupFile.mtime for backupFile in backupFiles]
+        cache = HashCache(self.rootPath, debug=self.debug)
+        detector = DuplicateDetector(workers=self.hashWorkers, cache=cache if cache.open() else None, debug=self.debug)
+        try:
+            duplicateRows = detector.findDuplicates(filePaths, sizes, mtimes)
+        finally:
+            cache.close()
+        self.metrics.count("filesHashed", detector.hashed)
+        self.metrics.count("duplicates", len(duplicateRows))
+        duplicateSet = set(duplicateRows)
+        if isinstance(backupFiles, BackupFileTable):
+            duplicates = BackupFileTable()
+            for row in duplicateRows:
+                duplicates.append(filePaths[row], sizes[row], mtimes[row])
+            duplicates.setAges()
+            duplicates.expires = bytearray(b"\x01") * len(duplicates)
+            backupFiles.reorder([row for row in range(len(backupFiles)) if row not in duplicateSet])
+        else:
+            duplicates = [backupFiles[row] for row in duplicateRows]
+            for backupFile in duplicates:
+                backupFile.expire = True
+                backupFile.keptBy = None
+            backupFiles = [backupFile for row, backupFile in enumerate(backupFiles) if row not in duplicateSet]
+        return backupFiles, duplicates
+
+    def expireForSpace(self, filesByAge, seriesNames, stream=None) -> tuple:
+        """
+        expire further kept files if the files expired by my rules do not free enough space for my free space target
+
+        Args:
+            filesByAge(Iterable): the sorted and marked files
+            seriesNames(Iterable): the series name of each file (if any)
+            stream(TextIO): the stream to show how many files are additionally expired on (default: sys.stdout)
+
+        Returns:
+            tuple(list,list,list): the marked files, the series name of each file
+            and the (filePath,size) tuples of the additionally expired files in the order to delete them
+        """
+        filesByAge = list(filesByAge)
+        seriesNames = list(seriesNames) if seriesNames is not None else [None] * len(filesByAge)
+        planned = sum(backupFile.size for backupFile in filesByAge if backupFile.expire)
+        shortfall = self.freeSpaceTarget.getShortfall(self.rootPath, planned)
+        selected = self.freeSpaceTarget.select(filesByAge, seriesNames, shortfall)
+        for backupFile in selected:
+            backupFile.expire = True
+            backupFile.keptBy = None
+        if selected and self.outputFormat == "text":
+            selectedSize = BackupFile.getSizeString(sum(backupFile.size for backupFile in selected))
+            print(
+                f"expiring {len(selected)} more files ({selectedSize}) for targetFree {self.freeSpaceTarget.target}",
+                file=stream,
+            )
+        spaceFiles = [(backupFile.filePath, backupFile.size) for backupFile in selected]
+        return filesByAge, seriesNames, spaceFiles
+
+    def doexpire(
+        self, withDelete: bool = False, show=True, showLimit: int = None, stream=None, backupFiles=None, writer=None
+    ):
         """
         expire the files in the given rootPath
 
         withDelete(bool): if True really delete the files
         show(bool): if True show the expiration plan
         showLimit(int): if set limit the number of lines to display
+        stream(TextIO): the stream to write the plan to (default: sys.stdout)
+        backupFiles(list|BackupFileTable): the backup files to expire if already known e.g. from a watched
+        model of the rootPath (default: None - scan my rootPath)
+        writer(PlanWriter): the writer for the plan (default: a writer for my outputFormat)
         """
-        backupFiles = self.getBackupFiles()
-        filesByAge = self.expiration.applyRules(backupFiles)
-        total = 0
-        keptTotal = 0
-        kept = 0
-        if show:
-            deletehint = "by deletion" if withDelete else "dry run"
-            print(f"expiring {len(filesByAge)} files {deletehint}")
-        for i, backupFile in enumerate(filesByAge):
-            total += backupFile.size
-            totalString = BackupFile.getSizeString(total)
-            marker = backupFile.getMarker()
-            line = f"#{i+1:4d}{marker}:{backupFile.ageInDays:6.1f} days({backupFile.sizeString}/{totalString})→{backupFile.filePath}"
-            showLine = show and (showLimit is None or i < showLimit)
-            if showLine:
-                print(line)
-            if not backupFile.expire:
-                kept += 1
-                keptTotal += backupFile.size
-            if withDelete and backupFile.expire:
-                backupFile.delete()
-        if show:
-            keptSizeString = BackupFile.getSizeString(keptTotal)
-            print(f"kept {kept} files {keptSizeString}")
+        from expirebackups.plan import PlanSummary, PlanWriter
+
+        metrics = RunMetrics()
+        self.metrics = metrics
+        if self.memoryBudget is not None and backupFiles is None:
+            from expirebackups.stream import StreamingExpiration
+
+            streaming = StreamingExpiration(self, self.memoryBudget)
+            streaming.run(withDelete, show=show, showLimit=showLimit, stream=stream, writer=writer)
+            return
+        if self.accounting:
+            from expirebackups.usage import SpaceUsage
+
+            self.usage = SpaceUsage()
+        if backupFiles is None:
+            with metrics.phase("scan"):
+                backupFiles = self.getBackupFiles()
+            metrics.count("dirsVisited", self.scanStats.dirs)
+            metrics.count("filesScanned", self.scanStats.files)
+            metrics.count("statCalls", self.scanStats.statCalls)
+        if self.directories:
+            with metrics.phase("scan"):
+                self.sizeDirectories(backupFiles)
+        duplicates = []
+        if self.dedup:
+            with metrics.phase("dedup"):
+                backupFiles, duplicates = self.collapseDuplicates(backupFiles)
+        with metrics.phase("rules"):
+            filesByAge, seriesNames, count = self.applyRules(backupFiles, stream=stream)
+            if duplicates:
+                # the duplicates follow the files the rules were applied to
+                filesByAge = itertools.chain(filesByAge, duplicates)
+                if seriesNames is not None:
+                    seriesNames = itertools.chain(seriesNames, itertools.repeat("duplicates", len(duplicates)))
+                count += len(duplicates)
+            spaceFiles = []
+            if self.freeSpaceTarget is not None:
+                filesByAge, seriesNames, spaceFiles = self.expireForSpace(filesByAge, seriesNames, stream=stream)
+        summary = PlanSummary(collectExpired=withDelete)
+        with metrics.phase("report"):
+            # the sizes of kept files are only looked up if they are shown or accounted
+            keptSizes = show or self.usage is not None or self.freeSpaceTarget is not None
+            records = PlanWriter.records(filesByAge, seriesNames, keptSizes=keptSizes)
+            if self.usage is not None:
+                records = self.usage.tally(records)
+            if show:
+                if writer is None:
+                    writer = PlanWriter.create(self.outputFormat, stream)
+                writer.writePlan(records, count, summary, withDelete, limit=showLimit)
+            else:
+                for _record in summary.tally(records):
+                    pass
+        self.summary = summary
+        metrics.count("filesMarked", summary.count - summary.kept)
+        metrics.count("bytesMarked", summary.total - summary.keptTotal)
+        if self.usage is not None:
+            metrics.count("statCalls", self.usage.statCalls)
+            metrics.count("bytesReclaimable", self.usage.reclaimable)
+            if show and self.outputFormat == "text":
+                print(self.usage, file=stream)
+        if withDelete:
+            with metrics.phase("delete"):
+                deleter = self.getDeleter()
+                spacePaths = {filePath for filePath, _size in spaceFiles}
+                ruleExpired = [file for file in summary.expired if file[0] not in spacePaths]
+                self.deleteResult = deleter.delete(ruleExpired)
+                if spaceFiles:
+                    # stop as soon as the target is met - the sizes are only an estimate of the freed space
+                    # quarantined files still take their space until they are purged
+                    planned = 0 if deleter.freesSpace else self.deleteResult.freed
+                    spaceResult = self.freeSpaceTarget.deleteUntilMet(self.rootPath, spaceFiles, deleter, planned)
+                    self.deleteResult.add(spaceResult)
+            metrics.count("filesDeleted", self.deleteResult.deleted)
+            metrics.count("bytesFreed", self.deleteResult.freed)
+            metrics.count("deleteFailures", len(self.deleteResult.failures))
+            if show and self.outputFormat == "text":
+                print(f"{self.deleteResult} freeing {BackupFile.getSizeString(self.deleteResult.freed)}", file=stream)
+            if self.quarantine is not None and self.backgroundPurge:
+                from expirebackups.quarantine import Purger
+
+                Purger.spawn(self.quarantine, self.purgeRate)
+
+    def getDeleter(self):
+        """
+        get the deleter for my expired files
+
+        Returns:
+            Deleter|Quarantine: the quarantine if i quarantine expired files else a Deleter
+        """
+        if self.quarantine is not None:
+            from expirebackups.quarantine import Quarantine
+
+            quarantine = Quarantine(self.quarantine, debug=self.debug)
+            quarantine.open(self.rootPath)
+            return quarantine
+        return self.storage.getDeleter(workers=self.deleteWorkers, debug=self.debug, directories=self.directories)
+
+    def savePlan(self, planPath: str):
+        """
+        scan and apply the rules and save the plan to the given path to be applied later without a rescan
+
+        Args:
+            planPath(str): the path of the plan file - replaced atomically
+        """
+        from expirebackups.apply import PlanFileWriter
+
+        if not self.storage.local:
+            # the PlanApplier verifies and deletes the planned files in the local filesystem
+            raise Exception(f"a plan can only be saved for a local rootPath - {self.rootPath} is an object store")
+        tmpPath = f"{planPath}.tmp"
+        with open(tmpPath, "w") as planFile:
+            writer = PlanFileWriter(
+                planFile,
+                rootPath=self.rootPath,
+                nameTime=self.nameParser is not None,
+                directories=self.directories,
+            )
+            self.doexpire(False, writer=writer)
+        os.replace(tmpPath, planPath)
 
 
 def main(argv=None):  # IGNORE:C0111
@@ -472,6 +1474,21 @@ USAGE
             help="number of consecutive years to keep a yearly backup (default: %(default)s)",
         )
 
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=0,
+            help="number of consecutive hours to keep an hourly backup - 0 for no hourly tier (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--tier",
+            dest="tiers",
+            action="append",
+            default=None,
+            help="additional retention tier as name:period:count e.g. quarterhourly:15m:8 with the period units "
+            "s,m,h,d or w - may be repeated",
+        )
+
         # file filter selection arguments
         parser.add_argument(
             "--minFileSize",
@@ -479,10 +1496,86 @@ USAGE
             default=defaultMinFileSize,
             help="minimum File size in bytes to filter for (default: %(default)s)",
         )
-        parser.add_argument("--rootPath", default=".")
+        parser.add_argument(
+            "--rootPath",
+            nargs="+",
+            default=["."],
+            help="the paths of the backups, glob patterns e.g. '/backup/*' or s3://bucket/prefix urls - "
+            "several roots are expired in parallel worker processes (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--shardWorkers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="number of worker processes for expiring several roots (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--deviceWorkers",
+            type=int,
+            default=1,
+            help="number of roots on the same device to expire concurrently (default: %(default)s)",
+        )
         parser.add_argument("--baseName", default=None, help="the basename to filter for (default: %(default)s)")
         parser.add_argument("--ext", default=None, help="the extension to filter for (default: %(default)s)")
 
+        parser.add_argument(
+            "--include",
+            dest="includes",
+            action="append",
+            default=None,
+            help="glob pattern of the files to include e.g. '*.tgz' or 'db/**' - 're:' prefixes a regular expression "
+            "- may be repeated",
+        )
+        parser.add_argument(
+            "--exclude",
+            dest="excludes",
+            action="append",
+            default=None,
+            help="glob pattern of the files and directories to exclude e.g. '.snapshot/' or 'lost+found' - "
+            "excluded directories are not scanned, 're:' prefixes a regular expression - may be repeated",
+        )
+        parser.add_argument(
+            "--maxDepth",
+            type=int,
+            default=None,
+            help="maximum depth of the directories to scan - 0 for the rootPath only (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--nameTime",
+            default=None,
+            help="pattern of the backup time in the file names e.g. '%%Y-%%m-%%d_%%H%%M' or a 're:' prefixed "
+            "regular expression with the named groups year,month,day,hour,minute,second - used instead of the "
+            "modification time and saves a stat per file (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--directories",
+            action="store_true",
+            help="treat matching directories as backups e.g. rsnapshot or pg_basebackup snapshots - their size "
+            "is computed recursively with a cache in the rootPath and they are deleted recursively",
+        )
+        parser.add_argument(
+            "--sizeWorkers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="number of threads for computing the size of directory backups (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--series",
+            action="append",
+            default=None,
+            help="glob pattern of a backup series e.g. 'db1-*.tgz' to expire independently in a single walk - "
+            "may be repeated, 'auto' derives the series from the file names",
+        )
+        parser.add_argument(
+            "--seriesWorkers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="number of worker processes for applying the rules to the series (default: %(default)s)",
+        )
+
         parser.add_argument(
             "--createTestFiles",
             type=int,
@@ -490,10 +1583,246 @@ USAGE
             help="create the given number of temporary test files (default: %(default)s)",
         )
 
+        parser.add_argument(
+            "--index",
+            action="store_true",
+            help="keep a persistent scan index in the rootPath and only rescan changed directories",
+        )
+        parser.add_argument("--reindex", action="store_true", help="rebuild the scan index from scratch")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="save the plan of each run in the rootPath and only reevaluate the files affected by the changes "
+            "since the previous run",
+        )
+
+        parser.add_argument(
+            "--engine",
+            choices=Expiration.engines,
+            default="python",
+            help="the rule engine to use (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--compact",
+            action="store_true",
+            help="keep the backup files in a compact columnar table to save memory for huge archives",
+        )
+
+        parser.add_argument(
+            "--format",
+            dest="outputFormat",
+            choices=["text", "jsonl", "csv"],
+            default="text",
+            help="the format of the expiration plan (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--deleteWorkers",
+            type=int,
+            default=1,
+            help="number of concurrent workers for deleting expired files (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--stats", action="store_true", help="show timings and counters of the run phases on stderr"
+        )
+        parser.add_argument(
+            "--prometheus",
+            default=None,
+            help="write the timings and counters to the given file for the node exporter textfile collector",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            default=None,
+            help="run the benchmark suite on a generated tree with the given number of files (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--simulate",
+            type=float,
+            default=None,
+            help="simulate daily backups and expiration runs with the given rules for the given number of years "
+            "instead of expiring files (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--targetFree",
+            default=None,
+            help="free space to reach on the filesystem of the rootPath e.g. 20%% or 500GB - if the rules do not "
+            "free enough space further kept files are expired (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--targetOrder",
+            default=None,
+            help="comma separated rules whose files to expire first to reach the targetFree - oldest first "
+            "(default: the rules from the finest to the coarsest e.g. hourly,dayly,weekly,monthly,yearly)",
+        )
+
+        parser.add_argument(
+            "--dedup",
+            action="store_true",
+            help="expire backups with the same content as a younger backup before applying the rules - "
+            "the content hashes are cached in the rootPath",
+        )
+        parser.add_argument(
+            "--hashWorkers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="number of threads for hashing the content of the backups (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="keep running and expire as soon as new backups arrive in the rootPath (Linux only)",
+        )
+        parser.add_argument(
+            "--settle",
+            type=float,
+            default=0.5,
+            help="seconds without file events to wait for before expiring in watch mode (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--config",
+            default=None,
+            help="run the jobs of the given TOML or YAML job file in a single process with a consolidated summary - "
+            "the expiration options are taken from the job file (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--jobWorkers",
+            type=int,
+            default=None,
+            help="number of roots of the job file to process concurrently (default: the workers of the job file or 1)",
+        )
+
+        parser.add_argument(
+            "--quarantine",
+            default=None,
+            help="rename expired files into the given trash directory on the same filesystem instead of deleting "
+            "them - the space is reclaimed by --purge (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--purge",
+            action="store_true",
+            help="purge the --quarantine directory throttled to --purgeRate truncating huge files in chunks",
+        )
+        parser.add_argument(
+            "--purgeRate",
+            default=None,
+            help="maximum bytes per second to free when purging the quarantine e.g. 200MB (default: unlimited)",
+        )
+        parser.add_argument(
+            "--backgroundPurge",
+            action="store_true",
+            help="purge the --quarantine directory in a detached background process after expiring",
+        )
+
+        parser.add_argument(
+            "--plan",
+            dest="planPath",
+            default=None,
+            help="scan, apply the rules and save the plan as JSON lines to the given file instead of deleting "
+            "(default: %(default)s)",
+        )
+        parser.add_argument(
+            "--apply",
+            dest="applyPath",
+            default=None,
+            help="delete the files to expire of the given saved plan without a rescan - unchanged files only, "
+            "resuming an interrupted apply from its journal - needs -f to actually delete (default: %(default)s)",
+        )
+
+        parser.add_argument(
+            "--memoryBudget",
+            default=None,
+            help="memory for holding the scanned backups e.g. 256MB - expire as a stream with a sort that spills "
+            "to temporary files for very large trees (default: unlimited)",
+        )
+
+        parser.add_argument(
+            "--accounting",
+            action="store_true",
+            help="report the allocated and the truly reclaimable size of the plan taking hard links and "
+            "sparse files into account",
+        )
+
+        parser.add_argument(
+            "--endpoint",
+            default=None,
+            help="endpoint url of an S3 compatible object store e.g. a MinIO server for an s3://bucket/prefix "
+            "rootPath (default: Amazon S3)",
+        )
+        parser.add_argument(
+            "--listWorkers",
+            type=int,
+            default=8,
+            help="number of threads for listing the prefixes of an object store (default: %(default)s)",
+        )
+
         parser.add_argument("-f", "--force", action="store_true")
         parser.add_argument("-V", "--version", action="version", version=program_version_message)
 
         args = parser.parse_args(argv[1:])
+        if args.benchmark:
+            from expirebackups import benchmark
+
+            return benchmark.main([argv[0], "--files", str(args.benchmark), "--engine", args.engine])
+        if args.simulate:
+            from expirebackups import simulate
+
+            # the simulation makes at most one backup per day - sub-day tiers can not be simulated
+            unsupported = [option for option, value in {"--hours": args.hours, "--tier": args.tiers}.items() if value]
+            if unsupported:
+                raise Exception(f"{', '.join(unsupported)} can not be combined with --simulate")
+            simulateArgs = [argv[0], "--simulate", str(args.simulate), "--minFileSize", str(args.minFileSize)]
+            for name in ["days", "weeks", "months", "years"]:
+                simulateArgs.extend([f"--{name}", str(getattr(args, name))])
+            return simulate.main(simulateArgs)
+        if args.config:
+            from expirebackups.jobs import JobRunner
+
+            runOptions = {
+                "--stats": args.stats,
+                "--prometheus": args.prometheus,
+                "--plan": args.planPath,
+                "--apply": args.applyPath,
+                "--watch": args.watch,
+                "--purge": args.purge,
+            }
+            ignored = [option for option, value in runOptions.items() if value]
+            if ignored:
+                raise Exception(f"{', '.join(ignored)} can not be combined with --config")
+            runner = JobRunner.load(args.config, withDelete=args.force, debug=args.debug, workers=args.jobWorkers)
+            return runner.run()
+        if args.purge:
+            from expirebackups.quarantine import Purger, Quarantine
+            from expirebackups.shard import ShardRunner
+            from expirebackups.storage import ObjectStore
+
+            if not args.quarantine:
+                raise Exception("--purge needs the --quarantine directory to purge")
+            # a purge destroys everything quarantined - never in the directory of the backups
+            for root in ShardRunner.expandRoots(args.rootPath):
+                if not root.startswith(ObjectStore.scheme):
+                    Quarantine.checkRoot(args.quarantine, root)
+            purger = Purger(args.quarantine, rate=Purger.parseRate(args.purgeRate), debug=args.debug)
+            result = purger.purge()
+            print(f"purged {result.deleted} backups freeing {BackupFile.getSizeString(result.freed)}")
+            return 1 if result.failures else 0
+        if args.applyPath:
+            from expirebackups.apply import PlanApplier
+
+            applier = PlanApplier(
+                args.applyPath, deleteWorkers=args.deleteWorkers, debug=args.debug, quarantine=args.quarantine
+            )
+            result = applier.apply(withDelete=args.force)
+            hint = "" if args.force else "dry run - would have "
+            print(f"{hint}{result} freeing {BackupFile.getSizeString(result.freed)}")
+            if args.force and args.quarantine and args.backgroundPurge:
+                from expirebackups.quarantine import Purger
+
+                Purger.spawn(args.quarantine, args.purgeRate)
+            return 1 if result.failures else 0
         if args.createTestFiles:
             path, _backupFiles = ExpireBackups.createTestFiles(args.createTestFiles)
             print(f"created {args.createTestFiles} test files with extension '.tst' in {path}")
@@ -510,23 +1839,83 @@ USAGE
             dryRun = True
             if args.force:
                 dryRun = False
-            expiration = Expiration(
-                days=args.days,
-                months=args.months,
-                weeks=args.weeks,
-                years=args.years,
-                minFileSize=args.minFileSize,
-                debug=args.debug,
-            )
+            expirationOptions = {
+                "days": args.days,
+                "months": args.months,
+                "weeks": args.weeks,
+                "years": args.years,
+                "minFileSize": args.minFileSize,
+                "engine": args.engine,
+                "hours": args.hours,
+                "tiers": args.tiers,
+            }
+            expireOptions = {
+                "baseName": args.baseName,
+                "ext": args.ext,
+                "useIndex": args.index or args.reindex,
+                "reindex": args.reindex,
+                "compact": args.compact,
+                "deleteWorkers": args.deleteWorkers,
+                "outputFormat": args.outputFormat,
+                "series": args.series,
+                "seriesWorkers": args.seriesWorkers,
+                "incremental": args.incremental,
+                "includes": args.includes,
+                "excludes": args.excludes,
+                "maxDepth": args.maxDepth,
+                "targetFree": args.targetFree,
+                "targetOrder": args.targetOrder.split(",") if args.targetOrder else None,
+                "dedup": args.dedup,
+                "hashWorkers": args.hashWorkers,
+                "nameTime": args.nameTime,
+                "directories": args.directories,
+                "sizeWorkers": args.sizeWorkers,
+                "quarantine": args.quarantine,
+                "purgeRate": args.purgeRate,
+                "backgroundPurge": args.backgroundPurge,
+                "memoryBudget": args.memoryBudget,
+                "accounting": args.accounting,
+                "endpoint": args.endpoint,
+                "listWorkers": args.listWorkers,
+            }
+            from expirebackups.shard import ShardRunner
+
+            roots = ShardRunner.expandRoots(args.rootPath)
+            if len(roots) > 1:
+                if args.watch or args.planPath or args.stats or args.prometheus:
+                    raise Exception("--watch, --plan, --stats and --prometheus need a single rootPath")
+                runner = ShardRunner.forRoots(
+                    roots,
+                    {**expirationOptions, **expireOptions},
+                    workers=args.shardWorkers,
+                    deviceWorkers=args.deviceWorkers,
+                    withDelete=args.force,
+                    debug=args.debug,
+                )
+                return runner.run()
+            expiration = Expiration(debug=args.debug, **expirationOptions)
             eb = ExpireBackups(
-                rootPath=args.rootPath,
-                baseName=args.baseName,
-                ext=args.ext,
-                expiration=expiration,
-                dryRun=dryRun,
-                debug=args.debug,
+                rootPath=roots[0], expiration=expiration, dryRun=dryRun, debug=args.debug, **expireOptions
             )
-            eb.doexpire(args.force)
+            if args.watch:
+                from expirebackups.watch import BackupWatcher
+
+                if not eb.storage.local:
+                    raise Exception("--watch needs backups in the local filesystem")
+
+                BackupWatcher(eb, withDelete=args.force, settle=args.settle).run()
+                return 0
+            if args.planPath:
+                eb.savePlan(args.planPath)
+                print(f"saved plan of {eb.summary.count} files {eb.summary.count - eb.summary.kept} to expire")
+            else:
+                eb.doexpire(args.force)
+            if args.stats:
+                print(eb.metrics, file=sys.stderr)
+            if args.prometheus:
+                eb.metrics.writePrometheus(args.prometheus, labels={"root": roots[0]})
+            if eb.deleteResult is not None and eb.deleteResult.failures:
+                return 1
 
     except KeyboardInterrupt:
         ### handle keyboard interrupt ###
@@ -0,0 +1,344 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from expirebackups.expire import BackupFile, BackupFileTable, ExpirationRule
+
+
+class RulePlan:
+    """
+    the retention plan of the previous run of an Expiration
+
+    for each rule the plan records the anchor the rule was reset with (the previously kept file),
+    the files the rule kept and the range of the time of day offsets of the files from the anchor up to
+    the end of the rule chain. A rule that starts at the same anchor again keeps the same files as long
+    as the ages of all these files shift by the same number of days, so a new run only evaluates the
+    rules up to the first such rule. The set hashes of the kept and of the expired files tell whether the
+    files changed unexpectedly - only new files and the deletion of the expired files are expected
+    """
+
+    planName = ".expireBackups.plan"
+
+    def __init__(self, key: str, now: float, newest: float, tiers: List[Dict], keptHash: int, expiredHash: int):
+        """
+        constructor
+
+        Args:
+            key(str): the key of the rules and file filter the plan was made with
+            now(float): the timestamp the ages were computed for
+            newest(float): the modification timestamp of the youngest file
+            tiers(list): per rule a dict with "started", "anchor", "kept", "minPhase" and "maxPhase"
+            keptHash(int): the set hash of the kept files
+            expiredHash(int): the set hash of the expired files
+        """
+        self.key = key
+        self.now = now
+        self.newest = newest
+        self.tiers = tiers
+        self.keptHash = keptHash
+        self.expiredHash = expiredHash
+        # the number of files whose decisions were taken over when this plan was made
+        self.reused = 0
+
+    @classmethod
+    def getKey(cls, expiration, filterKey: str = "") -> str:
+        """
+        get the key for the rules of the given expiration and the given file filter
+
+        Args:
+            expiration(Expiration): the expiration
+            filterKey(str): a key for the file filter
+
+        Returns:
+            str: the key - a plan is only reused for the same key
+        """
+        rules = ",".join(f"{name}:{rule.freq}:{rule.minAmount}" for name, rule in expiration.rules.items())
+        key = f"{rules}|minFileSize={expiration.minFileSize}|{filterKey}"
+        return key
+
+    @classmethod
+    def getSetHash(cls, filePaths: List[str], mtimes, sizes, rows) -> int:
+        """
+        get an order independent hash of the given files that can be updated file by file
+
+        Args:
+            filePaths(list): the paths
+            mtimes(array): the modification timestamps
+            sizes(array): the sizes - None if the rules do not look at them
+            rows(Iterable): the indices of the files to hash
+
+        Returns:
+            int: the xor of the 64 bit digests of the files
+        """
+        setHash = 0
+        for row in rows:
+            size = sizes[row] if sizes is not None else 0
+            text = f"{filePaths[row]}\0{mtimes[row]!r}\0{size}"
+            digest = hashlib.blake2b(text.encode(errors="surrogateescape"), digest_size=8).digest()
+            setHash ^= int.from_bytes(digest, "big")
+        return setHash
+
+    @classmethod
+    def getColumns(cls, backupFiles, withSizes: bool) -> tuple:
+        """
+        get the paths, modification timestamps and sizes of the given backup files
+
+        Args:
+            backupFiles(list|BackupFileTable): the backup files
+            withSizes(bool): if False the sizes are not looked up
+
+        Returns:
+            tuple: the filePaths, mtimes and sizes (None if not withSizes)
+        """
+        if isinstance(backupFiles, BackupFileTable):
+            return backupFiles.filePaths, backupFiles.mtimes, backupFiles.sizes if withSizes else None
+        filePaths = [backupFile.filePath for backupFile in backupFiles]
+        mtimes = [backupFile.mtime for backupFile in backupFiles]
+        sizes = [backupFile.size for backupFile in backupFiles] if withSizes else None
+        return filePaths, mtimes, sizes
+
+    @classmethod
+    def fromFiles(cls, expiration, key: str, filesByAge, now: float, totalHash: int = None) -> "RulePlan":
+        """
+        create a plan from the given marked files
+
+        Args:
+            expiration(Expiration): the expiration that marked the files
+            key(str): the key of the plan
+            filesByAge(list|BackupFileTable): the marked files youngest first
+            now(float): the timestamp the ages were computed for
+            totalHash(int): the set hash of all files if it is known already
+
+        Returns:
+            RulePlan: the plan
+        """
+        filePaths, mtimes, sizes = RulePlan.getColumns(filesByAge, expiration.minFileSize > 0)
+        if isinstance(filesByAge, BackupFileTable):
+            keptBy = filesByAge.keptBy
+        else:
+            keptBy = [backupFile.keptBy for backupFile in filesByAge]
+        tierIndex = {ruleName: tier for tier, ruleName in enumerate(expiration.rules)}
+        tiers = [{"started": tier == 0, "anchor": None, "kept": []} for tier in range(len(tierIndex))]
+        startsAt = {0: [0]}
+        chainEnd = len(filePaths) - 1
+        keptRows = []
+        for row, ruleName in enumerate(keptBy):
+            if ruleName is None:
+                continue
+            keptRows.append(row)
+            tier = tierIndex[ruleName]
+            tiers[tier]["kept"].append(filePaths[row])
+            if len(tiers[tier]["kept"]) == expiration.rules[ruleName].minAmount:
+                if tier + 1 < len(tiers):
+                    tiers[tier + 1].update(started=True, anchor=filePaths[row])
+                    startsAt.setdefault(row, []).append(tier + 1)
+                else:
+                    chainEnd = row
+        # the range of the time of day offsets from the anchor of each rule up to the end of the chain
+        minPhase, maxPhase = float("inf"), float("-inf")
+        for row in range(chainEnd, -1, -1):
+            phase = (now - mtimes[row]) % BackupFile.daySeconds
+            minPhase, maxPhase = min(minPhase, phase), max(maxPhase, phase)
+            for tier in startsAt.get(row, []):
+                tiers[tier].update(minPhase=minPhase, maxPhase=maxPhase)
+        for tierPlan in tiers:
+            tierPlan.setdefault("minPhase", minPhase)
+            tierPlan.setdefault("maxPhase", maxPhase)
+        keptHash = RulePlan.getSetHash(filePaths, mtimes, sizes, keptRows)
+        if totalHash is None:
+            totalHash = RulePlan.getSetHash(filePaths, mtimes, sizes, range(len(filePaths)))
+        newest = max(mtimes, default=float("-inf"))
+        return cls(key, now, newest, tiers, keptHash, totalHash ^ keptHash)
+
+    @classmethod
+    def load(cls, planPath: str) -> Optional["RulePlan"]:
+        """
+        load a plan
+
+        Args:
+            planPath(str): the path of the plan file
+
+        Returns:
+            RulePlan: the plan or None if there is no usable plan
+        """
+        try:
+            with open(planPath) as planFile:
+                record = json.load(planFile)
+            plan = cls(
+                record["key"],
+                record["now"],
+                record["newest"],
+                record["tiers"],
+                int(record["keptHash"], 16),
+                int(record["expiredHash"], 16),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return plan
+
+    def save(self, planPath: str):
+        """
+        save me atomically
+
+        Args:
+            planPath(str): the path of the plan file
+        """
+        record = {
+            "key": self.key,
+            "now": self.now,
+            "newest": self.newest,
+            "keptHash": f"{self.keptHash:016x}",
+            "expiredHash": f"{self.expiredHash:016x}",
+            "tiers": self.tiers,
+        }
+        tmpPath = f"{planPath}.tmp"
+        with open(tmpPath, "w") as planFile:
+            json.dump(record, planFile)
+        os.replace(tmpPath, planPath)
+
+    @classmethod
+    def sortByMtime(cls, backupFiles):
+        """
+        sort the given backup files youngest first - files of the same age in days
+        are then in a reproducible order that does not depend on the order of the scan
+
+        Args:
+            backupFiles(list|BackupFileTable): the backup files
+
+        Returns:
+            list|BackupFileTable: the sorted files - a table is sorted in place
+        """
+        if isinstance(backupFiles, BackupFileTable):
+            backupFiles.reorder(sorted(range(len(backupFiles)), key=backupFiles.mtimes.__getitem__, reverse=True))
+            return backupFiles
+        return sorted(backupFiles, key=lambda backupFile: backupFile.mtime, reverse=True)
+
+    def isStable(self, tier: int, anchor: Optional[str], shift: float) -> bool:
+        """
+        check whether the given rule keeps the files it kept in my run when it starts at the given anchor
+
+        Args:
+            tier(int): the index of the rule
+            anchor(str): the path of the previously kept file or None
+            shift(float): the time passed since my run modulo a day
+
+        Returns:
+            bool: True if the rule started at the same anchor in my run and the ages of the files
+            from the anchor up to the end of the rule chain all shift by the same number of days
+        """
+        tierPlan = self.tiers[tier]
+        if not tierPlan["started"] or tierPlan["anchor"] != anchor:
+            return False
+        # all time of day offsets have to stay on the same side of the day boundary
+        bound = BackupFile.daySeconds - shift
+        return tierPlan["maxPhase"] < bound or tierPlan["minPhase"] >= bound
+
+    def reapply(self, expiration, key: str, backupFiles, now: float, verbose: bool = False, stream=None):
+        """
+        apply the rules of the given expiration to the given files reusing my decisions
+
+        the rules are evaluated from the youngest file on until a rule starts at its anchor of my run
+        with stable ages - the files kept by this and the following rules are taken from my plan
+
+        Args:
+            expiration(Expiration): the expiration to apply
+            key(str): the key of the rules and file filter
+            backupFiles(list|BackupFileTable): the backup files
+            now(float): the timestamp to compute the ages for
+            verbose(bool): if True show how much of the plan was reused
+            stream(TextIO): the stream to show it on (default: sys.stdout)
+
+        Returns:
+            tuple: the sorted and marked files and the new plan - None if the files changed unexpectedly
+        """
+        rules = list(expiration.rules.items())
+        # a rule keeping no files ends on an expired file which might have been deleted since
+        if key != self.key or len(rules) != len(self.tiers) or any(rule.minAmount == 0 for _name, rule in rules):
+            return None
+        filesByAge = RulePlan.sortByMtime(backupFiles)
+        minFileSize = expiration.minFileSize
+        filePaths, mtimes, sizes = RulePlan.getColumns(filesByAge, minFileSize > 0)
+        count = len(filePaths)
+        newCount = 0
+        while newCount < count and mtimes[newCount] > self.newest:
+            newCount += 1
+        # either all files of my run are still there or only the expired ones were deleted
+        oldHash = RulePlan.getSetHash(filePaths, mtimes, sizes, range(newCount, count))
+        if oldHash not in (self.keptHash, self.keptHash ^ self.expiredHash):
+            return None
+        shift = (now - self.now) % BackupFile.daySeconds
+        expires = bytearray(b"\x01") * count
+        keptBy = [None] * count
+        tier, kept, anchor, prevAge = 0, 0, None, None
+        tierStart = True
+        evaluated = count
+        for row in range(count):
+            if tier >= len(rules):
+                break
+            if tierStart:
+                tierStart = False
+                if row >= newCount and self.isStable(tier, anchor, shift):
+                    reusedKeptBy = {
+                        filePath: rules[keptTier][0]
+                        for keptTier in range(tier, len(rules))
+                        for filePath in self.tiers[keptTier]["kept"]
+                    }
+                    for keptRow in range(row, count):
+                        ruleName = reusedKeptBy.get(filePaths[keptRow])
+                        if ruleName is not None:
+                            expires[keptRow] = 0
+                            keptBy[keptRow] = ruleName
+                    evaluated = row
+                    break
+            if sizes is not None and sizes[row] < minFileSize:
+                continue
+            ruleName, rule = rules[tier]
+            age = BackupFile.getAge(mtimes[row], now)
+            if prevAge is None or age - prevAge >= rule.freq - ExpirationRule.tolerance:
+                kept += 1
+                expires[row] = 0
+                keptBy[row] = ruleName
+                anchor = filePaths[row]
+                prevAge = age
+            if kept >= rule.minAmount:
+                tier += 1
+                kept = 0
+                tierStart = True
+        if verbose:
+            print(f"reusing the plan of the previous run for {count - evaluated} of {count} files", file=stream)
+        filesByAge = self.mark(filesByAge, expires, keptBy, now)
+        totalHash = oldHash ^ RulePlan.getSetHash(filePaths, mtimes, sizes, range(newCount))
+        plan = RulePlan.fromFiles(expiration, key, filesByAge, now, totalHash=totalHash)
+        plan.reused = count - evaluated
+        return filesByAge, plan
+
+    def mark(self, filesByAge, expires: bytearray, keptBy: List[str], now: float):
+        """
+        mark the given sorted backup files
+
+        Args:
+            filesByAge(list|BackupFileTable): the backup files in the order of the new plan
+            expires(bytearray): 1 for each file to expire
+            keptBy(list): the name of the rule that keeps each file
+            now(float): the timestamp to compute the ages for
+
+        Returns:
+            list|BackupFileTable: the marked files
+        """
+        if isinstance(filesByAge, BackupFileTable):
+            filesByAge.setAges(now)
+            filesByAge.expires = bytearray(expires)
+            filesByAge.keptBy = list(keptBy)
+            return filesByAge
+        for backupFile, expire, ruleName in zip(filesByAge, expires, keptBy):
+            backupFile.ageInDays = BackupFile.getAge(backupFile.mtime, now)
+            backupFile.expire = bool(expire)
+            backupFile.keptBy = ruleName
+        return filesByAge
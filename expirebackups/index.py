@@ -0,0 +1,192 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+# the tables of the index - directories are stored with their mtime in nanoseconds
+indexSchema = """
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs(dir TEXT PRIMARY KEY, mtime INTEGER, subdirs TEXT);
+CREATE TABLE IF NOT EXISTS files(dir TEXT, name TEXT, size INTEGER, mtime REAL, PRIMARY KEY(dir, name));
+"""
+
+
+class IndexedStats:
+    """
+    the subset of os.stat_result fields kept in the scan index
+    """
+
+    __slots__ = ("st_size", "st_mtime")
+
+    def __init__(self, st_size: int, st_mtime: float):
+        """
+        constructor
+
+        Args:
+            st_size(int): the size in bytes
+            st_mtime(float): the modification time as a timestamp
+        """
+        self.st_size = st_size
+        self.st_mtime = st_mtime
+
+
+class ScanIndex:
+    """
+    persistent SQLite index of a backup tree
+
+    for each directory the mtime and the matching files with their size and mtime
+    are recorded so that later scans only need to list directories whose mtime changed
+    """
+
+    indexName = ".expireBackups.sqlite"
+    # directories or files modified within this many nanoseconds before the scan started
+    # might still change within the same mtime tick and are not trusted on the next run
+    racyNs = 2 * 10**9
+
+    def __init__(self, rootPath: str, filterKey: str, indexPath: str = None, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            rootPath(str): the root path of the backup tree
+            filterKey(str): a key for the file filter in use - the index is rebuilt if it changes
+            indexPath(str): the path of the index file (default: a dot file in the rootPath)
+            debug(bool): if True show debug information
+        """
+        self.rootPath = rootPath
+        self.filterKey = filterKey
+        if indexPath is None:
+            indexPath = os.path.join(rootPath, ScanIndex.indexName)
+        self.indexPath = indexPath
+        self.debug = debug
+        self.db = None
+        self.hits = 0
+        self.misses = 0
+
+    def open(self, reindex: bool = False) -> bool:
+        """
+        open my index database
+
+        Args:
+            reindex(bool): if True drop all recorded content
+
+        Returns:
+            bool: True if the index could be opened
+        """
+        try:
+            self.db = self.connect()
+        except sqlite3.DatabaseError as ex:
+            if self.debug:
+                print(f"index {self.indexPath} unusable ({ex}) - recreating")
+            try:
+                os.remove(self.indexPath)
+                self.db = self.connect()
+            except (OSError, sqlite3.DatabaseError):
+                self.db = None
+                return False
+        row = self.db.execute("SELECT value FROM meta WHERE key='filter'").fetchone()
+        if reindex or row is None or row[0] != self.filterKey:
+            self.clear()
+        self.scanStartNs = time.time_ns()
+        self.visited = set()
+        return True
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        connect to my index file and make sure the schema exists
+
+        Returns:
+            sqlite3.Connection: the connection
+        """
+        db = sqlite3.connect(self.indexPath)
+        # the index is a cache - keep the journal in memory so that
+        # the backup directory is not touched by journal files on each run
+        db.execute("PRAGMA journal_mode=MEMORY")
+        db.execute("PRAGMA synchronous=OFF")
+        db.executescript(indexSchema)
+        return db
+
+    def clear(self):
+        """
+        drop all recorded directories and files
+        """
+        with self.db:
+            self.db.execute("DELETE FROM dirs")
+            self.db.execute("DELETE FROM files")
+            self.db.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('filter', ?)", (self.filterKey,))
+
+    def getDir(self, relDir: str, mtimeNs: int) -> Optional[Tuple[List[Tuple[str, IndexedStats]], List[str]]]:
+        """
+        get the recorded content of the given directory if it is still valid
+
+        Args:
+            relDir(str): the directory path relative to the root
+            mtimeNs(int): the current mtime of the directory in nanoseconds
+
+        Returns:
+            tuple(list,list): the (name,stats) tuples of the files and the sub directory names or None if
+            the directory needs to be listed
+        """
+        self.visited.add(relDir)
+        row = self.db.execute("SELECT mtime, subdirs FROM dirs WHERE dir=?", (relDir,)).fetchone()
+        if row is None or row[0] != mtimeNs:
+            self.misses += 1
+            return None
+        self.hits += 1
+        files = [
+            (name, IndexedStats(size, mtime))
+            for name, size, mtime in self.db.execute("SELECT name, size, mtime FROM files WHERE dir=?", (relDir,))
+        ]
+        subDirs = row[1].split("\0") if row[1] else []
+        return files, subDirs
+
+    def putDir(self, relDir: str, mtimeNs: int, files: list, subDirs: list):
+        """
+        record the content of the given directory
+
+        Args:
+            relDir(str): the directory path relative to the root
+            mtimeNs(int): the mtime of the directory in nanoseconds
+            files(list): the (name,stats) tuples of the matching files
+            subDirs(list): the names of the sub directories
+        """
+        racyLimitNs = self.scanStartNs - ScanIndex.racyNs
+        if mtimeNs >= racyLimitNs or any(stats.st_mtime * 10**9 >= racyLimitNs for _name, stats in files):
+            # do not trust a directory that might change again within the same mtime tick
+            # or that has a file which might still be written to like git's racy index entries
+            mtimeNs = -1
+        self.db.execute("DELETE FROM files WHERE dir=?", (relDir,))
+        self.db.execute(
+            "INSERT OR REPLACE INTO dirs(dir, mtime, subdirs) VALUES(?,?,?)", (relDir, mtimeNs, "\0".join(subDirs))
+        )
+        self.db.executemany(
+            "INSERT INTO files(dir, name, size, mtime) VALUES(?,?,?,?)",
+            [(relDir, name, stats.st_size, stats.st_mtime) for name, stats in files],
+        )
+
+    def close(self, complete: bool = True):
+        """
+        commit and close my index
+
+        Args:
+            complete(bool): if True the scan visited the whole tree and directories
+            that have not been visited are removed from the index
+        """
+        if self.db is None:
+            return
+        if complete:
+            stale = [row[0] for row in self.db.execute("SELECT dir FROM dirs") if row[0] not in self.visited]
+            for relDir in stale:
+                self.db.execute("DELETE FROM dirs WHERE dir=?", (relDir,))
+                self.db.execute("DELETE FROM files WHERE dir=?", (relDir,))
+        self.db.commit()
+        self.db.close()
+        self.db = None
+        if self.debug:
+            print(f"index {self.indexPath}: {self.hits} directories reused {self.misses} listed")
@@ -0,0 +1,423 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import inspect
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from expirebackups.expire import BackupFile, BackupFileTable, Expiration, ExpireBackups
+from expirebackups.scan import BackupScanner
+
+
+class ListingScanner(BackupScanner):
+    """
+    scanner for a directory listing shared by the jobs of a root - accepts the files of any of the jobs
+    """
+
+    def __init__(self, rootPath: str, scanners: List[BackupScanner], **kwargs):
+        """
+        constructor
+
+        Args:
+            rootPath(str): the path to start scanning at
+            scanners(list): the scanners of the jobs sharing the listing
+            kwargs: the further options of the BackupScanner
+        """
+        super().__init__(rootPath, **kwargs)
+        self.scanners = scanners
+
+    def accept(self, name: str) -> bool:
+        return any(scanner.accept(name) for scanner in self.scanners)
+
+
+class JobResult:
+    """
+    the result of running a backup job
+    """
+
+    def __init__(self, name: str, rootPath: str):
+        """
+        constructor
+
+        Args:
+            name(str): the name of the job
+            rootPath(str): the root path of the job
+        """
+        self.name = name
+        self.rootPath = rootPath
+        self.count = 0
+        self.kept = 0
+        self.expiredTotal = 0
+        self.deleted = 0
+        self.freed = 0
+        self.failures = 0
+        self.error = None
+        self.output = ""
+
+    @property
+    def exitCode(self) -> int:
+        """
+        the exit code of the job like the one of a single run: 2 on error, 1 on delete failures
+        """
+        if self.error is not None:
+            return 2
+        return 1 if self.failures else 0
+
+    def __str__(self):
+        """
+        return a summary line of me
+        """
+        if self.error is not None:
+            status = f"error: {self.error}"
+        elif self.failures:
+            status = f"{self.failures} delete failures"
+        else:
+            status = "ok"
+        expired = BackupFile.getSizeString(self.expiredTotal)
+        return (
+            f"{self.name:16} {self.count:8} files {self.kept:6} kept {self.count - self.kept:6} expired "
+            f"({expired}) {self.deleted:6} deleted - {status}"
+        )
+
+
+class BackupJob:
+    """
+    a named expiration job of a job file
+
+    the options are the parameters of ExpireBackups and Expiration e.g. rootPath, ext, days or series
+    """
+
+    expirationKeys = ["days", "weeks", "months", "years", "minFileSize", "engine", "hours", "tiers"]
+    # the parameters that are given by the runner
+    runnerKeys = ["expiration", "dryRun", "debug"]
+
+    def __init__(self, name: str, options: Dict, dryRun: bool = True, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            name(str): the name of the job
+            options(dict): the parameters of the job
+            dryRun(bool): if True do not delete any files
+            debug(bool): if True show debug information
+        """
+        validKeys = BackupJob.getValidKeys()
+        for key in options:
+            if key not in validKeys:
+                raise Exception(f"invalid key {key} in job {name} - must be one of {','.join(validKeys)}")
+        if "rootPath" not in options:
+            raise Exception(f"job {name} has no rootPath")
+        self.name = name
+        self.options = options
+        expirationOptions = {key: value for key, value in options.items() if key in BackupJob.expirationKeys}
+        expireOptions = {key: value for key, value in options.items() if key not in BackupJob.expirationKeys}
+        for key in ["includes", "excludes", "series", "targetOrder"]:
+            if isinstance(expireOptions.get(key), str):
+                expireOptions[key] = expireOptions[key].split(",")
+        expiration = Expiration(debug=debug, **expirationOptions)
+        self.expireBackups = ExpireBackups(expiration=expiration, dryRun=dryRun, debug=debug, **expireOptions)
+
+    @classmethod
+    def getValidKeys(cls) -> List[str]:
+        """
+        get the keys that are valid in the options of a job
+
+        Returns:
+            list: the parameter names of ExpireBackups and Expiration that are not given by the runner
+        """
+        parameters = inspect.signature(ExpireBackups.__init__).parameters
+        keys = [key for key in parameters if key != "self" and key not in BackupJob.runnerKeys]
+        return keys + BackupJob.expirationKeys
+
+    def getShareKey(self) -> Optional[Tuple]:
+        """
+        get the key of the directory listing this job can share with other jobs
+
+        Returns:
+            tuple: the key or None if the job needs its own scan e.g. since it keeps a scan index
+            or its matching directories are backups or its backups are in an object store
+        """
+        eb = self.expireBackups
+        if eb.useIndex or eb.directories or not eb.storage.local:
+            return None
+        pathFilterKey = eb.pathFilter.getKey() if eb.pathFilter is not None else None
+        nameParserKey = eb.nameParser.getKey() if eb.nameParser is not None else None
+        return (os.path.realpath(eb.rootPath), pathFilterKey, nameParserKey)
+
+
+class JobRunner:
+    """
+    run the jobs of a job file in a single process
+
+    jobs of the same root share a single directory listing and run one after the other,
+    jobs of different roots run concurrently on a bounded thread pool.
+    The plans are shown per job followed by a consolidated summary
+    """
+
+    configKeys = ["workers", "defaults", "jobs"]
+
+    def __init__(self, jobs: List[BackupJob], workers: int = 1, withDelete: bool = False):
+        """
+        constructor
+
+        Args:
+            jobs(list): the jobs to run
+            workers(int): the maximum number of roots to process concurrently
+            withDelete(bool): if True really delete the files
+        """
+        if workers < 1:
+            raise Exception(f"{workers} jobWorkers is invalid - jobWorkers must be >=1")
+        self.jobs = jobs
+        self.workers = workers
+        self.withDelete = withDelete
+        self.listings = 0
+        self.results = []
+
+    @classmethod
+    def readConfig(cls, configPath: str) -> Dict:
+        """
+        read the given TOML or YAML job file
+
+        Args:
+            configPath(str): the path of the job file
+
+        Returns:
+            dict: the content of the job file
+        """
+        if configPath.endswith(".toml"):
+            try:
+                import tomllib
+            except ImportError:  # pragma: no cover - python < 3.11
+                try:
+                    import tomli as tomllib
+                except ImportError:
+                    raise Exception("reading a TOML job file needs python>=3.11 or tomli - pip install tomli")
+            with open(configPath, "rb") as configFile:
+                return tomllib.load(configFile)
+        if configPath.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise Exception("reading a YAML job file needs PyYAML - pip install pyyaml")
+            with open(configPath) as configFile:
+                return yaml.safe_load(configFile) or {}
+        raise Exception(f"invalid job file {configPath} - must be a .toml, .yaml or .yml file")
+
+    @classmethod
+    def load(cls, configPath: str, withDelete: bool = False, debug: bool = False, workers: int = None) -> "JobRunner":
+        """
+        load the jobs of the given job file
+
+        the job file has the optional keys "workers" and "defaults" with the options all jobs share
+        and the "jobs" either as a list with a "name" per job or as a table of the options by job name
+
+        Args:
+            configPath(str): the path of the job file
+            withDelete(bool): if True really delete the files
+            debug(bool): if True show debug information
+            workers(int): the maximum number of roots to process concurrently (default: the workers of the job file)
+
+        Returns:
+            JobRunner: the runner for the jobs
+        """
+        config = cls.readConfig(configPath)
+        for key in config:
+            if key not in JobRunner.configKeys:
+                raise Exception(f"invalid key {key} in {configPath} - must be one of {','.join(JobRunner.configKeys)}")
+        defaults = config.get("defaults", {})
+        jobConfigs = config.get("jobs", [])
+        if isinstance(jobConfigs, dict):
+            jobConfigs = [{"name": name, **options} for name, options in jobConfigs.items()]
+        if not jobConfigs:
+            raise Exception(f"no jobs in {configPath}")
+        jobs = []
+        for i, jobConfig in enumerate(jobConfigs):
+            options = {**defaults, **jobConfig}
+            name = str(options.pop("name", f"job{i + 1}"))
+            jobs.append(BackupJob(name, options, dryRun=not withDelete, debug=debug))
+        if workers is None:
+            workers = config.get("workers", 1)
+        return cls(jobs, workers=workers, withDelete=withDelete)
+
+    def getGroups(self) -> List[List[BackupJob]]:
+        """
+        group my jobs by the directory listing they can share
+
+        Returns:
+            list: the groups of jobs in the order of their first job
+        """
+        groups = {}
+        for i, job in enumerate(self.jobs):
+            shareKey = job.getShareKey()
+            groups.setdefault(shareKey if shareKey is not None else i, []).append(job)
+        return list(groups.values())
+
+    def listFiles(self, group: List[BackupJob]) -> List[Tuple[str, str, os.stat_result]]:
+        """
+        list the files of the root of the given group of jobs that any of the jobs accepts
+
+        Args:
+            group(list): the jobs sharing the root, path filter and name parser
+
+        Returns:
+            list: (relDir,filePath,stats) tuples
+        """
+        eb = group[0].expireBackups
+        scanners = [job.expireBackups.getScanner() for job in group]
+        scanner = ListingScanner(eb.rootPath, scanners, pathFilter=eb.pathFilter, nameParser=eb.nameParser)
+        listing = []
+        for filePath, stats in scanner.walk():
+            relDir = os.path.relpath(os.path.dirname(filePath), eb.rootPath)
+            listing.append((relDir if relDir != "." else "", filePath, stats))
+        self.listings += 1
+        return listing
+
+    def selectFiles(self, job: BackupJob, listing: List[Tuple[str, str, os.stat_result]]):
+        """
+        select the backup files of the given job from a shared listing
+
+        Args:
+            job(BackupJob): the job
+            listing(list): (relDir,filePath,stats) tuples
+
+        Returns:
+            list|BackupFileTable: the backup files - as a table if the job is compact or expires series
+        """
+        eb = job.expireBackups
+        scanner = eb.getScanner()
+        eb.filterKey = scanner.getFilterKey()
+        selected = [
+            (filePath, stats)
+            for relDir, filePath, stats in listing
+            if scanner.isCandidate(os.path.basename(filePath), relDir)
+        ]
+        if eb.compact or eb.series:
+            table = BackupFileTable()
+            for filePath, stats in selected:
+                table.append(filePath, stats.st_size, stats.st_mtime)
+            return table
+        return [BackupFile(filePath, stats) for filePath, stats in selected]
+
+    def runJob(self, job: BackupJob, listing: list = None) -> JobResult:
+        """
+        run the given job
+
+        Args:
+            job(BackupJob): the job to run
+            listing(list): the shared listing of the root of the job (if any)
+
+        Returns:
+            JobResult: the result of the job with its plan as output
+        """
+        eb = job.expireBackups
+        result = JobResult(job.name, eb.rootPath)
+        # each job writes its plan to its own buffer so that concurrent jobs are not interleaved
+        buffer = io.StringIO()
+        try:
+            backupFiles = self.selectFiles(job, listing) if listing is not None else None
+            eb.doexpire(self.withDelete, stream=buffer, backupFiles=backupFiles)
+            result.count = eb.summary.count
+            result.kept = eb.summary.kept
+            result.expiredTotal = eb.summary.total - eb.summary.keptTotal
+            if eb.deleteResult is not None:
+                result.deleted = eb.deleteResult.deleted
+                result.freed = eb.deleteResult.freed
+                result.failures = len(eb.deleteResult.failures)
+        except Exception as ex:
+            result.error = str(ex)
+        result.output = buffer.getvalue()
+        return result
+
+    def runGroup(self, group: List[BackupJob]) -> List[JobResult]:
+        """
+        run the given group of jobs one after the other on a shared listing
+
+        Args:
+            group(list): the jobs of the group
+
+        Returns:
+            list: the results of the jobs
+        """
+        listing = None
+        if len(group) > 1:
+            try:
+                listing = self.listFiles(group)
+            except OSError:
+                listing = None
+        results = []
+        for job in group:
+            results.append(self.runJob(job, listing))
+            if listing is not None and self.withDelete and job.expireBackups.summary is not None:
+                # the files deleted by this job are gone for the following jobs
+                gone = {filePath for filePath, _size in job.expireBackups.summary.expired}
+                listing = [entry for entry in listing if entry[1] not in gone or os.path.lexists(entry[1])]
+        return results
+
+    def run(self, stream: TextIO = None) -> int:
+        """
+        run my jobs and show their plans and a consolidated summary
+
+        Args:
+            stream(TextIO): the stream to write to (default: sys.stdout)
+
+        Returns:
+            int: the highest exit code of the jobs
+        """
+        if stream is None:
+            stream = sys.stdout
+        groups = self.getGroups()
+        if self.workers > 1 and len(groups) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                groupResults = list(executor.map(self.runGroup, groups))
+        else:
+            groupResults = [self.runGroup(group) for group in groups]
+        resultsByJob = {}
+        for group, results in zip(groups, groupResults):
+            for job, result in zip(group, results):
+                resultsByJob[id(job)] = result
+        self.results = [resultsByJob[id(job)] for job in self.jobs]
+        return self.report(stream)
+
+    def report(self, stream: TextIO) -> int:
+        """
+        show the plans of my results in the order of my jobs followed by the consolidated summary
+
+        Args:
+            stream(TextIO): the stream to write to
+
+        Returns:
+            int: the highest exit code of the jobs
+        """
+        allText = all(job.expireBackups.outputFormat == "text" for job in self.jobs)
+        for job, result in zip(self.jobs, self.results):
+            # machine readable plans are concatenated - their records carry the paths
+            if job.expireBackups.outputFormat == "text":
+                print(f"job {result.name} in {result.rootPath}:", file=stream)
+            stream.write(result.output)
+        print(self.getSummary(), file=stream if allText else sys.stderr)
+        return max(result.exitCode for result in self.results)
+
+    def getSummary(self) -> str:
+        """
+        get the consolidated summary of my results
+
+        Returns:
+            str: one line per job and a total line
+        """
+        lines = [str(result) for result in self.results]
+        count = sum(result.count for result in self.results)
+        kept = sum(result.kept for result in self.results)
+        deleted = sum(result.deleted for result in self.results)
+        freed = BackupFile.getSizeString(sum(result.freed for result in self.results))
+        failed = sum(1 for result in self.results if result.exitCode)
+        lines.append(
+            f"{len(self.results)} jobs {failed} failed: {count} files {kept} kept {count - kept} expired "
+            f"{deleted} deleted freeing {freed}"
+        )
+        return "\n".join(lines)
@@ -0,0 +1,142 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+class RunMetrics:
+    """
+    timers and counters for the phases of an expiration run
+    """
+
+    phases = ["scan", "dedup", "rules", "report", "delete"]
+    counterNames = [
+        "dirsVisited",
+        "filesScanned",
+        "statCalls",
+        "dirsSized",
+        "filesHashed",
+        "duplicates",
+        "filesMarked",
+        "bytesMarked",
+        "bytesReclaimable",
+        "filesDeleted",
+        "bytesFreed",
+        "deleteFailures",
+    ]
+    prefix = "expirebackups"
+
+    def __init__(self):
+        """
+        constructor
+        """
+        self.startTime = time.time()
+        self.seconds = {}
+        self.counters = {name: 0 for name in RunMetrics.counterNames}
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        time the given phase
+
+        Args:
+            name(str): the name of the phase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1):
+        """
+        add the given value to the counter with the given name
+
+        Args:
+            name(str): the name of the counter
+            value(int): the value to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def __str__(self):
+        """
+        return a human readable representation of me
+        """
+        lines = [f"{phase:8}: {self.seconds[phase]:8.3f} s" for phase in RunMetrics.phases if phase in self.seconds]
+        lines.extend(f"{name:14}: {value}" for name, value in self.counters.items())
+        return "\n".join(lines)
+
+    @classmethod
+    def snakeCase(cls, name: str) -> str:
+        """
+        convert the given camelCase name to snake_case
+        """
+        return re.sub(r"([A-Z])", lambda match: f"_{match.group(1).lower()}", name)
+
+    @classmethod
+    def escape(cls, value) -> str:
+        """
+        escape the given label value for the Prometheus text format
+        """
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def toPrometheus(self, labels: dict = None) -> str:
+        """
+        get my metrics in the Prometheus text exposition format
+
+        Args:
+            labels(dict): labels to add to each metric e.g. the rootPath
+
+        Returns:
+            str: the metrics text
+        """
+        if labels is None:
+            labels = {}
+
+        def labelText(extra: dict = None) -> str:
+            allLabels = {**labels, **(extra or {})}
+            if not allLabels:
+                return ""
+            return "{" + ",".join(f'{key}="{RunMetrics.escape(value)}"' for key, value in allLabels.items()) + "}"
+
+        name = f"{RunMetrics.prefix}_phase_seconds"
+        lines = [f"# HELP {name} seconds spent per phase of the expiration run", f"# TYPE {name} gauge"]
+        for phase, seconds in self.seconds.items():
+            lines.append(f"{name}{labelText({'phase': phase})} {seconds:.6f}")
+        for counterName, value in self.counters.items():
+            name = f"{RunMetrics.prefix}_{RunMetrics.snakeCase(counterName)}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{labelText()} {value}")
+        name = f"{RunMetrics.prefix}_last_run_timestamp_seconds"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{labelText()} {self.startTime:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def writePrometheus(self, filePath: str, labels: dict = None):
+        """
+        write my metrics for the node exporter textfile collector
+
+        the file is written to a temporary file in the same directory and renamed
+        so that the collector never sees a partial file
+
+        Args:
+            filePath(str): the path of the .prom file
+            labels(dict): labels to add to each metric
+        """
+        dirPath = os.path.dirname(os.path.abspath(filePath))
+        fd, tmpPath = tempfile.mkstemp(dir=dirPath, prefix=".expirebackups-", suffix=".prom.tmp")
+        try:
+            with os.fdopen(fd, "w") as promFile:
+                promFile.write(self.toPrometheus(labels))
+            os.chmod(tmpPath, 0o644)
+            os.replace(tmpPath, filePath)
+        except BaseException:
+            os.unlink(tmpPath)
+            raise
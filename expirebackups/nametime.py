@@ -0,0 +1,125 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import re
+from typing import Optional
+
+
+class NameTimeParser:
+    """
+    parser for the backup time embedded in a file name e.g. db-2026-10-17_0300.tgz
+
+    the pattern is either strptime-like e.g. "%Y-%m-%d_%H%M" or a regular expression prefixed with "re:"
+    that has the named groups year, month, day and optionally hour, minute and second.
+    The pattern is searched in the name and the time is taken as local time
+    """
+
+    regexPrefix = "re:"
+    # the supported strptime directives and their named groups
+    directives = {
+        "Y": r"(?P<year>\d{4})",
+        "y": r"(?P<year2>\d{2})",
+        "m": r"(?P<month>\d{2})",
+        "d": r"(?P<day>\d{2})",
+        "H": r"(?P<hour>\d{2})",
+        "M": r"(?P<minute>\d{2})",
+        "S": r"(?P<second>\d{2})",
+        "j": r"(?P<yday>\d{3})",
+    }
+
+    def __init__(self, pattern: str):
+        """
+        constructor
+
+        Args:
+            pattern(str): the strptime-like pattern or the "re:" prefixed regular expression
+        """
+        self.pattern = pattern
+        if pattern.startswith(NameTimeParser.regexPrefix):
+            regex = pattern[len(NameTimeParser.regexPrefix) :]
+        else:
+            regex = NameTimeParser.translate(pattern)
+        self.regex = re.compile(regex)
+        groups = set(self.regex.groupindex)
+        if not ("year" in groups or "year2" in groups):
+            raise Exception(f"invalid nameTime pattern {pattern} - the year is missing")
+
+    @classmethod
+    def translate(cls, pattern: str) -> str:
+        """
+        translate the given strptime-like pattern to a regular expression
+
+        Args:
+            pattern(str): the pattern e.g. "%Y-%m-%d_%H%M"
+
+        Returns:
+            str: the regular expression with named groups
+        """
+        parts = []
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if char == "%" and i + 1 < len(pattern):
+                directive = pattern[i + 1]
+                if directive == "%":
+                    parts.append("%")
+                elif directive in NameTimeParser.directives:
+                    parts.append(NameTimeParser.directives[directive])
+                else:
+                    raise Exception(
+                        f"invalid nameTime directive %{directive} - must be one of "
+                        f"{','.join('%' + name for name in NameTimeParser.directives)}"
+                    )
+                i += 2
+                continue
+            parts.append(re.escape(char))
+            i += 1
+        return "".join(parts)
+
+    def getKey(self) -> str:
+        """
+        get a key for my pattern
+
+        Returns:
+            str: a key that changes whenever the parsed times change
+        """
+        return f"nameTime={self.pattern}"
+
+    def parse(self, name: str) -> Optional[float]:
+        """
+        get the timestamp embedded in the given file name
+
+        Args:
+            name(str): the file name
+
+        Returns:
+            float: the timestamp or None if the name does not contain a valid time
+        """
+        match = self.regex.search(name)
+        if match is None:
+            return None
+        values = match.groupdict()
+        try:
+            if values.get("year") is not None:
+                year = int(values["year"])
+            else:
+                year = 2000 + int(values["year2"])
+            if values.get("yday") is not None:
+                date = datetime.date(year, 1, 1) + datetime.timedelta(days=int(values["yday"]) - 1)
+            else:
+                date = datetime.date(year, int(values.get("month") or 1), int(values.get("day") or 1))
+            dateTime = datetime.datetime(
+                date.year,
+                date.month,
+                date.day,
+                int(values.get("hour") or 0),
+                int(values.get("minute") or 0),
+                int(values.get("second") or 0),
+            )
+        except ValueError:
+            return None
+        return dateTime.timestamp()
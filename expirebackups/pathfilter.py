@@ -0,0 +1,163 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import re
+from typing import List
+
+
+class PathFilter:
+    """
+    include and exclude patterns for the paths relative to the rootPath compiled into a single regular expression each
+
+    a pattern is a glob or a regular expression prefixed with "re:".
+    A glob without a "/" matches the name in any directory like in .gitignore files - with a "/" it
+    matches the relative path from the rootPath on. "*" and "?" do not match "/" but "**" does.
+    A regular expression is searched in the relative path.
+    Exclude patterns prune matching directories before they are listed - a trailing "/"
+    restricts a pattern to directories. Include patterns only apply to files
+    """
+
+    regexPrefix = "re:"
+
+    def __init__(self, includes: List[str] = None, excludes: List[str] = None, maxDepth: int = None):
+        """
+        constructor
+
+        Args:
+            includes(list): the patterns of the files to include - all files if empty
+            excludes(list): the patterns of the files and directories to exclude
+            maxDepth(int): the maximum depth of the directories to descend into - 0 for the rootPath only
+        """
+        if maxDepth is not None and maxDepth < 0:
+            raise Exception(f"{maxDepth} maxDepth is invalid - maxDepth must be >=0")
+        self.includes = list(includes or [])
+        self.excludes = list(excludes or [])
+        self.maxDepth = maxDepth
+        self.includeRegex = self.compile(self.includes)
+        self.fileExcludeRegex = self.compile([pattern for pattern in self.excludes if not pattern.endswith("/")])
+        self.dirExcludeRegex = self.compile(self.excludes)
+
+    @classmethod
+    def translateGlob(cls, glob: str) -> str:
+        """
+        translate the given glob pattern to a regular expression for a relative path
+
+        Args:
+            glob(str): the glob pattern
+
+        Returns:
+            str: the regular expression
+        """
+        # like in .gitignore files a trailing "/" does not anchor the pattern
+        anchored = "/" in glob.rstrip("/")
+        glob = glob.strip("/")
+        parts = []
+        i = 0
+        while i < len(glob):
+            char = glob[i]
+            if glob.startswith("**", i):
+                parts.append(".*")
+                i += 2
+                continue
+            if char == "*":
+                parts.append("[^/]*")
+            elif char == "?":
+                parts.append("[^/]")
+            elif char == "[":
+                end = glob.find("]", i + 2)
+                if end < 0:
+                    parts.append(re.escape(char))
+                else:
+                    chars = glob[i + 1 : end].replace("\\", "\\\\")
+                    if chars.startswith("!"):
+                        chars = "^" + chars[1:]
+                    parts.append(f"[{chars}]")
+                    i = end
+            else:
+                parts.append(re.escape(char))
+            i += 1
+        regex = "".join(parts)
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        return f"{regex}\\Z"
+
+    @classmethod
+    def compile(cls, patterns: List[str]):
+        """
+        compile the given patterns into a single regular expression
+
+        Args:
+            patterns(list): the glob or "re:" patterns
+
+        Returns:
+            re.Pattern: the compiled expression to match relative paths with or None if there are no patterns
+        """
+        if not patterns:
+            return None
+        alternatives = []
+        for pattern in patterns:
+            if pattern.startswith(PathFilter.regexPrefix):
+                regex = pattern[len(PathFilter.regexPrefix) :]
+                alternatives.append(f".*?(?:{regex})")
+            else:
+                alternatives.append(PathFilter.translateGlob(pattern))
+        return re.compile("|".join(f"(?:{alternative})" for alternative in alternatives), re.DOTALL)
+
+    def getKey(self) -> str:
+        """
+        get a key for my patterns
+
+        Returns:
+            str: a key that changes whenever the set of accepted paths changes
+        """
+        key = f"includes={','.join(self.includes)}|excludes={','.join(self.excludes)}|maxDepth={self.maxDepth}"
+        return key
+
+    @classmethod
+    def normalize(cls, relPath: str) -> str:
+        """
+        normalize the separators of the given relative path to "/"
+        """
+        if os.sep != "/":
+            relPath = relPath.replace(os.sep, "/")
+        return relPath
+
+    def acceptDir(self, relDir: str) -> bool:
+        """
+        check whether the given directory is to be descended into
+
+        Args:
+            relDir(str): the path of the directory relative to the rootPath - "" for the rootPath
+
+        Returns:
+            bool: False if the directory is to be pruned
+        """
+        if not relDir:
+            return True
+        relDir = PathFilter.normalize(relDir)
+        if self.maxDepth is not None and relDir.count("/") + 1 > self.maxDepth:
+            return False
+        if self.dirExcludeRegex is not None and self.dirExcludeRegex.match(relDir):
+            return False
+        return True
+
+    def acceptFile(self, relPath: str) -> bool:
+        """
+        check whether the given file is to be included
+
+        Args:
+            relPath(str): the path of the file relative to the rootPath
+
+        Returns:
+            bool: True if the file is included and not excluded
+        """
+        relPath = PathFilter.normalize(relPath)
+        if self.includeRegex is not None and not self.includeRegex.match(relPath):
+            return False
+        if self.fileExcludeRegex is not None and self.fileExcludeRegex.match(relPath):
+            return False
+        return True
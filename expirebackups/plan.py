@@ -0,0 +1,289 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import csv
+import io
+import json
+import sys
+from itertools import islice, repeat
+from typing import Iterable, Iterator, TextIO
+
+from expirebackups.expire import BackupFile
+
+
+class PlanSummary:
+    """
+    summary of an expiration plan collected while the plan records stream by
+    """
+
+    def __init__(self, collectExpired: bool = False):
+        """
+        constructor
+
+        Args:
+            collectExpired(bool): if True collect the (path,size) tuples of the files to expire
+        """
+        self.count = 0
+        self.total = 0
+        self.kept = 0
+        self.keptTotal = 0
+        self.collectExpired = collectExpired
+        self.expired = []
+
+    def tally(self, records: Iterable[dict]) -> Iterator[dict]:
+        """
+        count the given records while passing them on
+
+        Args:
+            records(Iterable): the plan records
+
+        Yields:
+            dict: the records unchanged
+        """
+        for record in records:
+            self.count += 1
+            # a kept file whose size was not looked up does not count
+            size = max(record["size"], 0)
+            self.total += size
+            if record["action"] == "keep":
+                self.kept += 1
+                self.keptTotal += size
+            elif self.collectExpired:
+                self.expired.append((record["path"], record["size"]))
+            yield record
+
+
+class PlanWriter:
+    """
+    writer for the records of an expiration plan
+    """
+
+    formats = ["text", "jsonl", "csv"]
+    # number of records to join into a single write to the stream
+    chunkSize = 1024
+    fields = ["index", "series", "path", "ageInDays", "mtime", "size", "action", "keptBy", "total"]
+
+    def __init__(self, stream: TextIO = None):
+        """
+        constructor
+
+        Args:
+            stream(TextIO): the stream to write to (default: sys.stdout)
+        """
+        if stream is None:
+            stream = sys.stdout
+        self.stream = stream
+
+    @classmethod
+    def create(cls, outputFormat: str, stream: TextIO = None) -> "PlanWriter":
+        """
+        create a plan writer for the given format
+
+        Args:
+            outputFormat(str): one of text, jsonl or csv
+            stream(TextIO): the stream to write to (default: sys.stdout)
+
+        Returns:
+            PlanWriter: the writer
+        """
+        writerClasses = {"text": TextPlanWriter, "jsonl": JsonLinesPlanWriter, "csv": CsvPlanWriter}
+        if outputFormat not in writerClasses:
+            raise Exception(f"invalid format {outputFormat} - must be one of {','.join(cls.formats)}")
+        return writerClasses[outputFormat](stream)
+
+    @classmethod
+    def records(
+        cls, filesByAge: Iterable[BackupFile], seriesNames: Iterable[str] = None, keptSizes: bool = True
+    ) -> Iterator[dict]:
+        """
+        generate the plan records for the given marked backup files
+
+        Args:
+            filesByAge(Iterable): the sorted and marked backup files
+            seriesNames(Iterable): the name of the series of each file (if any)
+            keptSizes(bool): if False the sizes of kept files that are not known yet are not looked up
+            and their records have an unknown size
+
+        Yields:
+            dict: a record per file with a running total of the sizes
+        """
+        if seriesNames is None:
+            seriesNames = repeat(None)
+        total = 0
+        for i, (backupFile, series) in enumerate(zip(filesByAge, seriesNames)):
+            if keptSizes or backupFile.expire or backupFile.sizeKnown:
+                size = backupFile.size
+                total += size
+            else:
+                size = BackupFile.unknownSize
+            record = {
+                "index": i + 1,
+                "series": series,
+                "path": backupFile.filePath,
+                "ageInDays": backupFile.ageInDays,
+                "mtime": backupFile.mtime,
+                "size": size,
+                "action": "expire" if backupFile.expire else "keep",
+                "keptBy": backupFile.keptBy,
+                "total": total,
+            }
+            yield record
+
+    def writeHeader(self, count: int, withDelete: bool):
+        """
+        write the header of the plan
+
+        Args:
+            count(int): the number of files in the plan
+            withDelete(bool): True if the files are going to be deleted
+        """
+        pass
+
+    def writeRecords(self, records: Iterable[dict]):
+        """
+        write the given records
+
+        Args:
+            records(Iterable): the plan records
+        """
+        # write in chunks so that a line buffered terminal does not flush per record
+        lines = (self.formatRecord(record) for record in records)
+        for chunk in iter(lambda: list(islice(lines, self.chunkSize)), []):
+            self.stream.write("".join(chunk))
+
+    def writePlan(self, records: Iterable[dict], count: int, summary: PlanSummary, withDelete: bool, limit: int = None):
+        """
+        stream the given records through my summary to my stream
+
+        Args:
+            records(Iterable): the plan records
+            count(int): the number of records
+            summary(PlanSummary): the summary to collect
+            withDelete(bool): True if the files are going to be deleted
+            limit(int): if set limit the number of records to write - the summary still sees all records
+        """
+        tallied = summary.tally(records)
+        self.writeHeader(count, withDelete)
+        self.writeRecords(islice(tallied, limit))
+        for _record in tallied:
+            pass
+        self.writeFooter(summary.kept, summary.keptTotal)
+        self.stream.flush()
+
+    def formatRecord(self, record: dict) -> str:
+        """
+        format a single record
+
+        Args:
+            record(dict): the record to format
+
+        Returns:
+            str: the formatted record including the line ending
+        """
+        raise NotImplementedError()
+
+    def writeFooter(self, kept: int, keptTotal: int):
+        """
+        write the footer of the plan
+
+        Args:
+            kept(int): the number of files kept
+            keptTotal(int): the total size of the files kept
+        """
+        pass
+
+
+class TextPlanWriter(PlanWriter):
+    """
+    human readable plan
+    """
+
+    def __init__(self, stream: TextIO = None):
+        """
+        constructor
+
+        Args:
+            stream(TextIO): the stream to write to (default: sys.stdout)
+        """
+        super().__init__(stream)
+        self.series = None
+
+    def writeHeader(self, count: int, withDelete: bool):
+        """
+        write the number of files and whether they are going to be deleted
+        """
+        deletehint = "by deletion" if withDelete else "dry run"
+        self.stream.write(f"expiring {count} files {deletehint}\n")
+
+    def formatRecord(self, record: dict) -> str:
+        """
+        format the record as a line with a ✅/❌ marker
+        """
+        marker = "❌" if record["action"] == "expire" else "✅"
+        sizeString = BackupFile.getSizeString(record["size"])
+        totalString = BackupFile.getSizeString(record["total"])
+        line = f"#{record['index']:4d}{marker}:{record['ageInDays']:6.1f} days({sizeString}/{totalString})→{record['path']}\n"
+        if record["series"] != self.series:
+            self.series = record["series"]
+            line = f"series {self.series}:\n{line}"
+        return line
+
+    def writeFooter(self, kept: int, keptTotal: int):
+        """
+        write the number and size of the files kept
+        """
+        keptSizeString = BackupFile.getSizeString(keptTotal)
+        self.stream.write(f"kept {kept} files {keptSizeString}\n")
+
+
+class JsonLinesPlanWriter(PlanWriter):
+    """
+    plan as JSON Lines - one JSON object per file
+    """
+
+    def formatRecord(self, record: dict) -> str:
+        """
+        format the record as a JSON object on a single line
+        """
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class CsvPlanWriter(PlanWriter):
+    """
+    plan as comma separated values with a header line
+    """
+
+    def __init__(self, stream: TextIO = None):
+        """
+        constructor
+
+        Args:
+            stream(TextIO): the stream to write to (default: sys.stdout)
+        """
+        super().__init__(stream)
+        self.buffer = io.StringIO()
+        self.csvWriter = csv.writer(self.buffer, lineterminator="\n")
+
+    def formatRow(self, row: list) -> str:
+        """
+        format the given row as a CSV line
+        """
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.csvWriter.writerow(row)
+        return self.buffer.getvalue()
+
+    def writeHeader(self, count: int, withDelete: bool):
+        """
+        write the field names
+        """
+        self.stream.write(self.formatRow(PlanWriter.fields))
+
+    def formatRecord(self, record: dict) -> str:
+        """
+        format the record as a CSV line
+        """
+        return self.formatRow([record[field] for field in PlanWriter.fields])
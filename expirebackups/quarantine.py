@@ -0,0 +1,296 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import fcntl
+import itertools
+import os
+import stat
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+from expirebackups.delete import DeleteResult
+from expirebackups.expire import BackupFile
+from expirebackups.scan import BackupScanner
+
+
+class Quarantine:
+    """
+    expire backups by renaming them into a trash directory on the same filesystem
+
+    a rename is O(1) per file whatever the size of the file - the space is reclaimed later by a Purger.
+    The quarantined names start with the prefix of the state files so that a trash directory
+    inside the backup tree is never scanned for backups
+    """
+
+    # moving does not free any space until the quarantine is purged
+    freesSpace = False
+
+    def __init__(self, quarantinePath: str, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            quarantinePath(str): the path of the trash directory
+            debug(bool): if True show debug information
+        """
+        self.quarantinePath = quarantinePath
+        self.debug = debug
+        self.counter = itertools.count()
+        self.runId = f"{time.time_ns():x}"
+
+    def open(self, rootPath: str):
+        """
+        create my trash directory if needed and check that it is on the filesystem of the given root
+
+        Args:
+            rootPath(str): the root path of the backups to quarantine
+        """
+        Quarantine.checkRoot(self.quarantinePath, rootPath)
+        os.makedirs(self.quarantinePath, exist_ok=True)
+        if os.stat(self.quarantinePath).st_dev != os.stat(rootPath).st_dev:
+            raise Exception(f"invalid quarantine {self.quarantinePath} - must be on the same filesystem as {rootPath}")
+
+    @classmethod
+    def checkRoot(cls, quarantinePath: str, rootPath: str):
+        """
+        check that the given quarantine does not hold the backups of the given root
+        since everything quarantined is destroyed by a purge
+
+        Args:
+            quarantinePath(str): the path of the trash directory
+            rootPath(str): the root path of the backups
+
+        Raises:
+            Exception: if the quarantine is the rootPath or contains it
+        """
+        quarantineDir = os.path.realpath(quarantinePath)
+        if os.path.commonpath([quarantineDir, os.path.realpath(rootPath)]) == quarantineDir:
+            raise Exception(f"invalid quarantine {quarantinePath} - must not be or contain the rootPath {rootPath}")
+
+    def getTarget(self, filePath: str) -> str:
+        """
+        get a unique path in my trash directory for the given file
+
+        Args:
+            filePath(str): the path of the file to quarantine
+
+        Returns:
+            str: the path to rename the file to
+        """
+        name = f"{BackupScanner.statePrefix}{self.runId}-{next(self.counter)}-{os.path.basename(filePath)}"
+        return os.path.join(self.quarantinePath, name)
+
+    def delete(self, files: List[Tuple[str, int]]) -> DeleteResult:
+        """
+        move the given files or directories into my trash directory
+
+        Args:
+            files(list): (filePath,size) tuples of the backups to quarantine
+
+        Returns:
+            DeleteResult: the counts and failures - freed is the size moved to the quarantine
+        """
+        result = DeleteResult()
+        for filePath, size in files:
+            try:
+                os.rename(filePath, self.getTarget(filePath))
+                result.deleted += 1
+                result.freed += size
+            except FileNotFoundError:
+                result.missing += 1
+            except OSError as ex:
+                result.failures.append((filePath, ex))
+        for filePath, error in result.failures:
+            sys.stderr.write(f"failed to quarantine {filePath}: {error}\n")
+        return result
+
+
+class Purger:
+    """
+    throttled purge of a quarantine
+
+    huge files are truncated from the end in chunks before they are unlinked so that the filesystem frees
+    their extents step by step instead of in a single long unlink - the rate of freed bytes is limited by
+    sleeping between the chunks. Files with several hard links are only unlinked since truncating them
+    would destroy the data of the other links
+    """
+
+    lockName = f"{BackupScanner.statePrefix}purge.lock"
+    defaultChunkSize = 1024**3
+
+    def __init__(self, quarantinePath: str, rate: int = None, chunkSize: int = None, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            quarantinePath(str): the path of the trash directory
+            rate(int): the maximum number of bytes to free per second (default: unlimited)
+            chunkSize(int): the number of bytes to truncate at a time (default: 1 GB)
+            debug(bool): if True show debug information
+        """
+        if chunkSize is None:
+            chunkSize = Purger.defaultChunkSize
+        if chunkSize < 1:
+            raise Exception(f"{chunkSize} purge chunk size is invalid - must be >=1")
+        if rate is not None and rate < 1:
+            raise Exception(f"{rate} purgeRate is invalid - must be >=1 byte per second")
+        self.quarantinePath = quarantinePath
+        self.rate = rate
+        self.chunkSize = chunkSize
+        self.debug = debug
+        self.startTime = None
+        self.freed = 0
+
+    def sleep(self, seconds: float):
+        """
+        wait for the given number of seconds
+        """
+        time.sleep(seconds)
+
+    def throttle(self, size: int):
+        """
+        account for the given number of freed bytes and wait if my rate is exceeded
+
+        Args:
+            size(int): the bytes just freed
+        """
+        self.freed += size
+        if self.rate is None:
+            return
+        ahead = self.freed / self.rate - (time.monotonic() - self.startTime)
+        if ahead > 0:
+            self.sleep(ahead)
+
+    def purgeFile(self, path: str):
+        """
+        truncate the given file in chunks and unlink it
+
+        Args:
+            path(str): the path of the file
+        """
+        stats = os.lstat(path)
+        size = stats.st_size
+        if stat.S_ISREG(stats.st_mode) and stats.st_nlink == 1 and size > self.chunkSize:
+            fd = os.open(path, os.O_WRONLY | os.O_NOFOLLOW)
+            try:
+                while size > self.chunkSize:
+                    size -= self.chunkSize
+                    os.ftruncate(fd, size)
+                    self.throttle(self.chunkSize)
+            finally:
+                os.close(fd)
+        os.unlink(path)
+        self.throttle(size if stats.st_nlink == 1 else 0)
+
+    def purgeTree(self, path: str):
+        """
+        purge the given quarantined directory backup
+
+        Args:
+            path(str): the path of the directory
+        """
+        for dirPath, dirNames, fileNames in os.walk(path, topdown=False):
+            for name in fileNames:
+                self.purgeFile(os.path.join(dirPath, name))
+            for name in dirNames:
+                subPath = os.path.join(dirPath, name)
+                # symbolic links to directories are listed as directories
+                if os.path.islink(subPath):
+                    os.unlink(subPath)
+                else:
+                    os.rmdir(subPath)
+        os.rmdir(path)
+
+    def purge(self, maxSeconds: float = None) -> DeleteResult:
+        """
+        purge my quarantine - only one purge runs at a time per quarantine
+
+        Args:
+            maxSeconds(float): stop starting new backups after the given number of seconds (default: no limit)
+
+        Returns:
+            DeleteResult: the counts and failures - deleted counts the purged backups
+        """
+        result = DeleteResult()
+        self.startTime = time.monotonic()
+        self.freed = 0
+        try:
+            lockFd = os.open(os.path.join(self.quarantinePath, Purger.lockName), os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            return result
+        try:
+            try:
+                fcntl.flock(lockFd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if self.debug:
+                    print(f"{self.quarantinePath} is purged by another process")
+                return result
+            with os.scandir(self.quarantinePath) as entries:
+                # only the names given by the Quarantine - anything else in the directory is not touched
+                names = sorted(
+                    entry.name
+                    for entry in entries
+                    if entry.name.startswith(BackupScanner.statePrefix) and entry.name != Purger.lockName
+                )
+            for name in names:
+                if maxSeconds is not None and time.monotonic() - self.startTime > maxSeconds:
+                    break
+                path = os.path.join(self.quarantinePath, name)
+                freedBefore = self.freed
+                try:
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        self.purgeTree(path)
+                    else:
+                        self.purgeFile(path)
+                    result.deleted += 1
+                except FileNotFoundError:
+                    result.missing += 1
+                except OSError as ex:
+                    result.failures.append((path, ex))
+                result.freed += self.freed - freedBefore
+        finally:
+            os.close(lockFd)
+        for path, error in result.failures:
+            sys.stderr.write(f"failed to purge {path}: {error}\n")
+        return result
+
+    @classmethod
+    def spawn(cls, quarantinePath: str, rate: str = None) -> subprocess.Popen:
+        """
+        purge the given quarantine in a detached background process
+
+        Args:
+            quarantinePath(str): the path of the trash directory
+            rate(str): the maximum number of bytes to free per second e.g. "200MB" (default: unlimited)
+
+        Returns:
+            subprocess.Popen: the background process
+        """
+        command = [sys.executable, "-m", "expirebackups.expire", "--purge", "--quarantine", quarantinePath]
+        if rate is not None:
+            command.extend(["--purgeRate", rate])
+        return subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    @classmethod
+    def parseRate(cls, rate: str) -> int:
+        """
+        parse the given rate
+
+        Args:
+            rate(str): the bytes per second e.g. "200MB" - None for unlimited
+
+        Returns:
+            int: the bytes per second or None
+        """
+        return BackupFile.parseSize(rate) if rate is not None else None
@@ -0,0 +1,379 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import stat
+from typing import Optional, Tuple
+
+from expirebackups.expire import BackupFile, BackupFileTable
+from expirebackups.index import IndexedStats, ScanIndex
+from expirebackups.nametime import NameTimeParser
+from expirebackups.pathfilter import PathFilter
+
+
+class ScanStatistics:
+    """
+    counters collected while scanning a backup tree
+    """
+
+    def __init__(self):
+        """
+        constructor
+        """
+        self.dirs = 0
+        self.entries = 0
+        self.statCalls = 0
+        self.files = 0
+
+    def __str__(self):
+        """
+        return a string representation of me
+        """
+        text = f"{self.dirs} dirs {self.entries} entries {self.statCalls} stats {self.files} files"
+        return text
+
+
+class BackupScanner:
+    """
+    single pass scanner for backup files based on os.scandir
+
+    directories are walked relative to directory file descriptors
+    where the platform supports it and the stat result is taken from the DirEntry
+    so that each matching file is looked up exactly once
+    """
+
+    # the scan index and the saved rule plan are kept in the rootPath and never backup files
+    statePrefix = ".expireBackups."
+
+    def __init__(
+        self,
+        rootPath: str,
+        baseName: str = None,
+        ext: str = None,
+        index: ScanIndex = None,
+        matcher=None,
+        pathFilter: PathFilter = None,
+        nameParser: NameTimeParser = None,
+        directories: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            rootPath(str): the path to start scanning at
+            baseName(str): the basename to filter for (if any)
+            ext(str): file extensions to filter for e.g. ".tgz" (if any)
+            index(ScanIndex): an opened index to reuse the listing of unchanged directories from (if any)
+            matcher: an additional file name filter with accept(name) and getKey() methods e.g. a SeriesPartitioner
+            pathFilter(PathFilter): include and exclude patterns for the relative paths and the maximum depth (if any)
+            nameParser(NameTimeParser): a parser for the backup time in the file names - files with a time
+            in their name are not stat'ed and their size is looked up when needed (if any)
+            directories(bool): if True matching directories are backups - they are not descended into
+            and their size is left to be computed
+        """
+        self.rootPath = rootPath
+        self.baseName = baseName
+        self.ext = ext
+        self.index = index
+        self.matcher = matcher
+        self.pathFilter = pathFilter
+        self.nameParser = nameParser
+        self.directories = directories
+        self.useFd = os.scandir in os.supports_fd and os.open in os.supports_dir_fd
+        self.stats = ScanStatistics()
+        # callback for each directory path before it is listed e.g. to watch it
+        self.onDir = None
+        # callback for the path and stat result of each matching file e.g. to record its inode
+        self.onFile = None
+        # indexed files smaller than this are stat'ed again since a file rewritten in place
+        # does not change the mtime of its directory e.g. the minFileSize of the expiration
+        self.recheckSize = 0
+
+    def accept(self, name: str) -> bool:
+        """
+        check whether the given file name is to be included
+
+        Args:
+            name(str): the file name (without directory)
+
+        Returns:
+            bool: True if the file is a candidate for expiration
+        """
+        hasIncludes = self.pathFilter is not None and self.pathFilter.includes
+        if self.baseName is None and self.ext is None and self.matcher is None and not hasIncludes:
+            return False
+        include = True
+        if self.baseName is not None:
+            include = name.startswith(self.baseName)
+        if include and self.ext is not None:
+            include = name.endswith(self.ext)
+        if include and self.matcher is not None:
+            include = self.matcher.accept(name)
+        return include
+
+    def isCandidate(self, name: str, relDir: str = "") -> bool:
+        """
+        check whether the given file is accepted and not one of my state files
+
+        Args:
+            name(str): the file name (without directory)
+            relDir(str): the path of the directory of the file relative to my rootPath
+
+        Returns:
+            bool: True if the file is a candidate for expiration
+        """
+        if name.startswith(BackupScanner.statePrefix) or not self.accept(name):
+            return False
+        return self.pathFilter is None or self.pathFilter.acceptFile(os.path.join(relDir, name))
+
+    def acceptDir(self, relDir: str) -> bool:
+        """
+        check whether the given directory is to be descended into
+
+        Args:
+            relDir(str): the path of the directory relative to my rootPath
+
+        Returns:
+            bool: False if the directory is to be pruned
+        """
+        return self.pathFilter is None or self.pathFilter.acceptDir(relDir)
+
+    def getFilterKey(self) -> str:
+        """
+        get a key for my file filter
+
+        Returns:
+            str: a key that changes whenever the set of accepted file names changes
+        """
+        key = f"baseName={self.baseName}|ext={self.ext}"
+        if self.matcher is not None:
+            key += f"|{self.matcher.getKey()}"
+        if self.pathFilter is not None:
+            key += f"|{self.pathFilter.getKey()}"
+        if self.nameParser is not None:
+            key += f"|{self.nameParser.getKey()}"
+        if self.directories:
+            key += "|directories"
+        return key
+
+    def scan(self) -> list:
+        """
+        scan my rootPath
+
+        Returns:
+            list: the list of BackupFiles found
+        """
+        backupFiles = []
+        for filePath, stats in self.walk():
+            backupFiles.append(BackupFile(filePath, stats))
+        return backupFiles
+
+    def scanTable(self) -> BackupFileTable:
+        """
+        scan my rootPath without creating a BackupFile object per file
+
+        Returns:
+            BackupFileTable: the table of BackupFiles found
+        """
+        table = BackupFileTable()
+        for filePath, stats in self.walk():
+            table.append(filePath, stats.st_size, stats.st_mtime)
+        return table
+
+    def walk(self, relDir: str = ""):
+        """
+        walk my rootPath and yield the path and stat result of each matching file
+
+        Args:
+            relDir(str): the path of the directory relative to my rootPath to start at
+
+        Yields:
+            tuple(str,os.stat_result): the path and stat result of a matching file
+        """
+        path = os.path.join(self.rootPath, relDir) if relDir else self.rootPath
+        if self.useFd:
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+            except OSError:
+                return
+            yield from self.walkFd(fd, path, relDir)
+        else:
+            yield from self.walkPath(path, relDir)
+
+    def walkFd(self, fd: int, path: str, relDir: str):
+        """
+        walk the directory opened as the file descriptor fd
+
+        Args:
+            fd(int): the directory file descriptor - will be closed when done
+            path(str): the path of the directory for display and BackupFile construction
+            relDir(str): the path of the directory relative to my rootPath
+        """
+        try:
+            if self.onDir is not None:
+                self.onDir(path)
+            dirStats = os.fstat(fd) if self.index is not None else None
+            files, subDirs = self.listDir(fd, relDir, dirStats)
+            for name, stats in files:
+                self.stats.files += 1
+                filePath = os.path.join(path, name)
+                if self.onFile is not None:
+                    self.onFile(filePath, stats)
+                yield filePath, stats
+            for name in subDirs:
+                if not self.acceptDir(os.path.join(relDir, name)):
+                    continue
+                try:
+                    subFd = os.open(name, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=fd)
+                except OSError:
+                    continue
+                yield from self.walkFd(subFd, os.path.join(path, name), os.path.join(relDir, name))
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def walkPath(self, path: str, relDir: str):
+        """
+        walk the given directory path for platforms without directory file descriptor support
+
+        Args:
+            path(str): the path of the directory
+            relDir(str): the path of the directory relative to my rootPath
+        """
+        try:
+            if self.onDir is not None:
+                self.onDir(path)
+            dirStats = os.stat(path) if self.index is not None else None
+            files, subDirs = self.listDir(path, relDir, dirStats)
+        except OSError:
+            return
+        for name, stats in files:
+            self.stats.files += 1
+            filePath = os.path.join(path, name)
+            if self.onFile is not None:
+                self.onFile(filePath, stats)
+            yield filePath, stats
+        for name in subDirs:
+            if not self.acceptDir(os.path.join(relDir, name)):
+                continue
+            yield from self.walkPath(os.path.join(path, name), os.path.join(relDir, name))
+
+    def listDir(self, dirRef, relDir: str, dirStats: os.stat_result) -> Tuple[list, list]:
+        """
+        list the matching files and the sub directories of the given directory
+        using my index if the directory did not change since it was recorded
+
+        Args:
+            dirRef(int|str): the file descriptor or path of the directory to list
+            relDir(str): the path of the directory relative to my rootPath
+            dirStats(os.stat_result): the stat result of the directory - only needed if an index is used
+
+        Returns:
+            tuple(list,list): the (name,stats) tuples of the matching files and the sub directory names
+        """
+        self.stats.dirs += 1
+        if self.index is not None:
+            cached = self.index.getDir(relDir, dirStats.st_mtime_ns)
+            if cached is not None and not self.isChanged(dirRef, cached[0]):
+                return cached
+        files = []
+        subDirs = []
+        with os.scandir(dirRef) as entries:
+            for entry in entries:
+                self.stats.entries += 1
+                result = self.handleEntry(entry, subDirs, relDir)
+                if result is not None:
+                    files.append(result)
+        if self.index is not None:
+            self.index.putDir(relDir, dirStats.st_mtime_ns, files, subDirs)
+        return files, subDirs
+
+    def isChanged(self, dirRef, files: list) -> bool:
+        """
+        check whether one of the given indexed files smaller than my recheckSize changed
+
+        Args:
+            dirRef(int|str): the file descriptor or path of the directory of the files
+            files(list): the (name,stats) tuples of the files from the index
+
+        Returns:
+            bool: True if a small file changed its size or mtime or vanished and the directory needs to be listed
+        """
+        for name, stats in files:
+            if stats.st_size == BackupFile.unknownSize or stats.st_size >= self.recheckSize:
+                continue
+            try:
+                if isinstance(dirRef, int):
+                    current = os.stat(name, dir_fd=dirRef)
+                else:
+                    current = os.stat(os.path.join(dirRef, name))
+                self.stats.statCalls += 1
+            except OSError:
+                return True
+            if current.st_size != stats.st_size or current.st_mtime != stats.st_mtime:
+                return True
+        return False
+
+    def getDirectoryBackup(self, entry: os.DirEntry) -> Optional[Tuple[str, IndexedStats]]:
+        """
+        get the given matching directory as a backup
+
+        Args:
+            entry(os.DirEntry): the entry of the directory
+
+        Returns:
+            tuple(str,IndexedStats): the name and the modification time with an unknown size or None if
+            the directory vanished
+        """
+        mtime = self.nameParser.parse(entry.name) if self.nameParser is not None else None
+        if mtime is None:
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+                self.stats.statCalls += 1
+            except OSError:
+                return None
+        return entry.name, IndexedStats(BackupFile.unknownSize, mtime)
+
+    def handleEntry(self, entry: os.DirEntry, subDirs: list, relDir: str = "") -> Optional[Tuple[str, os.stat_result]]:
+        """
+        handle the given directory entry
+
+        Args:
+            entry(os.DirEntry): the entry to handle
+            subDirs(list): the list of subdirectory names to append to
+            relDir(str): the path of the directory of the entry relative to my rootPath
+
+        Returns:
+            tuple(str,os.stat_result): the name and stat result if the entry is a matching file else None
+        """
+        try:
+            # like os.walk symbolic links to directories are not followed
+            if entry.is_dir():
+                # directories of state files e.g. a quarantine are never scanned
+                if not entry.is_symlink() and not entry.name.startswith(BackupScanner.statePrefix):
+                    if self.directories and self.isCandidate(entry.name, relDir):
+                        return self.getDirectoryBackup(entry)
+                    subDirs.append(entry.name)
+                return None
+        except OSError:
+            return None
+        if not self.isCandidate(entry.name, relDir):
+            return None
+        if self.nameParser is not None:
+            nameTime = self.nameParser.parse(entry.name)
+            if nameTime is not None:
+                return entry.name, IndexedStats(BackupFile.unknownSize, nameTime)
+        try:
+            # relative to the directory file descriptor if scandir was given one
+            stats = entry.stat()
+            self.stats.statCalls += 1
+        except OSError:
+            # the file vanished while scanning
+            return None
+        if stat.S_ISDIR(stats.st_mode):
+            return None
+        return entry.name, stats
@@ -0,0 +1,172 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import fnmatch
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from expirebackups.expire import BackupFileTable, Expiration
+
+
+def applySeriesRules(expiration: Expiration, table: BackupFileTable) -> BackupFileTable:
+    """
+    apply the rules of the given expiration to the table of a single series
+    module level function so that it can be used by a process pool
+
+    Args:
+        expiration(Expiration): the expiration to apply
+        table(BackupFileTable): the backup files of the series
+
+    Returns:
+        BackupFileTable: the sorted and marked table
+    """
+    return expiration.applyRules(table, verbose=False)
+
+
+class SeriesPartitioner:
+    """
+    partition backup files into series by glob patterns
+    or by the file name stem in front of an embedded timestamp
+    """
+
+    auto = "auto"
+    # a run of at least 4 digits e.g. a year or a compact timestamp
+    timestampRegex = re.compile(r"\d{4,}")
+    digitsRegex = re.compile(r"\d+")
+    extRegex = re.compile(r"(\.[A-Za-z][A-Za-z0-9]{0,5})+$")
+
+    def __init__(self, patterns: List[str]):
+        """
+        constructor
+
+        Args:
+            patterns(list): glob patterns like "db1-*.tgz" - the first matching pattern wins,
+            "auto" derives the series of files not matching any other pattern from the timestamp or
+            number in their name
+        """
+        self.patterns = [pattern for pattern in patterns if pattern != SeriesPartitioner.auto]
+        self.autoDetect = SeriesPartitioner.auto in patterns
+        regex = "|".join(f"(?P<s{i}>{fnmatch.translate(pattern)})" for i, pattern in enumerate(self.patterns))
+        self.regex = re.compile(regex) if regex else None
+
+    def getKey(self) -> str:
+        """
+        get a key for my patterns
+
+        Returns:
+            str: a key that changes whenever the set of accepted file names changes
+        """
+        key = f"series={','.join(self.patterns)}|auto={self.autoDetect}"
+        return key
+
+    def detectSeries(self, name: str) -> Optional[str]:
+        """
+        derive the series of the given file name from the stem in front of the embedded timestamp
+
+        Args:
+            name(str): the file name e.g. db1-2026-10-17_0300.tgz
+
+        Returns:
+            str: the series as a glob pattern e.g. db1-*.tgz or None if the name has no timestamp or number
+        """
+        match = SeriesPartitioner.timestampRegex.search(name)
+        if match is None:
+            match = SeriesPartitioner.digitsRegex.search(name)
+        if match is None:
+            return None
+        extMatch = SeriesPartitioner.extRegex.search(name, match.end())
+        ext = extMatch.group(0) if extMatch else ""
+        return f"{name[:match.start()]}*{ext}"
+
+    def getSeries(self, name: str) -> Optional[str]:
+        """
+        get the series of the given file name
+
+        Args:
+            name(str): the file name
+
+        Returns:
+            str: the name of the series or None if the file does not belong to any series
+        """
+        if self.regex is not None:
+            match = self.regex.match(name)
+            if match is not None:
+                return self.patterns[int(match.lastgroup[1:])]
+        if self.autoDetect:
+            return self.detectSeries(name)
+        return None
+
+    def accept(self, name: str) -> bool:
+        """
+        check whether the given file name belongs to one of my series
+
+        Args:
+            name(str): the file name
+
+        Returns:
+            bool: True if the file belongs to a series
+        """
+        return self.getSeries(name) is not None
+
+    def partition(self, table: BackupFileTable) -> Dict[str, BackupFileTable]:
+        """
+        partition the given table into a table per series
+
+        Args:
+            table(BackupFileTable): the backup files
+
+        Returns:
+            dict: the tables by series name
+        """
+        seriesTables = {}
+        # the unknown sizes of files with a time in their name are passed on unresolved
+        for filePath, size, mtime in zip(table.filePaths, table._sizes, table.mtimes):
+            series = self.getSeries(os.path.basename(filePath))
+            if series is None:
+                continue
+            if series not in seriesTables:
+                seriesTables[series] = BackupFileTable()
+            seriesTables[series].append(filePath, size, mtime)
+        return seriesTables
+
+
+class SeriesExpiration:
+    """
+    apply an Expiration independently to each backup series
+    """
+
+    def __init__(self, expiration: Expiration, workers: int = 1):
+        """
+        constructor
+
+        Args:
+            expiration(Expiration): the expiration to apply to each series
+            workers(int): the number of worker processes - 1 applies the rules in this process
+        """
+        self.expiration = expiration
+        self.workers = workers
+
+    def apply(self, seriesTables: Dict[str, BackupFileTable]) -> List[Tuple[str, BackupFileTable]]:
+        """
+        apply my expiration to the given series
+
+        Args:
+            seriesTables(dict): the tables by series name
+
+        Returns:
+            list: (series,table) tuples of the sorted and marked tables ordered by series name
+        """
+        names = sorted(seriesTables)
+        if self.workers > 1 and len(names) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(names))) as executor:
+                tables = list(
+                    executor.map(applySeriesRules, [self.expiration] * len(names), [seriesTables[n] for n in names])
+                )
+        else:
+            tables = [applySeriesRules(self.expiration, seriesTables[name]) for name in names]
+        return list(zip(names, tables))
@@ -0,0 +1,193 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import glob
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import Dict, List
+
+from expirebackups.jobs import BackupJob, JobResult, JobRunner
+from expirebackups.storage import ObjectStore
+
+
+def runShard(name: str, options: Dict, withDelete: bool, debug: bool) -> JobResult:
+    """
+    run the expiration of a single root in a worker process
+
+    Args:
+        name(str): the name of the shard
+        options(dict): the options of the BackupJob including the rootPath
+        withDelete(bool): if True really delete the files
+        debug(bool): if True show debug information
+
+    Returns:
+        JobResult: the result with the captured plan
+    """
+    result = JobResult(name, options.get("rootPath"))
+    try:
+        job = BackupJob(name, options, dryRun=not withDelete, debug=debug)
+    except Exception as ex:
+        result.error = str(ex)
+        return result
+    runner = JobRunner([job], withDelete=withDelete)
+    return runner.runJob(job)
+
+
+class ShardRunner(JobRunner):
+    """
+    run the expiration of several roots in a pool of worker processes
+
+    the roots are grouped by the device they are on and at most deviceWorkers roots of a device are
+    processed at the same time so that the disks are not thrashed. The plans are shown in the order
+    of the roots followed by the consolidated summary of the JobRunner
+    """
+
+    def __init__(
+        self,
+        jobs: List[BackupJob],
+        workers: int = 1,
+        deviceWorkers: int = 1,
+        withDelete: bool = False,
+        debug: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            jobs(list): a job per root
+            workers(int): the maximum number of worker processes
+            deviceWorkers(int): the maximum number of roots of the same device to process concurrently
+            withDelete(bool): if True really delete the files
+            debug(bool): if True show debug information
+        """
+        super().__init__(jobs, workers=workers, withDelete=withDelete)
+        if deviceWorkers < 1:
+            raise Exception(f"{deviceWorkers} deviceWorkers is invalid - deviceWorkers must be >=1")
+        self.deviceWorkers = deviceWorkers
+        self.debug = debug
+
+    @classmethod
+    def expandRoots(cls, patterns: List[str]) -> List[str]:
+        """
+        expand the given root paths and glob patterns
+
+        Args:
+            patterns(list): root paths, glob patterns e.g. "/backup/*" or s3://bucket/prefix urls
+
+        Returns:
+            list: the roots in the given order without duplicates - the matches of a pattern sorted
+        """
+        roots = []
+        for pattern in patterns:
+            if pattern.startswith(ObjectStore.scheme) or not glob.has_magic(pattern):
+                matches = [pattern]
+            else:
+                matches = sorted(path for path in glob.glob(pattern) if os.path.isdir(path))
+                if not matches:
+                    raise Exception(f"no root matches {pattern}")
+            for root in matches:
+                if root not in roots:
+                    roots.append(root)
+        return roots
+
+    @classmethod
+    def forRoots(
+        cls,
+        roots: List[str],
+        options: Dict,
+        workers: int = 1,
+        deviceWorkers: int = 1,
+        withDelete: bool = False,
+        debug: bool = False,
+    ) -> "ShardRunner":
+        """
+        create a runner with a job per root
+
+        Args:
+            roots(list): the root paths
+            options(dict): the options of the BackupJob all roots share - without the rootPath
+            workers(int): the maximum number of worker processes
+            deviceWorkers(int): the maximum number of roots of the same device to process concurrently
+            withDelete(bool): if True really delete the files
+            debug(bool): if True show debug information
+
+        Returns:
+            ShardRunner: the runner
+        """
+        jobs = [BackupJob(root, {**options, "rootPath": root}, dryRun=not withDelete, debug=debug) for root in roots]
+        return cls(jobs, workers=workers, deviceWorkers=deviceWorkers, withDelete=withDelete, debug=debug)
+
+    @classmethod
+    def getDevice(cls, rootPath: str):
+        """
+        get the device of the given root
+
+        Args:
+            rootPath(str): the root path
+
+        Returns:
+            the st_dev of a local root - the root itself for an object store or an inaccessible root
+        """
+        if rootPath.startswith(ObjectStore.scheme):
+            return rootPath
+        try:
+            return os.stat(rootPath).st_dev
+        except OSError:
+            return rootPath
+
+    def createExecutor(self) -> Executor:
+        """
+        create the pool of worker processes
+        """
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+    def submitJob(self, executor: Executor, job: BackupJob) -> Future:
+        """
+        submit the given job to the given executor
+        """
+        return executor.submit(runShard, job.name, job.options, self.withDelete, self.debug)
+
+    def run(self, stream=None) -> int:
+        """
+        run my jobs and show their plans and a consolidated summary
+
+        Args:
+            stream(TextIO): the stream to write to (default: sys.stdout)
+
+        Returns:
+            int: the highest exit code of the jobs
+        """
+        if stream is None:
+            stream = sys.stdout
+        queues = {}
+        for i, job in enumerate(self.jobs):
+            queues.setdefault(ShardRunner.getDevice(job.options["rootPath"]), []).append(i)
+        results = [None] * len(self.jobs)
+        running = {}
+        busy = {device: 0 for device in queues}
+        with self.createExecutor() as executor:
+            while True:
+                for device, queue in queues.items():
+                    while queue and busy[device] < self.deviceWorkers and len(running) < self.workers:
+                        i = queue.pop(0)
+                        running[self.submitJob(executor, self.jobs[i])] = (i, device)
+                        busy[device] += 1
+                if not running:
+                    break
+                done, _notDone = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, device = running.pop(future)
+                    busy[device] -= 1
+                    try:
+                        results[i] = future.result()
+                    except Exception as ex:
+                        # e.g. a worker process that died
+                        job = self.jobs[i]
+                        results[i] = JobResult(job.name, job.options["rootPath"])
+                        results[i].error = str(ex)
+        self.results = results
+        return self.report(stream)
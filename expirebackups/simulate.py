@@ -0,0 +1,356 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import itertools
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from expirebackups.expire import BackupFile, Expiration
+
+
+class IncrementalRuleEngine:
+    """
+    rule engine for a small set of retained backups that changes by one new backup at a time
+
+    the rules only look at the age differences between the kept files so aging all files
+    by the same amount does not change the plan - only the arrival of a new backup does.
+    Since expired backups are gone the retained set is bounded by the sum of the
+    minimum amounts of the rules and each arrival costs O(retained files) instead of
+    a sort and scan of all backups ever made
+    """
+
+    def __init__(self, expiration: Expiration):
+        """
+        constructor
+
+        Args:
+            expiration(Expiration): the expiration whose rules to apply
+        """
+        self.expiration = expiration
+        self.tiers = [(ruleName, rule.freq, rule.minAmount) for ruleName, rule in expiration.rules.items()]
+        self.minFileSize = expiration.minFileSize
+        # the birth days and sizes of the retained backups - oldest first
+        self.births = []
+        self.sizes = []
+        self.keptBy = []
+
+    def __len__(self):
+        """
+        get the number of retained backups
+        """
+        return len(self.births)
+
+    @property
+    def total(self) -> float:
+        """
+        the total size of the retained backups
+        """
+        return sum(self.sizes)
+
+    def add(self, birth: int, size: float) -> int:
+        """
+        add a new backup and expire what the rules do not keep any more
+
+        Args:
+            birth(int): the day the backup was made - must not be before the last added backup
+            size(float): the size of the backup
+
+        Returns:
+            int: the number of expired backups
+        """
+        self.births.append(birth)
+        self.sizes.append(size)
+        keep, keptBy = self.select(self.births, self.sizes)
+        expired = len(self.births) - len(keep)
+        if expired:
+            self.births = [self.births[i] for i in keep]
+            self.sizes = [self.sizes[i] for i in keep]
+        self.keptBy = keptBy
+        return expired
+
+    def select(self, births: List[int], sizes: List[float]) -> Tuple[List[int], List[str]]:
+        """
+        select the backups to keep with the same semantics as Expiration.applyRules
+
+        Args:
+            births(list): the birth days of the backups - oldest first
+            sizes(list): the sizes of the backups
+
+        Returns:
+            tuple: the indices of the kept backups oldest first and the names of the rules that kept them
+        """
+        keep = []
+        keptBy = []
+        tiers = iter(self.tiers)
+        tier = next(tiers, None)
+        kept = 0
+        prevBirth = None
+        for i in range(len(births) - 1, -1, -1):
+            if tier is None:
+                break
+            if sizes[i] < self.minFileSize:
+                continue
+            ruleName, freq, minAmount = tier
+            # the birth difference is the age difference of the files
+            if prevBirth is None or prevBirth - births[i] >= freq:
+                kept += 1
+                keep.append(i)
+                keptBy.append(ruleName)
+                prevBirth = births[i]
+            if kept >= minAmount:
+                tier = next(tiers, None)
+                kept = 0
+        keep.reverse()
+        keptBy.reverse()
+        return keep, keptBy
+
+
+class SimulationResult:
+    """
+    the outcome of simulating a retention policy
+    """
+
+    def __init__(self, policy: Dict[str, int], days: int):
+        """
+        constructor
+
+        Args:
+            policy(dict): the minimum amounts of the rules e.g. {"days":7,"weeks":6,"months":8,"years":4}
+            days(int): the number of simulated days
+        """
+        self.policy = policy
+        self.days = days
+        self.backups = 0
+        self.expired = 0
+        self.count = 0
+        self.maxCount = 0
+        self.steadyFrom = 0
+        self.total = 0.0
+        self.peak = 0.0
+        self.peakDay = 0
+        self.ages = []
+        self.keptBy = []
+
+    @property
+    def ageDistribution(self) -> Dict[str, List[int]]:
+        """
+        the ages of the retained backups at the end of the simulation by the rule that kept them
+        """
+        distribution = {}
+        for age, ruleName in zip(self.ages, self.keptBy):
+            distribution.setdefault(ruleName, []).append(age)
+        return distribution
+
+    def asDict(self) -> dict:
+        """
+        get my values as a dict
+        """
+        record = {
+            **self.policy,
+            "days": self.days,
+            "backups": self.backups,
+            "expired": self.expired,
+            "count": self.count,
+            "maxCount": self.maxCount,
+            "steadyFrom": self.steadyFrom,
+            "total": self.total,
+            "peak": self.peak,
+            "peakDay": self.peakDay,
+            "oldest": max(self.ages, default=0),
+        }
+        return record
+
+    def __str__(self):
+        """
+        return a human readable representation of me
+        """
+        policyText = " ".join(f"{name}={amount}" for name, amount in self.policy.items())
+        text = (
+            f"{policyText}: {self.count} files (max {self.maxCount}, steady from day {self.steadyFrom}) "
+            f"{BackupFile.getSizeString(self.total)} (peak {BackupFile.getSizeString(self.peak)} on day {self.peakDay}) "
+            f"oldest {max(self.ages, default=0)} days"
+        )
+        for ruleName, ages in self.ageDistribution.items():
+            text += f"\n  {ruleName:8}: {len(ages):3d} files aged {min(ages)}-{max(ages)} days"
+        return text
+
+
+class PolicySimulator:
+    """
+    replay a synthetic backup schedule against retention policies in memory
+    """
+
+    def __init__(self, years: float = 10, size: float = 1024**3, growth: float = 0.0, interval: int = 1):
+        """
+        constructor
+
+        Args:
+            years(float): the number of years to simulate
+            size(float): the size of the first backup in bytes
+            growth(float): the yearly growth rate of the backup size e.g. 0.2 for 20% per year
+            interval(int): the number of days between two backups
+        """
+        if interval < 1:
+            raise Exception(f"{interval} interval is invalid - interval must be >=1")
+        self.days = int(years * 365)
+        self.size = size
+        self.growth = growth
+        self.interval = interval
+
+    def getSize(self, day: int) -> float:
+        """
+        get the size of the backup made on the given day
+
+        Args:
+            day(int): the day of the simulation
+
+        Returns:
+            float: the size in bytes
+        """
+        return self.size * (1 + self.growth) ** (day / 365)
+
+    def simulate(self, expiration: Expiration) -> SimulationResult:
+        """
+        simulate a daily expiration run with deletion for my backup schedule
+
+        Args:
+            expiration(Expiration): the retention policy
+
+        Returns:
+            SimulationResult: the file counts, storage peak and retained ages
+        """
+        policy = {rule.name: rule.minAmount for rule in expiration.rules.values()}
+        result = SimulationResult(policy, self.days)
+        engine = IncrementalRuleEngine(expiration)
+        total = 0.0
+        # between two backups the plan does not change so only the arrival days need an evaluation
+        for day in range(0, self.days, self.interval):
+            size = self.getSize(day)
+            total += size
+            # the storage peaks just before the expiration run that follows the backup
+            if total > result.peak:
+                result.peak = total
+                result.peakDay = day
+            result.backups += 1
+            expired = engine.add(day, size)
+            result.expired += expired
+            if expired:
+                total = engine.total
+            count = len(engine)
+            if count != result.count:
+                result.steadyFrom = day
+            result.count = count
+            result.maxCount = max(result.maxCount, count)
+        lastDay = self.days - 1
+        result.total = total
+        result.ages = [lastDay - birth for birth in engine.births]
+        result.keptBy = engine.keptBy
+        return result
+
+    def simulatePolicy(self, policy: Dict[str, int]) -> SimulationResult:
+        """
+        simulate the given policy - to be used by a process pool
+
+        Args:
+            policy(dict): the keyword arguments for the Expiration
+
+        Returns:
+            SimulationResult: the result
+        """
+        return self.simulate(Expiration(**policy))
+
+    @classmethod
+    def policyGrid(cls, minFileSize: int = 0, **amounts: List[int]) -> List[Dict[str, int]]:
+        """
+        get all combinations of the given minimum amounts
+
+        Args:
+            minFileSize(int): the minimum file size of all policies
+            amounts(dict): lists of the amounts to try by Expiration keyword e.g. days=[7,14]
+
+        Returns:
+            list: the policies as Expiration keyword arguments
+        """
+        names = list(amounts)
+        policies = [
+            {**dict(zip(names, combination)), "minFileSize": minFileSize}
+            for combination in itertools.product(*amounts.values())
+        ]
+        return policies
+
+    def sweep(self, policies: List[Dict[str, int]], workers: int = 1) -> List[SimulationResult]:
+        """
+        simulate all the given policies
+
+        Args:
+            policies(list): the policies as Expiration keyword arguments
+            workers(int): the number of worker processes - 1 simulates in this process
+
+        Returns:
+            list: the results in the order of the policies
+        """
+        if workers > 1 and len(policies) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunkSize = max(1, len(policies) // (workers * 4))
+                results = list(executor.map(self.simulatePolicy, policies, chunksize=chunkSize))
+        else:
+            results = [self.simulatePolicy(policy) for policy in policies]
+        return results
+
+
+def main(argv=None):
+    """
+    simulate retention policies from the command line
+    """
+    if argv is None:
+        argv = sys.argv
+    parser = ArgumentParser(description="simulate the effect of retention policies over the years")
+    parser.add_argument(
+        "--simulate",
+        dest="simulatedYears",
+        type=float,
+        default=10,
+        help="number of years to simulate (default: %(default)s)",
+    )
+    parser.add_argument("--size", default="1GB", help="size of the first backup (default: %(default)s)")
+    parser.add_argument(
+        "--growth", type=float, default=0.0, help="yearly growth rate of the backup size (default: %(default)s)"
+    )
+    parser.add_argument("--interval", type=int, default=1, help="days between two backups (default: %(default)s)")
+    parser.add_argument(
+        "--minFileSize",
+        type=int,
+        default=0,
+        help="minimum size in bytes of a backup to be kept (default: %(default)s)",
+    )
+    for name, default in [("days", 7), ("weeks", 6), ("months", 8), ("years", 4)]:
+        parser.add_argument(
+            f"--{name}",
+            dest=f"{name}Amounts",
+            default=str(default),
+            help=f"comma separated numbers of {name} to keep - all combinations are simulated (default: %(default)s)",
+        )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of worker processes for the sweep (default: %(default)s)"
+    )
+    parser.add_argument("--sortBy", choices=["total", "peak", "count", "oldest"], help="sort the results")
+    args = parser.parse_args(argv[1:])
+    amounts = {
+        name: [int(amount) for amount in getattr(args, f"{name}Amounts").split(",")]
+        for name in ["days", "weeks", "months", "years"]
+    }
+    simulator = PolicySimulator(args.simulatedYears, BackupFile.parseSize(args.size), args.growth, args.interval)
+    results = simulator.sweep(PolicySimulator.policyGrid(args.minFileSize, **amounts), workers=args.workers)
+    if args.sortBy:
+        results.sort(key=lambda result: result.asDict()[args.sortBy])
+    for result in results:
+        print(result)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+from typing import Iterable, List, Tuple
+
+from expirebackups.delete import Deleter, DeleteResult
+from expirebackups.expire import BackupFile
+
+
+class FreeSpaceTarget:
+    """
+    the free space to reach on the filesystem of the backups
+
+    if the files expired by the rules do not free enough space further kept files are expired
+    in the priority order of the rules that kept them - oldest first within a rule.
+    The youngest backup of each series is never expired
+    """
+
+    defaultOrder = ["dayly", "weekly", "monthly", "yearly"]
+
+    def __init__(self, target: str, order: List[str] = None, ruleNames: List[str] = None):
+        """
+        constructor
+
+        Args:
+            target(str): the free space to reach as a percentage of the filesystem size e.g. "20%"
+            or as a size e.g. "500GB"
+            order(list): the names of the rules whose files to expire first
+            (default: the ruleNames from the finest to the coarsest tier or dayly,weekly,monthly,yearly)
+            ruleNames(list): the valid rule names to check the order against (if any)
+        """
+        self.target = target
+        self.percent = None
+        self.size = None
+        if target.endswith("%"):
+            try:
+                self.percent = float(target[:-1])
+            except ValueError:
+                self.percent = -1
+            if not 0 < self.percent <= 100:
+                raise Exception(f"invalid targetFree {target} - a percentage must be >0% and <=100%")
+        else:
+            self.size = BackupFile.parseSize(target)
+        if order is None:
+            order = ruleNames if ruleNames is not None else FreeSpaceTarget.defaultOrder
+        if ruleNames is not None:
+            for ruleName in order:
+                if ruleName not in ruleNames:
+                    raise Exception(f"invalid rule {ruleName} in targetOrder - must be one of {','.join(ruleNames)}")
+        self.order = order
+
+    @classmethod
+    def getUsage(cls, path: str) -> Tuple[int, int]:
+        """
+        get the free and total bytes of the filesystem of the given path
+
+        Args:
+            path(str): a path on the filesystem
+
+        Returns:
+            tuple(int,int): the bytes available to unprivileged users and the size of the filesystem
+        """
+        stats = os.statvfs(path)
+        return stats.f_bavail * stats.f_frsize, stats.f_blocks * stats.f_frsize
+
+    def getTargetBytes(self, total: int) -> int:
+        """
+        get the number of free bytes to reach
+
+        Args:
+            total(int): the size of the filesystem
+
+        Returns:
+            int: the target in bytes
+        """
+        if self.percent is not None:
+            return int(total * self.percent / 100)
+        return self.size
+
+    def getShortfall(self, path: str, planned: int = 0) -> int:
+        """
+        get the number of bytes that are still missing to reach my target
+
+        Args:
+            path(str): a path on the filesystem
+            planned(int): the bytes that are going to be freed already
+
+        Returns:
+            int: the missing bytes - 0 if the target is met
+        """
+        free, total = self.getUsage(path)
+        return max(0, self.getTargetBytes(total) - free - planned)
+
+    def select(self, filesByAge: List[BackupFile], seriesNames: Iterable[str], shortfall: int) -> List[BackupFile]:
+        """
+        select kept files to expire additionally to free the given number of bytes
+
+        Args:
+            filesByAge(list): the marked backup files - youngest first per series
+            seriesNames(Iterable): the name of the series of each file (if any)
+            shortfall(int): the bytes to free
+
+        Returns:
+            list: the selected files in the order they should be deleted
+        """
+        if shortfall <= 0:
+            return []
+        ranks = {ruleName: rank for rank, ruleName in enumerate(self.order)}
+        youngest = set()
+        candidates = []
+        for i, (backupFile, series) in enumerate(zip(filesByAge, seriesNames)):
+            if backupFile.expire:
+                continue
+            if series not in youngest:
+                youngest.add(series)
+                continue
+            rank = ranks.get(backupFile.keptBy, len(self.order))
+            candidates.append((rank, backupFile.mtime, i))
+        candidates.sort()
+        selected = []
+        for _rank, _mtime, i in candidates:
+            if shortfall <= 0:
+                break
+            backupFile = filesByAge[i]
+            selected.append(backupFile)
+            shortfall -= backupFile.size
+        return selected
+
+    def deleteUntilMet(
+        self, path: str, files: List[Tuple[str, int]], deleter: Deleter, planned: int = 0
+    ) -> DeleteResult:
+        """
+        delete the given files one by one until my target is met
+
+        Args:
+            path(str): a path on the filesystem
+            files(list): (filePath,size) tuples of the files in the order to delete them
+            deleter(Deleter): the deleter to use - a Quarantine does not free the space right away
+            planned(int): the bytes that are going to be freed already e.g. by purging a quarantine
+
+        Returns:
+            DeleteResult: the counts and failures
+        """
+        result = DeleteResult()
+        for file in files:
+            if self.getShortfall(path, planned) == 0:
+                break
+            fileResult = deleter.delete([file])
+            if not deleter.freesSpace:
+                planned += fileResult.freed
+            result.add(fileResult)
+        return result
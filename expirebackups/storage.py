@@ -0,0 +1,497 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import posixpath
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from expirebackups.delete import Deleter, DeleteResult
+from expirebackups.index import IndexedStats
+from expirebackups.scan import BackupScanner
+
+# key, size and modification time of an object
+ObjectInfo = Tuple[str, int, float]
+# the objects, the common prefixes and the continuation token of a page of a listing
+ObjectPage = Tuple[List[ObjectInfo], List[str], Optional[str]]
+
+
+class StorageBackend:
+    """
+    the storage the backups are kept in - lists the backups with a scanner and deletes them with a deleter
+    """
+
+    # True if the backups are files of the local filesystem
+    local = True
+
+    def getScanner(self, **kwargs) -> BackupScanner:
+        """
+        get a scanner for my backups
+
+        Args:
+            kwargs: the file filter options of the BackupScanner
+
+        Returns:
+            BackupScanner: the scanner
+        """
+        raise NotImplementedError()
+
+    def getDeleter(self, workers: int = 1, debug: bool = False, directories: bool = False):
+        """
+        get a deleter for my backups
+
+        Args:
+            workers(int): the maximum number of concurrent delete workers
+            debug(bool): if True show debug information
+            directories(bool): if True directories are backups that are removed recursively
+
+        Returns:
+            Deleter: the deleter with a delete(files) method
+        """
+        raise NotImplementedError()
+
+    def remove(self, filePath: str):
+        """
+        delete the given backup - a missing backup is ignored
+
+        Args:
+            filePath(str): the path of the backup
+        """
+        result = self.getDeleter().delete([(filePath, 0)])
+        if result.failures:
+            raise result.failures[0][1]
+
+    @classmethod
+    def forRoot(cls, rootPath: str, endpoint: str = None, listWorkers: int = 1) -> "StorageBackend":
+        """
+        get the storage for the given root path
+
+        Args:
+            rootPath(str): a local path or an s3://bucket/prefix url
+            endpoint(str): the endpoint url of an S3 compatible object store e.g. a MinIO server (if any)
+            listWorkers(int): the number of threads for listing the prefixes of an object store
+
+        Returns:
+            StorageBackend: an ObjectStore for an s3:// url else a LocalStorage
+        """
+        # the rootPath might be a pathlib.Path
+        if str(rootPath).startswith(ObjectStore.scheme):
+            bucket, prefix = ObjectStore.parseUrl(str(rootPath))
+            return ObjectStore(Boto3Client(endpoint), bucket, prefix, listWorkers=listWorkers)
+        return LocalStorage(rootPath)
+
+
+class LocalStorage(StorageBackend):
+    """
+    backups in the local filesystem
+    """
+
+    def __init__(self, rootPath: str):
+        """
+        constructor
+
+        Args:
+            rootPath(str): the path of the backup tree
+        """
+        self.rootPath = rootPath
+
+    def getScanner(self, **kwargs) -> BackupScanner:
+        return BackupScanner(self.rootPath, **kwargs)
+
+    def getDeleter(self, workers: int = 1, debug: bool = False, directories: bool = False) -> Deleter:
+        return Deleter(workers=workers, debug=debug, directories=directories)
+
+
+class ObjectStoreClient:
+    """
+    the requests of an S3 compatible object store needed for expiring backups
+    """
+
+    # the maximum number of keys of a delete request
+    maxDeleteKeys = 1000
+
+    def listPage(self, bucket: str, prefix: str, delimiter: str, token: str = None, maxKeys: int = 1000) -> ObjectPage:
+        """
+        list a page of the objects and common prefixes of the given prefix like ListObjectsV2
+
+        Args:
+            bucket(str): the bucket
+            prefix(str): the prefix of the keys to list
+            delimiter(str): the delimiter to roll up the keys below the prefix into common prefixes
+            token(str): the continuation token of the previous page (if any)
+            maxKeys(int): the maximum number of objects and common prefixes of the page
+
+        Returns:
+            ObjectPage: the objects, the common prefixes and the token of the next page - None for the last page
+        """
+        raise NotImplementedError()
+
+    def deleteKeys(self, bucket: str, keys: List[str]) -> List[Tuple[str, str]]:
+        """
+        delete the given objects with a single request like DeleteObjects - missing objects are not an error
+
+        Args:
+            bucket(str): the bucket
+            keys(list): at most maxDeleteKeys keys
+
+        Returns:
+            list: the (key,message) tuples of the objects that could not be deleted
+        """
+        raise NotImplementedError()
+
+
+class Boto3Client(ObjectStoreClient):
+    """
+    object store client for Amazon S3 or an S3 compatible server based on boto3
+    """
+
+    def __init__(self, endpoint: str = None):
+        """
+        constructor
+
+        Args:
+            endpoint(str): the endpoint url of an S3 compatible object store (default: Amazon S3)
+        """
+        try:
+            import boto3
+        except ImportError:
+            raise Exception("object storage needs boto3 - install with pip install pyExpireBackups[s3]")
+        self.client = boto3.client("s3", endpoint_url=endpoint)
+
+    def listPage(self, bucket: str, prefix: str, delimiter: str, token: str = None, maxKeys: int = 1000) -> ObjectPage:
+        options = {"Bucket": bucket, "Prefix": prefix, "Delimiter": delimiter, "MaxKeys": maxKeys}
+        if token is not None:
+            options["ContinuationToken"] = token
+        response = self.client.list_objects_v2(**options)
+        objects = [
+            (content["Key"], content["Size"], content["LastModified"].timestamp())
+            for content in response.get("Contents", [])
+        ]
+        prefixes = [commonPrefix["Prefix"] for commonPrefix in response.get("CommonPrefixes", [])]
+        return objects, prefixes, response.get("NextContinuationToken")
+
+    def deleteKeys(self, bucket: str, keys: List[str]) -> List[Tuple[str, str]]:
+        response = self.client.delete_objects(
+            Bucket=bucket, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+        )
+        return [(error["Key"], error.get("Message", error.get("Code"))) for error in response.get("Errors", [])]
+
+
+class FakeObjectStore(ObjectStoreClient):
+    """
+    in-process stand-in for an S3 compatible object store e.g. for tests and trying out rules
+
+    listing is paginated and rolls up common prefixes like ListObjectsV2 and deletes are limited
+    to maxDeleteKeys keys per request - the requests are counted
+    """
+
+    def __init__(self, pageSize: int = 1000):
+        """
+        constructor
+
+        Args:
+            pageSize(int): the maximum number of objects and common prefixes per page
+        """
+        self.pageSize = pageSize
+        self.buckets: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        self.requests = {"list": 0, "delete": 0}
+        self.lock = threading.Lock()
+
+    def put(self, bucket: str, key: str, size: int, mtime: float):
+        """
+        store an object with the given size and modification time
+
+        Args:
+            bucket(str): the bucket
+            key(str): the key of the object
+            size(int): the size in bytes
+            mtime(float): the modification time as a timestamp
+        """
+        with self.lock:
+            self.buckets.setdefault(bucket, {})[key] = (size, mtime)
+
+    def listPage(self, bucket: str, prefix: str, delimiter: str, token: str = None, maxKeys: int = 1000) -> ObjectPage:
+        with self.lock:
+            self.requests["list"] += 1
+            keys = sorted(key for key in self.buckets.get(bucket, {}) if key.startswith(prefix))
+            objects = self.buckets.get(bucket, {})
+            page = []
+            prefixes = []
+            lastKey = None
+            for key in keys:
+                if token is not None and key <= token:
+                    continue
+                if len(page) + len(prefixes) >= min(maxKeys, self.pageSize):
+                    return page, prefixes, lastKey
+                rest = key[len(prefix) :]
+                if delimiter and delimiter in rest:
+                    commonPrefix = prefix + rest[: rest.index(delimiter) + len(delimiter)]
+                    if prefixes and prefixes[-1] == commonPrefix:
+                        lastKey = key
+                        continue
+                    # continue after all keys of a common prefix of a previous page
+                    if token is not None and token.startswith(commonPrefix):
+                        continue
+                    prefixes.append(commonPrefix)
+                else:
+                    size, mtime = objects[key]
+                    page.append((key, size, mtime))
+                lastKey = key
+            return page, prefixes, None
+
+    def deleteKeys(self, bucket: str, keys: List[str]) -> List[Tuple[str, str]]:
+        if len(keys) > ObjectStoreClient.maxDeleteKeys:
+            raise Exception(f"{len(keys)} keys can not be deleted with a single request")
+        with self.lock:
+            self.requests["delete"] += 1
+            objects = self.buckets.get(bucket, {})
+            for key in keys:
+                objects.pop(key, None)
+        return []
+
+
+class ObjectStore(StorageBackend):
+    """
+    backups in a bucket of an S3 compatible object store
+
+    the prefixes are listed concurrently with paginated requests and the expired backups are deleted
+    in batches of up to maxDeleteKeys keys per request. The backups are addressed as s3://bucket/key
+    """
+
+    scheme = "s3://"
+    local = False
+
+    def __init__(self, client: ObjectStoreClient, bucket: str, prefix: str = "", listWorkers: int = 1):
+        """
+        constructor
+
+        Args:
+            client(ObjectStoreClient): the client of the object store
+            bucket(str): the bucket of the backups
+            prefix(str): the prefix of the keys of the backups e.g. "backups/" (if any)
+            listWorkers(int): the number of threads for listing the prefixes
+        """
+        if listWorkers < 1:
+            raise Exception(f"{listWorkers} listWorkers is invalid - listWorkers must be >=1")
+        if prefix and not prefix.endswith("/"):
+            prefix += "/"
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.listWorkers = listWorkers
+
+    @classmethod
+    def parseUrl(cls, url: str) -> Tuple[str, str]:
+        """
+        split the given url into bucket and prefix
+
+        Args:
+            url(str): an s3://bucket/prefix url
+
+        Returns:
+            tuple(str,str): the bucket and the prefix
+        """
+        if not url.startswith(ObjectStore.scheme):
+            raise Exception(f"invalid object store url {url} - must start with {ObjectStore.scheme}")
+        bucket, _slash, prefix = url[len(ObjectStore.scheme) :].partition("/")
+        if not bucket:
+            raise Exception(f"invalid object store url {url} - the bucket is missing")
+        return bucket, prefix
+
+    @property
+    def url(self) -> str:
+        """
+        the url of my backups
+        """
+        return f"{ObjectStore.scheme}{self.bucket}/{self.prefix}"
+
+    def getKey(self, filePath: str) -> str:
+        """
+        get the key of the given backup
+
+        Args:
+            filePath(str): the s3://bucket/key path of the backup
+
+        Returns:
+            str: the key
+        """
+        bucket, key = ObjectStore.parseUrl(filePath)
+        if bucket != self.bucket:
+            raise Exception(f"{filePath} is not in bucket {self.bucket}")
+        return key
+
+    def getScanner(self, **kwargs) -> BackupScanner:
+        if kwargs.get("directories"):
+            raise Exception("an object store has no directory backups")
+        return ObjectStoreScanner(self, **kwargs)
+
+    def getDeleter(self, workers: int = 1, debug: bool = False, directories: bool = False) -> "ObjectStoreDeleter":
+        return ObjectStoreDeleter(self, workers=workers, debug=debug)
+
+
+class ObjectStoreScanner(BackupScanner):
+    """
+    scanner for backups in an object store - the common prefixes are walked like directories
+    and each prefix is listed page by page by a worker of a bounded thread pool
+    """
+
+    def __init__(self, storage: ObjectStore, **kwargs):
+        """
+        constructor
+
+        Args:
+            storage(ObjectStore): the object store to scan
+            kwargs: the file filter options of the BackupScanner
+        """
+        super().__init__(storage.url, **kwargs)
+        self.storage = storage
+
+    def listPrefix(self, relDir: str) -> Tuple[list, list, int]:
+        """
+        list the matching objects and the sub prefixes of the given prefix
+
+        Args:
+            relDir(str): the prefix relative to the prefix of my storage without a trailing slash
+
+        Returns:
+            tuple(list,list,int): the (name,stats) tuples of the matching objects, the sub prefix names and
+            the number of objects listed
+        """
+        storage = self.storage
+        prefix = storage.prefix + (f"{relDir}/" if relDir else "")
+        files = []
+        subDirs = []
+        listed = 0
+        token = None
+        while True:
+            objects, prefixes, token = storage.client.listPage(storage.bucket, prefix, "/", token)
+            listed += len(objects)
+            for key, size, mtime in objects:
+                name = key[len(prefix) :]
+                # folder placeholder objects
+                if not name or not self.isCandidate(name, relDir):
+                    continue
+                if self.nameParser is not None:
+                    nameTime = self.nameParser.parse(name)
+                    if nameTime is not None:
+                        mtime = nameTime
+                files.append((name, IndexedStats(size, mtime)))
+            subDirs.extend(commonPrefix[len(prefix) : -1] for commonPrefix in prefixes)
+            if token is None:
+                return files, subDirs, listed
+
+    def walk(self, relDir: str = ""):
+        """
+        walk my object store and yield the path and stats of each matching object
+
+        Args:
+            relDir(str): the prefix relative to the prefix of my storage to start at
+
+        Yields:
+            tuple(str,IndexedStats): the s3://bucket/key path and the size and modification time of a matching object
+        """
+        with ThreadPoolExecutor(max_workers=self.storage.listWorkers) as executor:
+            pending = {executor.submit(self.listPrefix, relDir): relDir}
+            while pending:
+                done, _notDone = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    prefixDir = pending.pop(future)
+                    files, subDirs, listed = future.result()
+                    self.stats.dirs += 1
+                    self.stats.entries += listed
+                    for name in subDirs:
+                        # prefixes of state files e.g. a quarantine are never scanned
+                        if name.startswith(BackupScanner.statePrefix):
+                            continue
+                        subDir = posixpath.join(prefixDir, name) if prefixDir else name
+                        if self.acceptDir(subDir):
+                            pending[executor.submit(self.listPrefix, subDir)] = subDir
+                    path = posixpath.join(self.rootPath, prefixDir) if prefixDir else self.rootPath.rstrip("/")
+                    for name, stats in files:
+                        self.stats.files += 1
+                        filePath = f"{path}/{name}"
+                        if self.onFile is not None:
+                            self.onFile(filePath, stats)
+                        yield filePath, stats
+
+
+class ObjectStoreDeleter:
+    """
+    deletion stage for expired backups in an object store - the keys are deleted in batches
+    of up to maxDeleteKeys keys per request by a bounded thread pool
+    """
+
+    # the freed bytes are available as soon as the objects are deleted
+    freesSpace = True
+
+    def __init__(self, storage: ObjectStore, workers: int = 1, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            storage(ObjectStore): the object store to delete from
+            workers(int): the maximum number of concurrent delete requests
+            debug(bool): if True show debug information
+        """
+        if workers < 1:
+            raise Exception(f"{workers} deleteWorkers is invalid - deleteWorkers must be >=1")
+        self.storage = storage
+        self.workers = workers
+        self.debug = debug
+
+    def deleteBatch(self, batch: List[Tuple[str, int]]) -> DeleteResult:
+        """
+        delete the given backups with a single request
+
+        Args:
+            batch(list): (filePath,size) tuples of at most maxDeleteKeys backups
+
+        Returns:
+            DeleteResult: the counts and failures
+        """
+        result = DeleteResult()
+        keys = {self.storage.getKey(filePath): (filePath, size) for filePath, size in batch}
+        try:
+            errors = self.storage.client.deleteKeys(self.storage.bucket, list(keys))
+        except Exception as ex:
+            result.failures.extend((filePath, ex) for filePath, _size in batch)
+            return result
+        failed = set()
+        for key, message in errors:
+            failed.add(key)
+            result.failures.append((keys[key][0], Exception(message)))
+        for key, (_filePath, size) in keys.items():
+            if key not in failed:
+                result.deleted += 1
+                result.freed += size
+        return result
+
+    def delete(self, files: List[Tuple[str, int]]) -> DeleteResult:
+        """
+        delete the given backups
+
+        Args:
+            files(list): (filePath,size) tuples of the backups to delete
+
+        Returns:
+            DeleteResult: the counts and failures - missing objects count as deleted like in S3
+        """
+        result = DeleteResult()
+        batchSize = ObjectStoreClient.maxDeleteKeys
+        batches = [files[start : start + batchSize] for start in range(0, len(files), batchSize)]
+        if self.workers == 1 or len(batches) < 2:
+            for batch in batches:
+                result.add(self.deleteBatch(batch))
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for batchResult in executor.map(self.deleteBatch, batches):
+                    result.add(batchResult)
+        for filePath, error in result.failures:
+            sys.stderr.write(f"failed to delete {filePath}: {error}\n")
+        if self.debug:
+            print(f"deleted {len(files)} objects with {len(batches)} requests")
+        return result
@@ -0,0 +1,250 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import heapq
+import pickle
+import tempfile
+from typing import Iterator, List, TextIO, Tuple
+
+from expirebackups.expire import BackupFile, ExpireBackups
+from expirebackups.index import IndexedStats
+
+# age, scan sequence number, mtime, size and path of a backup file
+SortRecord = Tuple[float, int, float, int, str]
+
+
+class ExternalSorter:
+    """
+    sort records that might not fit into memory
+
+    records are collected up to a memory budget - then the collected records are sorted
+    and spilled to an anonymous temporary file as a run. The runs are merged lazily
+    so that sorting n records needs O(budget + number of runs) memory
+    """
+
+    # estimated bytes per record in addition to the length of the path
+    recordOverhead = 240
+    # number of records per pickled batch of a run
+    batchSize = 1024
+
+    def __init__(self, memoryBudget: int, tmpDir: str = None):
+        """
+        constructor
+
+        Args:
+            memoryBudget(int): the number of bytes the collected records may take
+            tmpDir(str): the directory for the runs (default: the system temporary directory)
+        """
+        if memoryBudget < 1:
+            raise Exception(f"{memoryBudget} memoryBudget is invalid - must be >=1 byte")
+        self.memoryBudget = memoryBudget
+        self.tmpDir = tmpDir
+        self.records = []
+        self.used = 0
+        self.runs = []
+        self.count = 0
+
+    def add(self, record: SortRecord):
+        """
+        add the given record - spilling the collected records if my budget is exceeded
+
+        Args:
+            record(SortRecord): the record to add
+        """
+        self.records.append(record)
+        self.count += 1
+        self.used += ExternalSorter.recordOverhead + len(record[-1])
+        if self.used >= self.memoryBudget:
+            self.spill()
+
+    def spill(self):
+        """
+        sort the collected records and write them to a new run
+        """
+        if not self.records:
+            return
+        self.records.sort()
+        run = tempfile.TemporaryFile(dir=self.tmpDir)
+        for start in range(0, len(self.records), ExternalSorter.batchSize):
+            pickle.dump(self.records[start : start + ExternalSorter.batchSize], run, protocol=pickle.HIGHEST_PROTOCOL)
+        self.runs.append(run)
+        self.records = []
+        self.used = 0
+
+    @classmethod
+    def readRun(cls, run) -> Iterator[SortRecord]:
+        """
+        read the records of the given run
+
+        Args:
+            run(BinaryIO): the run
+
+        Yields:
+            SortRecord: the records in sorted order
+        """
+        run.seek(0)
+        while True:
+            try:
+                batch = pickle.load(run)
+            except EOFError:
+                return
+            yield from batch
+
+    def sorted(self) -> Iterator[SortRecord]:
+        """
+        get all records in sorted order
+
+        Yields:
+            SortRecord: the records
+        """
+        if not self.runs:
+            self.records.sort()
+            records, self.records = self.records, []
+            yield from records
+            return
+        self.spill()
+        try:
+            yield from heapq.merge(*[ExternalSorter.readRun(run) for run in self.runs])
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        remove my runs
+        """
+        for run in self.runs:
+            run.close()
+        self.runs = []
+
+
+class StreamingExpiration:
+    """
+    expire backups as a stream with bounded memory
+
+    the scan feeds an ExternalSorter and the rules, the report and the deletion consume the sorted
+    stream in a single pass - only the previously kept file and a batch of files to delete are held
+    """
+
+    deleteBatchSize = 10000
+
+    def __init__(self, expireBackups: ExpireBackups, memoryBudget: int, tmpDir: str = None):
+        """
+        constructor
+
+        Args:
+            expireBackups(ExpireBackups): the expiration to run
+            memoryBudget(int): the number of bytes the sort may keep in memory
+            tmpDir(str): the directory for the sort runs (default: the system temporary directory)
+        """
+        self.expireBackups = expireBackups
+        self.sorter = ExternalSorter(memoryBudget, tmpDir)
+        self.deleteResult = None
+
+    def scan(self, now: float):
+        """
+        scan the backup files into my sorter
+
+        Args:
+            now(float): the timestamp to compute the ages for
+        """
+        eb = self.expireBackups
+        ageUnit = eb.expiration.ageUnit
+        with eb.openScanner() as scanner:
+            for seq, (filePath, stats) in enumerate(scanner.walk()):
+                age = BackupFile.getAge(stats.st_mtime, now, ageUnit)
+                self.sorter.add((age, seq, stats.st_mtime, stats.st_size, filePath))
+
+    def filesByAge(self) -> Iterator[BackupFile]:
+        """
+        get the scanned backup files youngest first in the order of the scan for the same age
+
+        Yields:
+            BackupFile: the unmarked files with their ageInDays
+        """
+        for age, _seq, mtime, size, filePath in self.sorter.sorted():
+            backupFile = BackupFile(filePath, IndexedStats(size, mtime))
+            backupFile.ageInDays = age
+            yield backupFile
+
+    def deleteExpired(self, records: Iterator[dict], deleter) -> Iterator[dict]:
+        """
+        delete the files of the expired records in batches while passing the records on
+
+        Args:
+            records(Iterator): the plan records
+            deleter(Deleter|Quarantine): the deleter to use
+
+        Yields:
+            dict: the records unchanged
+        """
+        eb = self.expireBackups
+        batch: List[Tuple[str, int]] = []
+        for record in records:
+            if record["action"] == "expire":
+                batch.append((record["path"], record["size"]))
+                if len(batch) >= StreamingExpiration.deleteBatchSize:
+                    with eb.metrics.phase("delete"):
+                        self.deleteResult.add(deleter.delete(batch))
+                    batch = []
+            yield record
+        if batch:
+            with eb.metrics.phase("delete"):
+                self.deleteResult.add(deleter.delete(batch))
+
+    def run(
+        self, withDelete: bool = False, show: bool = True, showLimit: int = None, stream: TextIO = None, writer=None
+    ):
+        """
+        expire the backup files
+
+        Args:
+            withDelete(bool): if True really delete the files
+            show(bool): if True show the expiration plan
+            showLimit(int): if set limit the number of lines to display
+            stream(TextIO): the stream to write the plan to (default: sys.stdout)
+            writer(PlanWriter): the writer for the plan (default: a writer for the outputFormat)
+        """
+        from expirebackups.delete import DeleteResult
+        from expirebackups.plan import PlanSummary, PlanWriter
+
+        eb = self.expireBackups
+        metrics = eb.metrics
+        now = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
+        with metrics.phase("scan"):
+            self.scan(now)
+        metrics.count("dirsVisited", eb.scanStats.dirs)
+        metrics.count("filesScanned", eb.scanStats.files)
+        metrics.count("statCalls", eb.scanStats.statCalls)
+        verbose = eb.outputFormat == "text"
+        summary = PlanSummary()
+        with metrics.phase("report"):
+            filesByAge = eb.expiration.markFiles(self.filesByAge(), verbose=verbose, stream=stream)
+            records = PlanWriter.records(filesByAge)
+            if withDelete:
+                self.deleteResult = DeleteResult()
+                records = self.deleteExpired(records, eb.getDeleter())
+            if show:
+                if writer is None:
+                    writer = PlanWriter.create(eb.outputFormat, stream)
+                writer.writePlan(records, self.sorter.count, summary, withDelete, limit=showLimit)
+            else:
+                for _record in summary.tally(records):
+                    pass
+        eb.summary = summary
+        eb.deleteResult = self.deleteResult
+        metrics.count("filesMarked", summary.count - summary.kept)
+        metrics.count("bytesMarked", summary.total - summary.keptTotal)
+        if withDelete:
+            metrics.count("filesDeleted", self.deleteResult.deleted)
+            metrics.count("bytesFreed", self.deleteResult.freed)
+            metrics.count("deleteFailures", len(self.deleteResult.failures))
+            if show and eb.outputFormat == "text":
+                print(f"{self.deleteResult} freeing {BackupFile.getSizeString(self.deleteResult.freed)}", file=stream)
+            if eb.quarantine is not None and eb.backgroundPurge:
+                from expirebackups.quarantine import Purger
+
+                Purger.spawn(eb.quarantine, eb.purgeRate)
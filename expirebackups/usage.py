@@ -0,0 +1,144 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from expirebackups.expire import BackupFile
+
+# device, inode, number of links and allocated bytes of a file
+InodeKey = Tuple[int, int, int, int]
+
+
+class SpaceUsage:
+    """
+    hardlink and sparse file aware accounting of the space of an expiration plan
+
+    the apparent size is the sum of the file sizes as summed up by the plan. The allocated size counts
+    the blocks of each inode once and the reclaimable size only counts the inodes whose links are all
+    expired - links outside of the scanned files keep an inode alive. The inodes are recorded while
+    scanning in hash tables so that the accounting is linear in the number of files
+    """
+
+    def __init__(self):
+        """
+        constructor
+        """
+        # inode key by file path as recorded while scanning
+        self.inodeKeys: Dict[str, InodeKey] = {}
+        # number of links, allocated bytes, expired and kept links in the plan by (device,inode)
+        self.inodes: Dict[Tuple[int, int], List[int]] = {}
+        self.statCalls = 0
+        self.apparent = {"expire": 0, "keep": 0}
+
+    @classmethod
+    def getInodeKey(cls, stats: os.stat_result) -> Optional[InodeKey]:
+        """
+        get the inode key of the given stat result
+
+        Args:
+            stats(os.stat_result): the stat result of a file
+
+        Returns:
+            InodeKey: the device, inode, number of links and allocated bytes - None if the stat result is
+            not a full one e.g. from the scan index
+        """
+        if not hasattr(stats, "st_ino"):
+            return None
+        # platforms without st_blocks do not support sparse files
+        blocks = getattr(stats, "st_blocks", None)
+        allocated = blocks * 512 if blocks is not None else stats.st_size
+        return stats.st_dev, stats.st_ino, stats.st_nlink, allocated
+
+    def record(self, filePath: str, stats: os.stat_result):
+        """
+        record the inode of the given scanned file
+
+        Args:
+            filePath(str): the path of the file
+            stats(os.stat_result): the stat result of the file
+        """
+        inodeKey = SpaceUsage.getInodeKey(stats)
+        if inodeKey is not None:
+            self.inodeKeys[filePath] = inodeKey
+
+    def lookup(self, filePath: str) -> Optional[InodeKey]:
+        """
+        get the inode key of the given file - files that were not stat'ed while scanning are stat'ed now
+
+        Args:
+            filePath(str): the path of the file
+
+        Returns:
+            InodeKey: the inode key or None if the file vanished
+        """
+        inodeKey = self.inodeKeys.get(filePath)
+        if inodeKey is None:
+            try:
+                stats = os.stat(filePath)
+                self.statCalls += 1
+            except OSError:
+                return None
+            inodeKey = SpaceUsage.getInodeKey(stats)
+        return inodeKey
+
+    def tally(self, records: Iterable[dict]) -> Iterator[dict]:
+        """
+        account the given plan records while passing them on
+
+        Args:
+            records(Iterable): the plan records
+
+        Yields:
+            dict: the records unchanged
+        """
+        for record in records:
+            action = record["action"]
+            self.apparent[action] += record["size"]
+            inodeKey = self.lookup(record["path"])
+            if inodeKey is not None:
+                dev, ino, nlink, allocated = inodeKey
+                inode = self.inodes.get((dev, ino))
+                if inode is None:
+                    inode = [nlink, allocated, 0, 0]
+                    self.inodes[(dev, ino)] = inode
+                inode[2 if action == "expire" else 3] += 1
+            yield record
+
+    def getAllocated(self, action: str) -> int:
+        """
+        get the allocated size of the inodes with a link in the files of the given action
+
+        Args:
+            action(str): expire or keep
+
+        Returns:
+            int: the allocated bytes - each inode counted once
+        """
+        column = 2 if action == "expire" else 3
+        return sum(inode[1] for inode in self.inodes.values() if inode[column] > 0)
+
+    @property
+    def reclaimable(self) -> int:
+        """
+        the allocated size of the inodes all of whose links are expired
+        """
+        return sum(allocated for nlink, allocated, expired, _kept in self.inodes.values() if expired >= nlink)
+
+    def __str__(self):
+        """
+        return a human readable representation of me
+        """
+        expired = self.apparent["expire"]
+        kept = self.apparent["keep"]
+        text = (
+            f"expired {BackupFile.getSizeString(expired)} apparent "
+            f"{BackupFile.getSizeString(self.getAllocated('expire'))} allocated "
+            f"{BackupFile.getSizeString(self.reclaimable)} reclaimable - "
+            f"kept {BackupFile.getSizeString(kept)} apparent "
+            f"{BackupFile.getSizeString(self.getAllocated('keep'))} allocated"
+        )
+        return text
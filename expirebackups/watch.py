@@ -0,0 +1,427 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+from typing import Dict, List, Tuple
+
+from expirebackups.expire import BackupFile, BackupFileTable, ExpireBackups
+
+
+class Inotify:
+    """
+    minimal ctypes binding of the Linux inotify API
+    """
+
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_DONT_FOLLOW = 0x02000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    # struct inotify_event without the trailing name
+    eventHeader = struct.Struct("iIII")
+
+    def __init__(self):
+        """
+        constructor
+        """
+        if not sys.platform.startswith("linux"):
+            raise Exception(f"inotify is not available on {sys.platform} - watching needs Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self.check(self.libc.inotify_init1(Inotify.IN_NONBLOCK | Inotify.IN_CLOEXEC))
+
+    def check(self, result: int, path: str = None) -> int:
+        """
+        check the result of a libc call
+
+        Args:
+            result(int): the result
+            path(str): the path the call was for (if any)
+
+        Returns:
+            int: the result if it is not an error
+        """
+        if result < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return result
+
+    def addWatch(self, path: str, mask: int) -> int:
+        """
+        watch the given path
+
+        Args:
+            path(str): the path to watch
+            mask(int): the events to watch for
+
+        Returns:
+            int: the watch descriptor - the same for the same inode
+        """
+        return self.check(self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask), path)
+
+    def removeWatch(self, wd: int):
+        """
+        stop watching the given watch descriptor - a vanished watch is ignored
+
+        Args:
+            wd(int): the watch descriptor
+        """
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float = None) -> List[Tuple[int, int, str]]:
+        """
+        read the pending events
+
+        Args:
+            timeout(float): the seconds to wait for an event - None waits forever
+
+        Returns:
+            list: the (wd,mask,name) tuples of the events - empty if there was no event within the timeout
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        events = []
+        while ready:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = Inotify.eventHeader.unpack_from(data, offset)
+                offset += Inotify.eventHeader.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        """
+        close my inotify file descriptor
+        """
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class BackupWatcher:
+    """
+    keep an in-memory model of the backup files of an ExpireBackups current with inotify
+    and apply the expiration as soon as new backups arrived
+
+    the tree is scanned once at the start - afterwards only the files named in the events
+    are stat'ed and a full rescan is only needed if the kernel event queue overflowed
+    """
+
+    watchMask = (
+        Inotify.IN_CLOSE_WRITE
+        | Inotify.IN_MOVED_TO
+        | Inotify.IN_MOVED_FROM
+        | Inotify.IN_CREATE
+        | Inotify.IN_DELETE
+        | Inotify.IN_ATTRIB
+        | Inotify.IN_ONLYDIR
+        | Inotify.IN_DONT_FOLLOW
+    )
+
+    def __init__(
+        self, expireBackups: ExpireBackups, withDelete: bool = False, settle: float = 0.5, show=True, stream=None
+    ):
+        """
+        constructor
+
+        Args:
+            expireBackups(ExpireBackups): the expiration to apply
+            withDelete(bool): if True really delete the expired files
+            settle(float): the seconds without events to wait for before expiring so that
+            backups arriving together are handled in a single run
+            show(bool): if True show the expiration plan of each run
+            stream(TextIO): the stream to write the plans to (default: sys.stdout)
+        """
+        if settle < 0:
+            raise Exception(f"{settle} settle is invalid - settle must be >=0")
+        self.expireBackups = expireBackups
+        self.withDelete = withDelete
+        self.settle = settle
+        self.show = show
+        self.stream = stream
+        self.scanner = expireBackups.getScanner()
+        expireBackups.filterKey = self.scanner.getFilterKey()
+        # the size and modification time of each backup file by path
+        self.files: Dict[str, Tuple[int, float]] = {}
+        # the watched directories by watch descriptor
+        self.dirs: Dict[int, str] = {}
+        self.inotify = None
+        self.pending = False
+        self.runs = 0
+
+    def start(self):
+        """
+        start watching my rootPath and build the model with an initial scan
+        """
+        self.inotify = Inotify()
+        self.scanDir(self.expireBackups.rootPath)
+        # the backups that arrived while no one was watching
+        self.pending = True
+
+    def close(self):
+        """
+        stop watching
+        """
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+        self.dirs = {}
+
+    def watchDir(self, path: str):
+        """
+        watch the given directory - called by the scanner before the directory is listed
+        so that no file arriving during the scan is missed
+
+        Args:
+            path(str): the path of the directory
+        """
+        try:
+            wd = self.inotify.addWatch(path, BackupWatcher.watchMask)
+        except OSError:
+            # the directory vanished
+            return
+        self.dirs[wd] = path
+
+    def scanDir(self, path: str) -> int:
+        """
+        watch and scan the given directory tree
+
+        Args:
+            path(str): the path of the directory
+
+        Returns:
+            int: the number of backup files that were new or changed
+        """
+        relDir = self.getRelDir(path)
+        if not self.scanner.acceptDir(relDir):
+            return 0
+        self.scanner.onDir = self.watchDir
+        changes = 0
+        for filePath, stats in self.scanner.walk(relDir):
+            entry = (stats.st_size, stats.st_mtime)
+            if self.files.get(filePath) != entry:
+                self.files[filePath] = entry
+                changes += 1
+        return changes
+
+    def getRelDir(self, path: str) -> str:
+        """
+        get the path of the given directory relative to my rootPath
+
+        Args:
+            path(str): the path of the directory
+
+        Returns:
+            str: the relative path - "" for the rootPath
+        """
+        relDir = os.path.relpath(path, self.expireBackups.rootPath)
+        return "" if relDir == os.curdir else relDir
+
+    def forgetDir(self, path: str):
+        """
+        forget the given directory tree that was moved away or deleted
+
+        Args:
+            path(str): the path of the directory
+        """
+        prefix = os.path.join(path, "")
+        for wd, dirPath in list(self.dirs.items()):
+            if dirPath == path or dirPath.startswith(prefix):
+                self.inotify.removeWatch(wd)
+                del self.dirs[wd]
+        for filePath in [filePath for filePath in self.files if filePath.startswith(prefix)]:
+            del self.files[filePath]
+
+    def handleEvent(self, wd: int, mask: int, name: str) -> bool:
+        """
+        update my model for the given event
+
+        Args:
+            wd(int): the watch descriptor
+            mask(int): the event mask
+            name(str): the name of the file or directory in the watched directory
+
+        Returns:
+            bool: True if a backup file arrived or changed
+        """
+        if mask & Inotify.IN_Q_OVERFLOW:
+            # events were lost - only a rescan can tell what happened
+            self.files = {}
+            self.scanDir(self.expireBackups.rootPath)
+            return True
+        if mask & Inotify.IN_IGNORED:
+            self.dirs.pop(wd, None)
+            return False
+        dirPath = self.dirs.get(wd)
+        if dirPath is None or not name:
+            return False
+        path = os.path.join(dirPath, name)
+        if mask & Inotify.IN_ISDIR:
+            if self.scanner.directories and self.scanner.isCandidate(name, self.getRelDir(dirPath)):
+                return self.handleDirectoryBackup(mask, path, name)
+            if mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                return self.scanDir(path) > 0
+            if mask & (Inotify.IN_MOVED_FROM | Inotify.IN_DELETE):
+                self.forgetDir(path)
+            return False
+        if not self.scanner.isCandidate(name, self.getRelDir(dirPath)):
+            return False
+        if mask & (Inotify.IN_DELETE | Inotify.IN_MOVED_FROM):
+            self.files.pop(path, None)
+            return False
+        if mask & Inotify.IN_CREATE:
+            # a written file is recorded when it is closed - a hard link e.g. by ln, cp -l or rsync --link-dest
+            # or a symbolic link arrives complete and only ever gets this event
+            try:
+                linkStats = os.lstat(path)
+            except OSError:
+                return False
+            if not stat.S_ISLNK(linkStats.st_mode) and linkStats.st_nlink < 2:
+                return False
+        try:
+            stats = os.stat(path)
+        except OSError:
+            self.files.pop(path, None)
+            return False
+        if stat.S_ISDIR(stats.st_mode):
+            return False
+        mtime = stats.st_mtime
+        if self.scanner.nameParser is not None:
+            nameTime = self.scanner.nameParser.parse(name)
+            if nameTime is not None:
+                mtime = nameTime
+        entry = (stats.st_size, mtime)
+        if self.files.get(path) == entry:
+            return False
+        self.files[path] = entry
+        return True
+
+    def handleDirectoryBackup(self, mask: int, path: str, name: str) -> bool:
+        """
+        update my model for an event of a matching directory which is a backup
+        and is not descended into like in the scan of the BackupScanner
+
+        Args:
+            mask(int): the event mask
+            path(str): the path of the directory
+            name(str): the name of the directory
+
+        Returns:
+            bool: True if a directory backup arrived or changed
+        """
+        if mask & (Inotify.IN_DELETE | Inotify.IN_MOVED_FROM):
+            self.files.pop(path, None)
+            return False
+        mtime = self.scanner.nameParser.parse(name) if self.scanner.nameParser is not None else None
+        if mtime is None:
+            try:
+                mtime = os.lstat(path).st_mtime
+            except OSError:
+                self.files.pop(path, None)
+                return False
+        # the size is computed when expiring
+        entry = (BackupFile.unknownSize, mtime)
+        if self.files.get(path) == entry:
+            return False
+        self.files[path] = entry
+        return True
+
+    def poll(self, timeout: float = None) -> bool:
+        """
+        wait for events and update my model
+
+        Args:
+            timeout(float): the seconds to wait for an event - None waits forever
+
+        Returns:
+            bool: True if there were any events
+        """
+        events = self.inotify.read(timeout)
+        for wd, mask, name in events:
+            if self.handleEvent(wd, mask, name):
+                self.pending = True
+        return len(events) > 0
+
+    def getBackupFiles(self) -> BackupFileTable:
+        """
+        get the backup files of my model
+
+        Returns:
+            BackupFileTable: the backup files
+        """
+        table = BackupFileTable()
+        for filePath, (size, mtime) in self.files.items():
+            table.append(filePath, size, mtime)
+        return table
+
+    def expire(self):
+        """
+        apply the expiration to the backup files of my model
+        """
+        self.pending = False
+        self.expireBackups.doexpire(
+            self.withDelete, show=self.show, stream=self.stream, backupFiles=self.getBackupFiles()
+        )
+        self.runs += 1
+        if self.withDelete:
+            # the deletions will also show up as events but the next run must not wait for them
+            for filePath, _size in self.expireBackups.summary.expired:
+                if not os.path.lexists(filePath):
+                    self.files.pop(filePath, None)
+
+    def step(self, timeout: float = None) -> bool:
+        """
+        wait for new backups and expire when the tree is quiet
+
+        Args:
+            timeout(float): the seconds to wait for an event - None waits forever
+
+        Returns:
+            bool: True if the expiration was applied
+        """
+        if not self.pending:
+            self.poll(timeout)
+        if not self.pending:
+            return False
+        while self.poll(self.settle):
+            pass
+        self.expire()
+        return True
+
+    def run(self, maxRuns: int = None):
+        """
+        watch and expire until interrupted
+
+        Args:
+            maxRuns(int): the number of expiration runs after which to stop (default: None - run forever)
+        """
+        self.start()
+        try:
+            while maxRuns is None or self.runs < maxRuns:
+                self.step()
+        finally:
+            self.close()
@@ -0,0 +1,133 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from expirebackups.apply import PlanApplier
+from expirebackups.expire import Expiration, ExpireBackups
+
+
+class InterruptedApplier(PlanApplier):
+    """
+    applier that is killed after the given number of chunks
+    """
+
+    def __init__(self, planPath: str, chunks: int, **kwargs):
+        super().__init__(planPath, **kwargs)
+        self.chunks = chunks
+
+    def applyChunk(self, chunk, done, deleter, journal):
+        if self.chunks == 0:
+            raise KeyboardInterrupt()
+        self.chunks -= 1
+        return super().applyChunk(chunk, done, deleter, journal)
+
+
+class TestApply(unittest.TestCase):
+    """
+    test saving a plan and applying it later
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsApply-")
+        self.rootPath = self.tmpDir.name
+        for ageInDays in range(1, 21):
+            filePath = os.path.join(self.rootPath, f"backup-{ageInDays:03d}.tgz")
+            with open(filePath, "w") as backupFile:
+                backupFile.write("x" * 100)
+            mtime = time.time() - ageInDays * 86400 - 3600
+            os.utime(filePath, (mtime, mtime))
+        self.planPath = os.path.join(self.rootPath, "plan.jsonl")
+        expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=0)
+        self.eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=expiration)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def savePlan(self):
+        with redirect_stdout(io.StringIO()):
+            self.eb.savePlan(self.planPath)
+
+    def getBackups(self) -> list:
+        return sorted(name for name in os.listdir(self.rootPath) if name.endswith(".tgz"))
+
+    def testApply(self):
+        """
+        test applying a plan with changed and missing files
+        """
+        self.savePlan()
+        with open(self.planPath) as planFile:
+            header = json.loads(planFile.readline())
+        self.assertEqual("header", header["type"])
+        self.assertEqual(20, header["count"])
+        self.assertFalse(os.path.exists(f"{self.planPath}.tmp"))
+        # the plan does not rescan - a file changed after planning is kept
+        with open(os.path.join(self.rootPath, "backup-010.tgz"), "a") as backupFile:
+            backupFile.write("changed")
+        os.remove(os.path.join(self.rootPath, "backup-011.tgz"))
+        result = PlanApplier(self.planPath).apply(withDelete=False)
+        self.assertEqual(15, result.deleted)
+        self.assertEqual(19, len(self.getBackups()))
+        self.assertFalse(os.path.exists(f"{self.planPath}{PlanApplier.journalSuffix}"))
+        result = PlanApplier(self.planPath, deleteWorkers=2).apply()
+        if self.debug:
+            print(result)
+        self.assertEqual(15, result.deleted)
+        self.assertEqual(1, result.missing)
+        self.assertEqual([os.path.join(self.rootPath, "backup-010.tgz")], result.changed)
+        self.assertEqual(["backup-001.tgz", "backup-002.tgz", "backup-003.tgz", "backup-010.tgz"], self.getBackups())
+        result = PlanApplier(self.planPath).apply()
+        self.assertEqual(17, result.resumed)
+        self.assertEqual(0, result.deleted)
+
+    def testSymlinks(self):
+        """
+        test that symbolic links to backups are verified with the file they point to like the scan does
+        """
+        with tempfile.TemporaryDirectory(prefix="expireBackupsApplyTarget-") as targetDir:
+            targetPath = os.path.join(targetDir, "backup-020.tgz")
+            linkPath = os.path.join(self.rootPath, "backup-020.tgz")
+            os.replace(linkPath, targetPath)
+            os.symlink(targetPath, linkPath)
+            self.savePlan()
+            result = PlanApplier(self.planPath).apply()
+            self.assertEqual([], result.changed)
+            self.assertEqual(17, result.deleted)
+            self.assertFalse(os.path.lexists(linkPath))
+            self.assertTrue(os.path.isfile(targetPath))
+
+    def testResume(self):
+        """
+        test resuming an interrupted apply from the journal
+        """
+        self.savePlan()
+        with self.assertRaises(KeyboardInterrupt):
+            InterruptedApplier(self.planPath, 2, chunkSize=5).apply()
+        self.assertEqual(10, len(self.getBackups()))
+        result = PlanApplier(self.planPath, chunkSize=5).apply()
+        self.assertEqual(10, result.resumed)
+        self.assertEqual(7, result.deleted)
+        self.assertEqual(0, result.missing)
+        self.assertEqual(3, len(self.getBackups()))
+        # a new plan starts a new journal
+        self.savePlan()
+        result = PlanApplier(self.planPath).apply()
+        self.assertEqual(0, result.resumed)
+        with open(self.planPath, "w") as planFile:
+            planFile.write("{}\n")
+        with self.assertRaises(Exception):
+            PlanApplier(self.planPath).apply()
+
+
+if __name__ == "__main__":
+    unittest.main()
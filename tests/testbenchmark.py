@@ -0,0 +1,57 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import tempfile
+import unittest
+
+from expirebackups.benchmark import BenchmarkSuite, TreeGenerator
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    test the benchmark suite and the synthetic tree generator
+    """
+
+    def setUp(self):
+        self.debug = False
+
+    def testTreeGenerator(self):
+        """
+        test generating a deep tree with sparse big files
+        """
+        generator = TreeGenerator(300, series=3, depth=2, filesPerDir=50, sizeDistribution="fixed:1000000")
+        with tempfile.TemporaryDirectory(prefix="expireBackupsTree-") as rootPath:
+            tree = generator.generate(rootPath)
+            files = []
+            for root, _dirs, names in os.walk(rootPath):
+                files.extend(os.path.join(root, name) for name in names)
+            self.assertEqual(300, len(files))
+            self.assertEqual(6, tree["dirs"])
+            stats = os.stat(files[0])
+            self.assertEqual(1000000, stats.st_size)
+            # sparse
+            self.assertLess(stats.st_blocks * 512, stats.st_size)
+
+    def testSuite(self):
+        """
+        test running the suite and comparing it with a baseline
+        """
+        generator = TreeGenerator(200, series=2, depth=1, filesPerDir=50, sizeDistribution="uniform:0:2000")
+        result = BenchmarkSuite(generator).run()
+        if self.debug:
+            print(result)
+        self.assertEqual(200, result["counts"]["files"])
+        self.assertEqual(200, result["counts"]["kept"] + result["counts"]["deleted"])
+        for phase in BenchmarkSuite.phases:
+            self.assertIn(phase, result["seconds"])
+        with tempfile.NamedTemporaryFile(suffix=".json") as baseline:
+            BenchmarkSuite.save(result, baseline.name)
+            self.assertEqual([], BenchmarkSuite.compare(result, baseline.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from expirebackups.dedup import DuplicateDetector, HashCache
+from expirebackups.expire import Expiration, ExpireBackups
+
+
+class TestDedup(unittest.TestCase):
+    """
+    test the detection of duplicate backups
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsDedup-")
+        self.rootPath = self.tmpDir.name
+        # an idle database gives the same dump on days 2-5 - day 6 has a different dump of the same size
+        contents = {1: "b" * 1000, 2: "a" * 1000, 3: "a" * 1000, 4: "a" * 1000, 5: "a" * 1000, 6: "c" * 1000}
+        contents[7] = "a" * 2000
+        self.filePaths = []
+        for ageInDays, content in contents.items():
+            filePath = os.path.join(self.rootPath, f"db-{ageInDays:03d}.sql")
+            with open(filePath, "w") as dumpFile:
+                dumpFile.write(content)
+            mtime = time.time() - ageInDays * 86400 - 3600
+            os.utime(filePath, (mtime, mtime))
+            self.filePaths.append(filePath)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testFindDuplicates(self):
+        """
+        test finding duplicates with and without the hash cache
+        """
+        sizes = [os.path.getsize(filePath) for filePath in self.filePaths]
+        mtimes = [os.path.getmtime(filePath) for filePath in self.filePaths]
+        for workers in [1, 4]:
+            detector = DuplicateDetector(workers=workers)
+            self.assertEqual([2, 3, 4], detector.findDuplicates(self.filePaths, sizes, mtimes))
+            self.assertEqual(6, detector.hashed)
+        cache = HashCache(self.rootPath)
+        for hashed, cached in [(6, 0), (0, 6)]:
+            self.assertTrue(cache.open())
+            detector = DuplicateDetector(cache=cache)
+            self.assertEqual([2, 3, 4], detector.findDuplicates(self.filePaths, sizes, mtimes))
+            cache.close()
+            self.assertEqual(hashed, detector.hashed)
+            self.assertEqual(cached, detector.cached)
+        with self.assertRaises(Exception):
+            DuplicateDetector(workers=0)
+
+    def testExpireDuplicates(self):
+        """
+        test that duplicates are expired before the rules are applied
+        """
+        expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=0)
+        for compact in [False, True]:
+            eb = ExpireBackups(self.rootPath, ext=".sql", expiration=expiration, compact=compact, dedup=True)
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                eb.doexpire(False)
+            if self.debug:
+                print(stdout.getvalue())
+            self.assertEqual(3, eb.metrics.counters["duplicates"])
+            self.assertEqual(7, eb.summary.count)
+            # day 1, the representative of days 2-5 and day 6 fill the three daily slots
+            self.assertEqual(3, eb.summary.kept)
+            self.assertIn("db-002.sql", stdout.getvalue())
+        eb = ExpireBackups(self.rootPath, ext=".sql", expiration=expiration, dedup=True, hashWorkers=2)
+        with redirect_stdout(io.StringIO()):
+            eb.doexpire(True)
+        self.assertEqual(0, eb.metrics.counters["filesHashed"])
+        names = sorted(name for name in os.listdir(self.rootPath) if name.endswith(".sql"))
+        self.assertEqual(["db-001.sql", "db-002.sql", "db-006.sql"], names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from expirebackups.delete import Deleter
+
+
+class TestDelete(unittest.TestCase):
+    """
+    test the parallel deletion stage
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsDelete-")
+        self.rootPath = self.tmpDir.name
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def createFiles(self) -> list:
+        """
+        create 20 files in each of three directories
+        """
+        files = []
+        for sub in ["a", "b", "c"]:
+            os.makedirs(os.path.join(self.rootPath, sub), exist_ok=True)
+            for i in range(20):
+                filePath = os.path.join(self.rootPath, sub, f"db-{i}.tgz")
+                with open(filePath, "w") as f:
+                    f.write("x" * i)
+                files.append((filePath, i))
+        # a file that is already gone and a directory that can not be unlinked
+        files.append((os.path.join(self.rootPath, "a", "gone.tgz"), 100))
+        os.makedirs(os.path.join(self.rootPath, "b", "dir.tgz"), exist_ok=True)
+        files.append((os.path.join(self.rootPath, "b", "dir.tgz"), 0))
+        return files
+
+    def testParallelDelete(self):
+        """
+        test deleting files in several directories with a pool of workers
+        """
+        for workers in [1, 4]:
+            files = self.createFiles()
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                result = Deleter(workers=workers).delete(files)
+            if self.debug:
+                print(result)
+            self.assertEqual(60, result.deleted)
+            self.assertEqual(3 * sum(range(20)), result.freed)
+            self.assertEqual(1, result.missing)
+            self.assertEqual(1, len(result.failures))
+            self.assertIn("dir.tgz", stderr.getvalue())
+            for sub in ["a", "b", "c"]:
+                self.assertEqual(["dir.tgz"] if sub == "b" else [], os.listdir(os.path.join(self.rootPath, sub)))
+
+
+if __name__ == "__main__":
+    unittest.main()
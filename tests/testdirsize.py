@@ -0,0 +1,110 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from expirebackups.delete import Deleter
+from expirebackups.dirsize import DirectorySizer, DirSizeCache
+from expirebackups.expire import Expiration, ExpireBackups
+
+
+class TestDirSize(unittest.TestCase):
+    """
+    test directories as backups
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsDirSize-")
+        self.rootPath = self.tmpDir.name
+        # rsnapshot style snapshots with a nested tree and a hardlink within each snapshot
+        for ageInDays in range(1, 11):
+            snapshot = os.path.join(self.rootPath, f"daily.{ageInDays:02d}")
+            os.makedirs(os.path.join(snapshot, "etc", "conf.d"))
+            with open(os.path.join(snapshot, "etc", "hosts"), "w") as file:
+                file.write("x" * 100)
+            with open(os.path.join(snapshot, "etc", "conf.d", "app.conf"), "w") as file:
+                file.write("y" * 1000)
+            os.link(os.path.join(snapshot, "etc", "conf.d", "app.conf"), os.path.join(snapshot, "app.conf"))
+            mtime = time.time() - ageInDays * 86400 - 3600
+            os.utime(snapshot, (mtime, mtime))
+        # a matching file is still a backup
+        with open(os.path.join(self.rootPath, "daily.tgz"), "w") as file:
+            file.write("z" * 10)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testSizer(self):
+        """
+        test computing the sizes with the cache
+        """
+        paths = [os.path.join(self.rootPath, f"daily.{ageInDays:02d}") for ageInDays in range(1, 11)]
+        paths.append(os.path.join(self.rootPath, "daily.tgz"))
+        expected = [1100] * 10 + [10]
+        cache = DirSizeCache(self.rootPath)
+        for workers, listed in [(4, 30), (1, 0)]:
+            sizer = DirectorySizer(workers=workers, cache=cache, debug=self.debug)
+            self.assertEqual(expected, sizer.getSizes(paths))
+            self.assertEqual(listed, sizer.listed)
+        with open(os.path.join(paths[0], "etc", "passwd"), "w") as file:
+            file.write("p" * 50)
+        sizer = DirectorySizer(cache=cache)
+        self.assertEqual(1150, sizer.getSizes(paths)[0])
+        self.assertEqual(1, sizer.listed)
+        with self.assertRaises(Exception):
+            DirectorySizer(workers=0)
+
+    def testDeleteTrees(self):
+        """
+        test deleting directory backups recursively
+        """
+        trees = [(os.path.join(self.rootPath, f"daily.{ageInDays:02d}"), 1100) for ageInDays in range(1, 6)]
+        trees.append((os.path.join(self.rootPath, "daily.99"), 0))
+        files = trees + [(os.path.join(self.rootPath, "daily.tgz"), 10)]
+        result = Deleter(workers=4, directories=True).delete(files)
+        self.assertEqual(6, result.deleted)
+        self.assertEqual(5510, result.freed)
+        self.assertEqual(1, result.missing)
+        self.assertEqual(0, len(result.failures))
+        self.assertEqual(5, len([name for name in os.listdir(self.rootPath) if name.startswith("daily.")]))
+
+    def testExpireDirectories(self):
+        """
+        test expiring directory backups
+        """
+        expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=0)
+        for compact in [False, True]:
+            eb = ExpireBackups(
+                self.rootPath, baseName="daily.", expiration=expiration, compact=compact, directories=True
+            )
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                eb.doexpire(False)
+            if self.debug:
+                print(stdout.getvalue())
+            self.assertEqual(11, eb.summary.count)
+            self.assertEqual(3, eb.summary.kept)
+            self.assertEqual(10 * 1100 + 10, eb.summary.total)
+        # the second run took the sizes from the cache
+        self.assertEqual(0, eb.metrics.counters["dirsSized"])
+        eb = ExpireBackups(
+            self.rootPath, baseName="daily.", expiration=expiration, dryRun=False, directories=True, deleteWorkers=2
+        )
+        with redirect_stdout(io.StringIO()):
+            eb.doexpire(True)
+        self.assertEqual(8, eb.deleteResult.deleted)
+        names = sorted(name for name in os.listdir(self.rootPath) if name.startswith("daily."))
+        self.assertEqual(["daily.01", "daily.02", "daily.tgz"], names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import random
+import time
+import unittest
+
+from expirebackups.engine import VectorizedRuleEngine
+from expirebackups.expire import BackupFileTable, Expiration
+
+
+class TestEngine(unittest.TestCase):
+    """
+    test the vectorized rule engine
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.now = time.time()
+
+    def createTable(self, numberOfFiles: int, seed: int) -> BackupFileTable:
+        """
+        create a table of synthetic backups with random gaps and sizes
+        """
+        rnd = random.Random(seed)
+        table = BackupFileTable()
+        mtime = self.now
+        for i in range(numberOfFiles):
+            mtime -= rnd.choice([0.2, 0.5, 1, 1, 1, 2, 3, 9]) * 86400
+            size = rnd.choice([0, 100, 1000, 1000])
+            table.append(f"/backup/db-{i}.tgz", size, mtime)
+        return table
+
+    def testSameMarks(self):
+        """
+        test that the vectorized engine marks the same files as the python engine
+        """
+        patterns = [(7, 6, 8, 4), (0, 6, 0, 2), (1, 0, 0, 0), (0, 0, 0, 0), (30, 10, 10, 10), (2, 1, 1, 1)]
+        for seed, (days, weeks, months, years) in enumerate(patterns):
+            for minFileSize in [0, 1]:
+                expiration = Expiration(days=days, weeks=weeks, months=months, years=years, minFileSize=minFileSize)
+                python = expiration.applyRules(self.createTable(800, seed), verbose=False)
+                engines = [VectorizedRuleEngine(expiration, useNumpy=False)]
+                if VectorizedRuleEngine(expiration).useNumpy:
+                    engines.append(VectorizedRuleEngine(expiration, useNumpy=True))
+                for engine in engines:
+                    vectorized = engine.apply(self.createTable(800, seed), now=python.now)
+                    self.assertEqual(python.filePaths, vectorized.filePaths)
+                    self.assertEqual(python.expires, vectorized.expires, f"{days},{weeks},{months},{years}")
+                    self.assertEqual(python.keptBy, vectorized.keptBy)
+
+    def testEngineSelection(self):
+        """
+        test selecting the engine via the Expiration
+        """
+        expiration = Expiration(engine="vectorized")
+        filesByAge = expiration.applyRules(self.createTable(100, 42), verbose=self.debug)
+        self.assertEqual(100, len(filesByAge))
+        with self.assertRaises(Exception):
+            Expiration(engine="turbo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,7 +10,7 @@ import unittest
 from contextlib import redirect_stderr
 
 import expirebackups.expire
-from expirebackups.expire import Expiration, ExpireBackups
+from expirebackups.expire import BackupFileTable, Expiration, ExpireBackups
 
 
 class TestExpireBackups(unittest.TestCase):
@@ -75,6 +75,30 @@ class TestExpireBackups(unittest.TestCase):
         showLimit = 38
         eb.doexpire(withDelete=True, showLimit=showLimit)
 
+    def testCompactTable(self):
+        """
+        test that the columnar BackupFileTable gets the same expiration marks as the list of BackupFiles
+        """
+        ext = ".ebc"
+        path, backupFiles = ExpireBackups.createTestFiles(60, ext=ext)
+        self.assertFalse(hasattr(backupFiles[0], "__dict__"))
+        table = BackupFileTable.fromBackupFiles(backupFiles)
+        expiration = Expiration(minFileSize=0)
+        filesByAge = expiration.applyRules(backupFiles, verbose=False)
+        tableByAge = expiration.applyRules(table, verbose=False)
+        self.assertEqual(len(filesByAge), len(tableByAge))
+        for backupFile, row in zip(filesByAge, tableByAge):
+            self.assertEqual(backupFile.filePath, row.filePath)
+            self.assertEqual(backupFile.expire, row.expire)
+            self.assertEqual(backupFile.ageInDays, row.ageInDays)
+        eb = ExpireBackups(rootPath=path, ext=ext, expiration=expiration, compact=True)
+        self.assertIsInstance(eb.getBackupFiles(), BackupFileTable)
+        eb.doexpire(withDelete=True, show=self.debug)
+        kept = [backupFile for backupFile in backupFiles if not backupFile.expire]
+        self.assertEqual(len(kept), len(eb.getBackupFiles()))
+        for backupFile in kept:
+            backupFile.delete()
+
     def testPatterns(self):
         """
         test different patterns for being valid
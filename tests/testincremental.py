@@ -0,0 +1,140 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from expirebackups.expire import BackupFileTable, Expiration, ExpireBackups
+from expirebackups.incremental import RulePlan
+
+
+class TestIncremental(unittest.TestCase):
+    """
+    test the incremental rule evaluation based on the plan of the previous run
+    """
+
+    def setUp(self):
+        self.debug = False
+
+    def getMarks(self, filesByAge) -> dict:
+        """
+        get the decisions for the given marked files by path
+        """
+        marks = {backupFile.filePath: (bool(backupFile.expire), backupFile.keptBy) for backupFile in filesByAge}
+        return marks
+
+    def testReapply(self):
+        """
+        test that reusing the previous plan gives the same decisions as a full evaluation
+        """
+        random.seed(1234)
+        expiration = Expiration(days=5, weeks=3, months=3, years=2, minFileSize=10)
+        key = RulePlan.getKey(expiration)
+        now = 1.8e9
+        files = {}
+        for i in range(400):
+            files[f"backup-{i:05d}"] = (now - (400 - i) * 86400 + random.randint(0, 7200), random.choice([5, 100]))
+        plan = None
+        reused = 0
+        reusedFiles = 0
+        fileCount = 0
+        for step in range(120):
+            # cron jitter of up to three hours
+            now += 86400 + random.randint(-10800, 10800)
+            for j in range(random.choice([0, 1, 1, 2])):
+                files[f"backup-new-{step:03d}-{j}"] = (now - random.randint(0, 3600), random.choice([5, 100, 200]))
+            tables = []
+            for _i in range(2):
+                table = BackupFileTable()
+                # youngest first so that files of the same age in days keep the order of the plan
+                for filePath, (mtime, size) in sorted(files.items(), key=lambda item: -item[1][0]):
+                    table.append(filePath, size, mtime)
+                tables.append(table)
+            full = expiration.applyRules(tables[0], verbose=False, now=now)
+            result = plan.reapply(expiration, key, tables[1], now) if plan is not None else None
+            if result is None:
+                plan = RulePlan.fromFiles(expiration, key, full, now)
+            else:
+                reused += 1
+                filesByAge, plan = result
+                reusedFiles += plan.reused
+                fileCount += len(filesByAge)
+                self.assertEqual(self.getMarks(full), self.getMarks(filesByAge))
+                self.assertEqual(list(full.filePaths), list(filesByAge.filePaths))
+            # every other day the expired files are deleted
+            if step % 2 == 0:
+                for row in full:
+                    if row.expire:
+                        del files[row.filePath]
+        if self.debug:
+            print(f"reused {reused} plans for {reusedFiles} of {fileCount} files")
+        self.assertGreater(reused, 100)
+        # a new file moves the anchors of the younger rules but the decisions of the older rules are taken over
+        self.assertGreater(reusedFiles, fileCount // 5)
+
+    def testChangedFileSet(self):
+        """
+        test that an unexpected change of the file set leads to a full evaluation
+        """
+        expiration = Expiration(days=3, weeks=2, months=1, years=1, minFileSize=0)
+        key = RulePlan.getKey(expiration)
+        now = 1.8e9
+        table = BackupFileTable()
+        for i in range(30):
+            table.append(f"b{i}", 100, now - i * 86400)
+        filesByAge = expiration.applyRules(table, verbose=False, now=now)
+        plan = RulePlan.fromFiles(expiration, key, filesByAge, now)
+        kept = [row.filePath for row in filesByAge if not row.expire]
+
+        def tableWithout(removed: str, touched: float = 0) -> BackupFileTable:
+            changed = BackupFileTable()
+            for i in range(30):
+                if f"b{i}" != removed:
+                    changed.append(f"b{i}", 100, now - i * 86400 + (touched if i == 3 else 0))
+            return changed
+
+        # a kept file vanished
+        self.assertIsNone(plan.reapply(expiration, key, tableWithout(kept[1]), now + 86400))
+        # a file was modified
+        self.assertIsNone(plan.reapply(expiration, key, tableWithout(None, touched=1), now + 86400))
+        # the rules changed
+        self.assertIsNone(plan.reapply(expiration, "other", tableWithout(None), now + 86400))
+        # nothing changed
+        self.assertIsNotNone(plan.reapply(expiration, key, tableWithout(None), now + 86400))
+
+    def testExpireBackupsIncremental(self):
+        """
+        test incremental runs with a saved plan in the rootPath
+        """
+        ext = ".ebi"
+        with tempfile.TemporaryDirectory(prefix="expireBackupsIncremental-") as rootPath:
+            for ageInDays in range(60):
+                filePath = ExpireBackups.createTestFile(ageInDays, baseName="backup", ext=ext)
+                os.replace(filePath, os.path.join(rootPath, os.path.basename(filePath)))
+            expiration = Expiration(minFileSize=0)
+            messages = []
+            for withDelete in [False, False, True, False]:
+                eb = ExpireBackups(rootPath, ext=ext, expiration=expiration, incremental=True)
+                stdout = io.StringIO()
+                with redirect_stdout(stdout):
+                    eb.doexpire(withDelete=withDelete)
+                messages.append(stdout.getvalue())
+                self.assertTrue(os.path.isfile(os.path.join(rootPath, RulePlan.planName)))
+            if self.debug:
+                print(messages)
+            self.assertNotIn("reusing the plan", messages[0])
+            self.assertIn("reusing the plan", messages[1])
+            self.assertIn("reusing the plan", messages[3])
+            self.assertEqual(eb.summary.kept, eb.summary.count)
+            self.assertEqual(len(os.listdir(rootPath)) - 1, eb.summary.count)
+
+
+if __name__ == "__main__":
+    unittest.main()
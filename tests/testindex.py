@@ -0,0 +1,126 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from expirebackups.expire import ExpireBackups
+from expirebackups.index import ScanIndex
+from expirebackups.scan import BackupScanner
+
+
+class TestIndex(unittest.TestCase):
+    """
+    test the persistent scan index
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsIndex-")
+        self.rootPath = self.tmpDir.name
+        self.past = int(time.time()) - 3600
+        for sub in ["a", "b"]:
+            os.makedirs(os.path.join(self.rootPath, sub))
+            for i in range(3):
+                self.createFile(os.path.join(self.rootPath, sub, f"db-{i}.tgz"))
+        self.ageDirs()
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def createFile(self, filePath: str):
+        with open(filePath, "w") as f:
+            f.write("backup")
+
+    def ageDirs(self):
+        """
+        make all directories and backup files an hour old so that the index trusts their mtime
+        """
+        for root, _dirs, files in os.walk(self.rootPath):
+            for name in files:
+                if name.endswith(".tgz"):
+                    os.utime(os.path.join(root, name), (self.past, self.past))
+            os.utime(root, (self.past, self.past))
+
+    def scan(self, reindex: bool = False, recheckSize: int = 0):
+        scanner = BackupScanner(self.rootPath, ext=".tgz")
+        scanner.recheckSize = recheckSize
+        index = ScanIndex(self.rootPath, scanner.getFilterKey(), debug=self.debug)
+        self.assertTrue(index.open(reindex=reindex))
+        scanner.index = index
+        backupFiles = scanner.scan()
+        index.close()
+        return scanner, index, backupFiles
+
+    def testIncrementalScan(self):
+        """
+        test that unchanged directories are taken from the index
+        """
+        scanner, index, backupFiles = self.scan()
+        self.assertEqual(6, len(backupFiles))
+        self.assertEqual(6, scanner.stats.statCalls)
+        self.assertEqual(0, index.hits)
+        # the index file itself changed the root directory
+        self.ageDirs()
+        scanner, index, backupFiles = self.scan()
+        self.assertEqual(6, len(backupFiles))
+        self.assertEqual(0, scanner.stats.statCalls)
+        # the root directory was still racy on the first run
+        self.assertEqual(2, index.hits)
+        self.assertEqual(36, sum(backupFile.size for backupFile in backupFiles))
+        # a new backup only relists its own directory
+        self.createFile(os.path.join(self.rootPath, "a", "db-3.tgz"))
+        scanner, index, backupFiles = self.scan()
+        self.assertEqual(7, len(backupFiles))
+        self.assertEqual(4, scanner.stats.statCalls)
+        self.assertEqual(1, index.misses)
+        scanner, index, backupFiles = self.scan(reindex=True)
+        self.assertEqual(7, scanner.stats.statCalls)
+
+    def testRacyFiles(self):
+        """
+        test that files which might still be written to are not taken from the index
+        """
+        dirPath = os.path.join(self.rootPath, "a")
+        filePath = os.path.join(dirPath, "db-0.tgz")
+        self.scan()
+        self.ageDirs()
+        # a backup that was created a minute ago and is still being written when the index is recorded
+        os.utime(dirPath, (self.past + 60, self.past + 60))
+        os.utime(filePath)
+        self.scan()
+        os.utime(filePath, (self.past + 60, self.past + 60))
+        scanner, index, _backupFiles = self.scan()
+        self.assertEqual(1, index.misses)
+        self.assertEqual(3, scanner.stats.statCalls)
+        # a small backup rewritten in place does not change the mtime of its directory
+        with open(filePath, "w") as f:
+            f.write("complete backup")
+        os.utime(filePath, (self.past + 120, self.past + 120))
+        _scanner, _index, backupFiles = self.scan()
+        self.assertEqual([6] * 6, [backupFile.size for backupFile in backupFiles])
+        _scanner, _index, backupFiles = self.scan(recheckSize=10)
+        self.assertEqual(15, max(backupFile.size for backupFile in backupFiles))
+        # only the recorded small files are stat'ed again
+        scanner, _index, backupFiles = self.scan(recheckSize=10)
+        self.assertEqual(6, len(backupFiles))
+        self.assertEqual(5, scanner.stats.statCalls)
+
+    def testExpireBackupsWithIndex(self):
+        """
+        test using the index transparently via ExpireBackups
+        """
+        eb = ExpireBackups(rootPath=self.rootPath, ext=".tgz", useIndex=True)
+        for _run in range(2):
+            backupFiles = eb.getBackupFiles()
+            self.assertEqual(6, len(backupFiles))
+        self.assertTrue(os.path.isfile(os.path.join(self.rootPath, ScanIndex.indexName)))
+
+
+if __name__ == "__main__":
+    unittest.main()
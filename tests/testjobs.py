@@ -0,0 +1,146 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from expirebackups.expire import main
+from expirebackups.jobs import BackupJob, JobRunner
+
+
+class TestJobs(unittest.TestCase):
+    """
+    test running the jobs of a job file
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsJobs-")
+        self.rootPath = self.tmpDir.name
+        self.roots = {}
+        for rootName, baseNames in [("db", ["db1", "db2"]), ("web", ["web"])]:
+            root = os.path.join(self.rootPath, rootName)
+            os.makedirs(root)
+            self.roots[rootName] = root
+            for baseName in baseNames:
+                for ageInDays in range(1, 11):
+                    filePath = os.path.join(root, f"{baseName}-{ageInDays:03d}.tgz")
+                    with open(filePath, "w") as backupFile:
+                        backupFile.write("x" * 100)
+                    mtime = time.time() - ageInDays * 86400 - 3600
+                    os.utime(filePath, (mtime, mtime))
+        self.configPath = os.path.join(self.rootPath, "jobs.toml")
+        with open(self.configPath, "w") as configFile:
+            configFile.write(f"""workers = 2
+
+[defaults]
+ext = ".tgz"
+days = 3
+weeks = 0
+months = 0
+years = 0
+minFileSize = 0
+
+[jobs.db1]
+rootPath = "{self.roots['db']}"
+baseName = "db1"
+
+[jobs.db2]
+rootPath = "{self.roots['db']}"
+baseName = "db2"
+days = 5
+compact = true
+
+[jobs.web]
+rootPath = "{self.roots['web']}"
+""")
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testRunner(self):
+        """
+        test running the jobs with a shared listing per root
+        """
+        runner = JobRunner.load(self.configPath)
+        self.assertEqual(2, runner.workers)
+        self.assertEqual(["db1", "db2", "web"], [job.name for job in runner.jobs])
+        self.assertEqual(2, len(runner.getGroups()))
+        stream = io.StringIO()
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.assertEqual(0, runner.run(stream))
+        if self.debug:
+            print(stream.getvalue())
+        # the plans and rule messages of the jobs only go to the given stream
+        self.assertEqual("", stdout.getvalue())
+        self.assertIn("job db2 in", stream.getvalue())
+        self.assertIn("keeping 5 files for dayly backup", stream.getvalue())
+        # only the root with two jobs is listed for sharing
+        self.assertEqual(1, runner.listings)
+        # the shared listing only holds the files of the jobs
+        with open(os.path.join(self.roots["db"], "README.txt"), "w") as readme:
+            readme.write("not a backup")
+        listing = runner.listFiles(runner.getGroups()[0])
+        self.assertEqual(20, len(listing))
+        os.remove(os.path.join(self.roots["db"], "README.txt"))
+        self.assertEqual([10, 10, 10], [result.count for result in runner.results])
+        self.assertEqual([3, 5, 3], [result.kept for result in runner.results])
+        self.assertIn("3 jobs 0 failed: 30 files 11 kept 19 expired", stream.getvalue())
+        self.assertEqual(30, len(os.listdir(self.roots["db"])) + len(os.listdir(self.roots["web"])))
+        runner = JobRunner.load(self.configPath, withDelete=True, workers=1)
+        with open(os.devnull, "w") as devNull:
+            self.assertEqual(0, runner.run(devNull))
+        self.assertEqual(19, sum(result.deleted for result in runner.results))
+        self.assertEqual(8, len(os.listdir(self.roots["db"])))
+
+    def testInvalid(self):
+        """
+        test invalid job files
+        """
+        with self.assertRaises(Exception):
+            BackupJob("db", {"rootPath": self.rootPath, "dayz": 3})
+        with self.assertRaises(Exception):
+            BackupJob("db", {"ext": ".tgz"})
+        with self.assertRaises(Exception):
+            JobRunner.load(os.path.join(self.rootPath, "jobs.ini"))
+        with self.assertRaises(Exception):
+            JobRunner([], workers=0)
+
+    def testFailingJob(self):
+        """
+        test that a failing job does not stop the other jobs and gives the exit code
+        """
+        runner = JobRunner.load(self.configPath)
+        runner.jobs[0].expireBackups.deleteWorkers = 0
+        runner.withDelete = True
+        with open(os.devnull, "w") as devNull:
+            self.assertEqual(2, runner.run(devNull))
+        self.assertIsNotNone(runner.results[0].error)
+        self.assertEqual(5, runner.results[1].deleted)
+
+    def testMain(self):
+        """
+        test the config command line option
+        """
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            exitCode = main(["expireBackups", "--config", self.configPath, "--jobWorkers", "1"])
+        self.assertIn("job web in", stdout.getvalue())
+        self.assertEqual(0, exitCode)
+        # options of a single run are not silently ignored
+        with redirect_stderr(io.StringIO()) as stderr:
+            exitCode = main(["expireBackups", "--config", self.configPath, "--stats", "--watch"])
+        self.assertEqual(2, exitCode)
+        self.assertIn("--stats, --watch can not be combined with --config", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
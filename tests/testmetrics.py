@@ -0,0 +1,67 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+import expirebackups.expire
+from expirebackups.expire import ExpireBackups
+from expirebackups.metrics import RunMetrics
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    test the instrumentation of expiration runs
+    """
+
+    def setUp(self):
+        self.debug = False
+
+    def testRunMetrics(self):
+        """
+        test the counters and the Prometheus textfile output of a run
+        """
+        ext = ".ebm"
+        path, backupFiles = ExpireBackups.createTestFiles(20, ext=ext)
+        with tempfile.TemporaryDirectory(prefix="expireBackupsMetrics-") as promDir:
+            promPath = os.path.join(promDir, "expirebackups.prom")
+            args = ["expireBackups", "--rootPath", str(path), "--ext", ext, "--minFileSize", "0"]
+            args.extend(["-f", "--stats", "--prometheus", promPath])
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                exitCode = expirebackups.expire.main(args)
+            self.assertIsNone(exitCode)
+            stats = stderr.getvalue()
+            if self.debug:
+                print(stats)
+            self.assertIn("filesScanned  : 20", stats)
+            with open(promPath) as promFile:
+                prom = promFile.read()
+            if self.debug:
+                print(prom)
+        for backupFile in backupFiles:
+            backupFile.delete()
+        self.assertIn(f'expirebackups_phase_seconds{{root="{path}",phase="scan"}}', prom)
+        self.assertIn(f'expirebackups_files_scanned{{root="{path}"}} 20', prom)
+        # 7 dayly and 1 weekly file of the 20 days are kept
+        self.assertIn(f'expirebackups_files_marked{{root="{path}"}} 12', prom)
+        self.assertIn(f'expirebackups_files_deleted{{root="{path}"}} 12', prom)
+        self.assertIn(f'expirebackups_delete_failures{{root="{path}"}} 0', prom)
+
+    def testEscape(self):
+        """
+        test escaping label values
+        """
+        self.assertEqual('a\\\\b\\"c', RunMetrics.escape('a\\b"c'))
+        self.assertEqual("bytes_freed", RunMetrics.snakeCase("bytesFreed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import io
+import itertools
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from expirebackups.expire import BackupFile, BackupFileTable, Expiration, ExpireBackups
+from expirebackups.index import IndexedStats
+from expirebackups.nametime import NameTimeParser
+from expirebackups.plan import PlanSummary, PlanWriter
+from expirebackups.scan import BackupScanner
+from expirebackups.series import SeriesExpiration, SeriesPartitioner
+
+
+class TestNameTime(unittest.TestCase):
+    """
+    test taking the backup time from the file names
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsNameTime-")
+        self.rootPath = self.tmpDir.name
+        today = datetime.datetime.now().replace(hour=3, minute=0, second=0, microsecond=0)
+        for ageInDays in range(1, 11):
+            dateTime = today - datetime.timedelta(days=ageInDays)
+            filePath = os.path.join(self.rootPath, f"db-{dateTime.strftime('%Y-%m-%d_%H%M')}.tgz")
+            with open(filePath, "w") as backupFile:
+                backupFile.write("x" * ageInDays)
+        # the modification times are all "now" e.g. after a copy
+        with open(os.path.join(self.rootPath, "db-latest.tgz"), "w") as backupFile:
+            backupFile.write("x")
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testParse(self):
+        """
+        test parsing times from names
+        """
+        expected = datetime.datetime(2026, 10, 17, 3, 15).timestamp()
+        parser = NameTimeParser("%Y-%m-%d_%H%M")
+        self.assertEqual(expected, parser.parse("db-2026-10-17_0315.tgz"))
+        self.assertIsNone(parser.parse("db-latest.tgz"))
+        self.assertIsNone(parser.parse("db-2026-13-17_0315.tgz"))
+        parser = NameTimeParser(r"re:(?P<year>\d{4})(?P<month>\d\d)(?P<day>\d\d)T(?P<hour>\d\d)(?P<minute>\d\d)")
+        self.assertEqual(expected, parser.parse("db-20261017T0315.tgz"))
+        self.assertEqual(datetime.datetime(2026, 2, 1).timestamp(), NameTimeParser("%y.%j").parse("26.032"))
+        for invalid in ["%m-%d", "%Y-%b"]:
+            with self.assertRaises(Exception):
+                NameTimeParser(invalid)
+
+    def testScanWithoutStat(self):
+        """
+        test that files with a time in their name are scanned without a stat call
+        """
+        scanner = BackupScanner(self.rootPath, ext=".tgz", nameParser=NameTimeParser("%Y-%m-%d_%H%M"))
+        table = scanner.scanTable()
+        if self.debug:
+            print(scanner.stats)
+        self.assertEqual(11, len(table))
+        # only db-latest.tgz needs a stat
+        self.assertEqual(1, scanner.stats.statCalls)
+        self.assertTrue(table.lazySizes)
+        row = table.filePaths.index(os.path.join(self.rootPath, "db-latest.tgz"))
+        self.assertEqual(1, table.getSize(row))
+        self.assertEqual(55 + 1, sum(table.sizes))
+        self.assertFalse(table.lazySizes)
+        backupFile = BackupFile(table.filePaths[0], IndexedStats(BackupFile.unknownSize, table.mtimes[0]))
+        self.assertGreater(backupFile.size, 0)
+        self.assertNotEqual(scanner.getFilterKey(), BackupScanner(self.rootPath, ext=".tgz").getFilterKey())
+        lazy = BackupFileTable()
+        lazy.append(os.path.join(self.rootPath, "missing.tgz"), BackupFile.unknownSize, time.time())
+        self.assertEqual(0, lazy.getSize(0))
+
+    def testExpire(self):
+        """
+        test expiring by the times in the names
+        """
+        expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=0)
+        for compact in [False, True]:
+            eb = ExpireBackups(
+                self.rootPath, ext=".tgz", expiration=expiration, compact=compact, nameTime="%Y-%m-%d_%H%M"
+            )
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                eb.doexpire(False)
+            if self.debug:
+                print(stdout.getvalue())
+            self.assertEqual(11, eb.summary.count)
+            self.assertEqual(3, eb.summary.kept)
+        eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=expiration, nameTime="%Y-%m-%d_%H%M", dryRun=False)
+        with redirect_stdout(io.StringIO()):
+            eb.doexpire(True)
+        names = sorted(os.listdir(self.rootPath))
+        self.assertEqual(3, len(names))
+        self.assertIn("db-latest.tgz", names)
+
+    def testLazySizes(self):
+        """
+        test that the rules only look up unknown sizes for a minFileSize and that stat errors are not sizes
+        """
+        scanner = BackupScanner(self.rootPath, ext=".tgz", nameParser=NameTimeParser("%Y-%m-%d_%H%M"))
+        for engine in ["python", "vectorized"]:
+            expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=0, engine=engine)
+            table = expiration.applyRules(scanner.scanTable(), verbose=False)
+            self.assertEqual(10, len(table.getLazyRows()))
+            backupFiles = expiration.applyRules(scanner.scan(), verbose=False)
+            self.assertEqual(10, sum(1 for backupFile in backupFiles if not backupFile.sizeKnown))
+        # a file that exists but can not be stat'ed must not look empty
+        notADir = os.path.join(self.rootPath, "db-latest.tgz", "db-2026-10-17_0315.tgz")
+        with self.assertRaises(OSError):
+            BackupFile.statSize(notADir)
+
+    def testSeriesWithoutStat(self):
+        """
+        test that expiring series by the times in the names only looks up the sizes of the files to expire
+        """
+        partitioner = SeriesPartitioner(["auto"])
+        nameParser = NameTimeParser("%Y-%m-%d_%H%M")
+        scanner = BackupScanner(self.rootPath, ext=".tgz", matcher=partitioner, nameParser=nameParser)
+        table = scanner.scanTable()
+        # db-latest.tgz is not part of a series and no file needs a stat
+        self.assertEqual(10, len(table))
+        self.assertEqual(0, scanner.stats.statCalls)
+        seriesTables = partitioner.partition(table)
+        self.assertEqual(10, sum(len(seriesTable.getLazyRows()) for seriesTable in seriesTables.values()))
+        expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=0)
+        results = SeriesExpiration(expiration).apply(seriesTables)
+        self.assertEqual(10, sum(len(seriesTable.getLazyRows()) for _name, seriesTable in results))
+        summary = PlanSummary()
+        filesByAge = itertools.chain.from_iterable(seriesTable for _name, seriesTable in results)
+        for _record in summary.tally(PlanWriter.records(filesByAge, keptSizes=False)):
+            pass
+        # the 3 kept backups of the db series are still not stat'ed
+        self.assertEqual(3, sum(len(seriesTable.getLazyRows()) for _name, seriesTable in results))
+        self.assertEqual(3, summary.kept)
+        self.assertEqual(sum(range(4, 11)), summary.total - summary.keptTotal)
+        eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=expiration, series=["auto"], nameTime="%Y-%m-%d_%H%M")
+        eb.doexpire(False, show=False)
+        self.assertEqual(0, eb.scanStats.statCalls)
+        self.assertEqual(10, eb.summary.count)
+        self.assertEqual(sum(range(4, 11)), eb.metrics.counters["bytesMarked"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import tempfile
+import unittest
+
+from expirebackups.pathfilter import PathFilter
+from expirebackups.scan import BackupScanner
+
+
+class TestPathFilter(unittest.TestCase):
+    """
+    test the include and exclude patterns and the pruning of directories
+    """
+
+    def setUp(self):
+        self.debug = False
+
+    def testPatterns(self):
+        """
+        test matching globs and regular expressions against relative paths
+        """
+        pathFilter = PathFilter(
+            includes=["*.tgz", "db/**/*.sql.gz", r"re:\d{8}\.dump$"], excludes=["*.partial.tgz", "tmp/"]
+        )
+        for relPath, expected in [
+            ("a.tgz", True),
+            ("x/y/a.tgz", True),
+            ("a.partial.tgz", False),
+            ("x/a.partial.tgz", False),
+            ("a.zip", False),
+            ("db/2026/full.sql.gz", True),
+            ("other/db/full.sql.gz", False),
+            ("x/20261017.dump", True),
+        ]:
+            self.assertEqual(expected, pathFilter.acceptFile(relPath), relPath)
+        # a trailing slash restricts the pattern to directories
+        self.assertTrue(PathFilter(excludes=["tmp/"]).acceptFile("tmp"))
+        self.assertFalse(PathFilter(includes=["*.tgz"]).acceptFile("dir.tgz/a"))
+        for relDir, expected in [("", True), ("tmp", False), ("x/tmp", False), ("tmpx", True), ("db", True)]:
+            self.assertEqual(expected, pathFilter.acceptDir(relDir), relDir)
+        depthFilter = PathFilter(maxDepth=1)
+        self.assertTrue(depthFilter.acceptDir("a"))
+        self.assertFalse(depthFilter.acceptDir(os.path.join("a", "b")))
+        with self.assertRaises(Exception):
+            PathFilter(maxDepth=-1)
+
+    def testPrune(self):
+        """
+        test that excluded directories are not listed at all
+        """
+        with tempfile.TemporaryDirectory(prefix="expireBackupsFilter-") as rootPath:
+            for relDir in ["", "a", os.path.join("a", "b"), ".snapshot", os.path.join(".snapshot", "hourly")]:
+                dirPath = os.path.join(rootPath, relDir)
+                os.makedirs(dirPath, exist_ok=True)
+                for name in ["db-1.tgz", "db-2.tgz", "other.txt"]:
+                    with open(os.path.join(dirPath, name), "w") as f:
+                        f.write("x" * 10)
+            scanner = BackupScanner(rootPath, pathFilter=PathFilter(includes=["db-*"], excludes=[".snapshot/"]))
+            backupFiles = scanner.scan()
+            if self.debug:
+                print(scanner.stats)
+            self.assertEqual(6, len(backupFiles))
+            self.assertEqual(3, scanner.stats.dirs)
+            scanner = BackupScanner(rootPath, ext=".tgz", pathFilter=PathFilter(excludes=[".snapshot"], maxDepth=1))
+            self.assertEqual(4, len(scanner.scan()))
+            self.assertEqual(2, scanner.stats.dirs)
+            self.assertNotEqual(BackupScanner(rootPath, ext=".tgz").getFilterKey(), scanner.getFilterKey())
+
+
+if __name__ == "__main__":
+    unittest.main()
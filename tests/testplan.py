@@ -0,0 +1,67 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import csv
+import io
+import json
+import unittest
+
+from expirebackups.expire import Expiration, ExpireBackups
+
+
+class TestPlan(unittest.TestCase):
+    """
+    test the machine readable expiration plan output
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.ext = ".ebp"
+        self.path, self.backupFiles = ExpireBackups.createTestFiles(40, ext=self.ext)
+
+    def tearDown(self):
+        for backupFile in self.backupFiles:
+            backupFile.delete()
+
+    def getPlan(self, outputFormat: str) -> str:
+        """
+        get the expiration plan in the given format
+        """
+        eb = ExpireBackups(
+            rootPath=self.path, ext=self.ext, expiration=Expiration(minFileSize=0), outputFormat=outputFormat
+        )
+        stream = io.StringIO()
+        eb.doexpire(stream=stream)
+        plan = stream.getvalue()
+        if self.debug:
+            print(plan)
+        return plan
+
+    def testJsonLines(self):
+        """
+        test the JSON Lines plan
+        """
+        records = [json.loads(line) for line in self.getPlan("jsonl").splitlines()]
+        self.assertEqual(40, len(records))
+        kept = [record for record in records if record["action"] == "keep"]
+        self.assertEqual(7 + 4, len(kept))
+        self.assertEqual({"dayly", "weekly"}, {record["keptBy"] for record in kept})
+        ages = [record["ageInDays"] for record in records]
+        self.assertEqual(sorted(ages), ages)
+        self.assertEqual(sum(record["size"] for record in records), records[-1]["total"])
+
+    def testCsv(self):
+        """
+        test the CSV plan
+        """
+        rows = list(csv.DictReader(io.StringIO(self.getPlan("csv"))))
+        self.assertEqual(40, len(rows))
+        self.assertEqual("1", rows[0]["index"])
+        self.assertEqual("keep", rows[0]["action"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import fcntl
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from expirebackups.expire import Expiration, ExpireBackups, main
+from expirebackups.quarantine import Purger, Quarantine
+from expirebackups.scan import BackupScanner
+
+
+class RecordingPurger(Purger):
+    """
+    purger that records the throttling waits instead of sleeping
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slept = 0.0
+        self.truncates = 0
+
+    def sleep(self, seconds: float):
+        self.slept += seconds
+        # pretend the time has passed
+        self.startTime -= seconds
+
+    def throttle(self, size: int):
+        self.truncates += 1
+        super().throttle(size)
+
+
+class TestQuarantine(unittest.TestCase):
+    """
+    test quarantining expired backups and purging the quarantine
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsQuarantine-")
+        self.rootPath = self.tmpDir.name
+        self.quarantinePath = os.path.join(self.rootPath, "trash")
+        for ageInDays in range(1, 11):
+            filePath = os.path.join(self.rootPath, f"dump-{ageInDays:03d}.sql")
+            with open(filePath, "w") as backupFile:
+                backupFile.write("x" * 1000)
+            mtime = time.time() - ageInDays * 86400 - 3600
+            os.utime(filePath, (mtime, mtime))
+        self.expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=0)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testQuarantine(self):
+        """
+        test renaming expired backups into the quarantine
+        """
+        eb = ExpireBackups(
+            self.rootPath, ext=".sql", expiration=self.expiration, dryRun=False, quarantine=self.quarantinePath
+        )
+        with redirect_stdout(io.StringIO()):
+            eb.doexpire(True)
+        self.assertEqual(7, eb.deleteResult.deleted)
+        names = os.listdir(self.quarantinePath)
+        self.assertEqual(7, len(names))
+        self.assertTrue(all(name.startswith(BackupScanner.statePrefix) for name in names))
+        # the quarantined files are not backups any more
+        eb = ExpireBackups(self.rootPath, ext=".sql", expiration=self.expiration)
+        with redirect_stdout(io.StringIO()):
+            eb.doexpire(False)
+        self.assertEqual(3, eb.summary.count)
+        result = Quarantine(self.quarantinePath).delete([(os.path.join(self.rootPath, "gone.sql"), 0)])
+        self.assertEqual(1, result.missing)
+
+    def testPurge(self):
+        """
+        test the throttled purge with chunked truncation
+        """
+        quarantine = Quarantine(self.quarantinePath)
+        quarantine.open(self.rootPath)
+        files = [(os.path.join(self.rootPath, f"dump-{ageInDays:03d}.sql"), 1000) for ageInDays in range(4, 11)]
+        # a hard link must not be truncated
+        os.link(files[0][0], os.path.join(self.rootPath, "linked.sql"))
+        self.assertEqual(7, quarantine.delete(files).deleted)
+        tree = os.path.join(self.rootPath, "snapshot", "etc")
+        os.makedirs(tree)
+        with open(os.path.join(tree, "hosts"), "w") as file:
+            file.write("y" * 1000)
+        quarantine.delete([(os.path.dirname(tree), 1000)])
+        purger = RecordingPurger(self.quarantinePath, rate=2000, chunkSize=300)
+        # a purge that is already running is not disturbed
+        lockFd = os.open(os.path.join(self.quarantinePath, Purger.lockName), os.O_RDWR | os.O_CREAT)
+        fcntl.flock(lockFd, fcntl.LOCK_EX)
+        self.assertEqual(0, purger.purge().deleted)
+        os.close(lockFd)
+        result = purger.purge()
+        if self.debug:
+            print(result, purger.slept)
+        self.assertEqual(8, result.deleted)
+        self.assertEqual(7000, result.freed)
+        self.assertEqual([Purger.lockName], os.listdir(self.quarantinePath))
+        # 7000 bytes at 2000 bytes per second
+        self.assertAlmostEqual(3.5, purger.slept, delta=0.5)
+        # 7 truncated files of 4 steps and an unlinked hard link
+        self.assertEqual(7 * 4 + 1, purger.truncates)
+        with open(os.path.join(self.rootPath, "linked.sql")) as linked:
+            self.assertEqual(1000, len(linked.read()))
+        with self.assertRaises(Exception):
+            Purger(self.quarantinePath, chunkSize=0)
+
+    def testPurgeOnlyQuarantined(self):
+        """
+        test that a purge only destroys the quarantined backups and never the backups of the root
+        """
+        quarantine = Quarantine(self.quarantinePath)
+        quarantine.open(self.rootPath)
+        quarantine.delete([(os.path.join(self.rootPath, "dump-010.sql"), 1000)])
+        livePath = os.path.join(self.quarantinePath, "live.sql")
+        with open(livePath, "w") as liveFile:
+            liveFile.write("z" * 1000)
+        result = Purger(self.quarantinePath).purge()
+        self.assertEqual(1, result.deleted)
+        self.assertEqual(sorted([Purger.lockName, "live.sql"]), sorted(os.listdir(self.quarantinePath)))
+        # the root itself or a directory containing it is no quarantine
+        for quarantinePath in [self.rootPath, os.path.dirname(self.rootPath)]:
+            with self.assertRaises(Exception):
+                Quarantine(quarantinePath).open(self.rootPath)
+            args = ["expireBackups", "--purge", "--quarantine", quarantinePath, "--rootPath", self.rootPath]
+            with redirect_stderr(io.StringIO()):
+                self.assertEqual(2, main(args))
+        self.assertEqual(9, len([name for name in os.listdir(self.rootPath) if name.endswith(".sql")]))
+
+    def testBackgroundPurge(self):
+        """
+        test purging in a background process
+        """
+        eb = ExpireBackups(
+            self.rootPath, ext=".sql", expiration=self.expiration, quarantine=self.quarantinePath, purgeRate="1MB"
+        )
+        with redirect_stdout(io.StringIO()):
+            eb.doexpire(True)
+        process = Purger.spawn(self.quarantinePath, eb.purgeRate)
+        self.assertEqual(0, process.wait(timeout=60))
+        self.assertEqual([Purger.lockName], os.listdir(self.quarantinePath))
+
+
+if __name__ == "__main__":
+    unittest.main()
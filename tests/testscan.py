@@ -0,0 +1,62 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import tempfile
+import unittest
+
+from expirebackups.scan import BackupScanner
+
+
+class TestScan(unittest.TestCase):
+    """
+    test the scandir based backup scanner
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsScan-")
+        self.rootPath = self.tmpDir.name
+        for sub in ["", "a", os.path.join("a", "b")]:
+            dirPath = os.path.join(self.rootPath, sub)
+            os.makedirs(dirPath, exist_ok=True)
+            for name in ["db-1.tgz", "db-2.tgz", "other.txt"]:
+                with open(os.path.join(dirPath, name), "w") as f:
+                    f.write("x" * 10)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testScan(self):
+        """
+        test that the scanner finds nested files and stats each match only once
+        """
+        scanner = BackupScanner(self.rootPath, ext=".tgz")
+        backupFiles = scanner.scan()
+        if self.debug:
+            print(scanner.stats)
+        self.assertEqual(6, len(backupFiles))
+        self.assertEqual(3, scanner.stats.dirs)
+        self.assertEqual(6, scanner.stats.statCalls)
+        for backupFile in backupFiles:
+            self.assertEqual(10, backupFile.size)
+            self.assertTrue(backupFile.filePath.startswith(self.rootPath))
+            self.assertTrue(os.path.isfile(backupFile.filePath))
+
+    def testScanWithoutFd(self):
+        """
+        test the path based fallback for platforms without directory file descriptors
+        """
+        scanner = BackupScanner(self.rootPath, baseName="db-")
+        scanner.useFd = False
+        filePaths = sorted(backupFile.filePath for backupFile in scanner.scan())
+        fdPaths = sorted(backupFile.filePath for backupFile in BackupScanner(self.rootPath, baseName="db-").scan())
+        self.assertEqual(fdPaths, filePaths)
+        self.assertEqual(6, len(filePaths))
+
+
+if __name__ == "__main__":
+    unittest.main()
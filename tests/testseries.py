@@ -0,0 +1,93 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from expirebackups.expire import Expiration, ExpireBackups
+from expirebackups.scan import BackupScanner
+from expirebackups.series import SeriesPartitioner
+
+
+class TestSeries(unittest.TestCase):
+    """
+    test expiring several backup series in a single walk
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsSeries-")
+        self.rootPath = self.tmpDir.name
+        now = time.time()
+        for prefix, ext in [("db1", ".tgz"), ("db2", ".tgz"), ("wiki", ".sql.gz")]:
+            for age in range(30):
+                mtime = now - (age + 0.5) * 86400
+                isoDate = datetime.datetime.fromtimestamp(mtime).strftime("%Y-%m-%d_%H%M")
+                filePath = os.path.join(self.rootPath, f"{prefix}-{isoDate}{ext}")
+                with open(filePath, "w") as f:
+                    f.write("backup")
+                os.utime(filePath, (mtime, mtime))
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testDetectSeries(self):
+        """
+        test deriving the series from file names
+        """
+        partitioner = SeriesPartitioner(["db1-*.tgz", "auto"])
+        for name, expected in [
+            ("db1-2026-10-17_0300.tgz", "db1-*.tgz"),
+            ("db2-2026-10-17_0300.tgz", "db2-*.tgz"),
+            ("wiki-20261017.sql.gz", "wiki-*.sql.gz"),
+            ("expireBackupTest-10daysOld-x8f.tst", "expireBackupTest-*.tst"),
+            # names without a timestamp or number do not belong to a series
+            ("README", None),
+            ("db-latest.tgz", None),
+        ]:
+            self.assertEqual(expected, partitioner.getSeries(name), name)
+        self.assertIsNone(SeriesPartitioner(["db1-*.tgz"]).getSeries("db2-2026.tgz"))
+
+    def testBaseNameAndExt(self):
+        """
+        test that --ext no longer overrides --baseName
+        """
+        scanner = BackupScanner(self.rootPath, baseName="db1", ext=".tgz")
+        self.assertEqual(30, len(scanner.scan()))
+
+    def testMultiSeries(self):
+        """
+        test expiring all series in a single walk
+        """
+        for series, workers in [(["db1-*.tgz", "db2-*.tgz", "wiki-*.sql.gz"], 1), (["auto"], 2)]:
+            eb = ExpireBackups(
+                rootPath=self.rootPath,
+                expiration=Expiration(days=7, weeks=2, months=0, years=0),
+                outputFormat="jsonl",
+                series=series,
+                seriesWorkers=workers,
+            )
+            stream = io.StringIO()
+            eb.doexpire(stream=stream)
+            records = [json.loads(line) for line in stream.getvalue().splitlines()]
+            self.assertEqual(90, len(records))
+            kept = {}
+            for record in records:
+                if record["action"] == "keep":
+                    kept[record["series"]] = kept.get(record["series"], 0) + 1
+            if self.debug:
+                print(kept)
+            # 7 daily and 2 weekly backups per series
+            self.assertEqual({"db1-*.tgz": 9, "db2-*.tgz": 9, "wiki-*.sql.gz": 9}, kept)
+
+
+if __name__ == "__main__":
+    unittest.main()
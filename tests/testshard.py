@@ -0,0 +1,120 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stderr
+
+from expirebackups.expire import main
+from expirebackups.shard import ShardRunner, runShard
+
+
+class RecordingShardRunner(ShardRunner):
+    """
+    shard runner that runs the shards in threads and records the concurrency per device
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.busy = {}
+        self.maxBusy = {}
+
+    def createExecutor(self):
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def runRecorded(self, job):
+        device = ShardRunner.getDevice(job.options["rootPath"])
+        with self.lock:
+            self.busy[device] = self.busy.get(device, 0) + 1
+            self.maxBusy[device] = max(self.maxBusy.get(device, 0), self.busy[device])
+        try:
+            time.sleep(0.02)
+            return runShard(job.name, job.options, self.withDelete, self.debug)
+        finally:
+            with self.lock:
+                self.busy[device] -= 1
+
+    def submitJob(self, executor, job):
+        return executor.submit(self.runRecorded, job)
+
+
+class TestShard(unittest.TestCase):
+    """
+    test expiring several roots in parallel
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.roots = []
+        now = time.time()
+        for volume in ["a", "b", "c", "d"]:
+            root = os.path.join(self.tmpDir.name, "backup", volume)
+            os.makedirs(root)
+            for ageInDays in range(30):
+                filePath = os.path.join(root, f"{volume}-{ageInDays:02d}.tgz")
+                with open(filePath, "w") as backupFile:
+                    backupFile.write("x" * 10)
+                mtime = now - (ageInDays + 0.5) * 86400
+                os.utime(filePath, (mtime, mtime))
+            self.roots.append(root)
+        self.options = {"ext": ".tgz", "days": 7, "weeks": 2, "months": 0, "years": 0, "minFileSize": 1}
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testExpandRoots(self):
+        """
+        test the expansion of the root patterns
+        """
+        pattern = os.path.join(self.tmpDir.name, "backup", "*")
+        self.assertEqual(self.roots, ShardRunner.expandRoots([pattern]))
+        # duplicates are dropped
+        expected = [self.roots[1], self.roots[0]] + self.roots[2:]
+        self.assertEqual(expected, ShardRunner.expandRoots([self.roots[1], pattern]))
+        self.assertEqual(["s3://bucket/db"], ShardRunner.expandRoots(["s3://bucket/db"]))
+        with self.assertRaises(Exception):
+            ShardRunner.expandRoots([os.path.join(self.tmpDir.name, "missing*")])
+
+    def testDeviceLimit(self):
+        """
+        test that the roots of a device are not expired concurrently beyond the limit
+        """
+        runner = RecordingShardRunner.forRoots(self.roots, self.options, workers=4, deviceWorkers=2)
+        stream = io.StringIO()
+        exitCode = runner.run(stream)
+        if self.debug:
+            print(stream.getvalue())
+        self.assertEqual(0, exitCode)
+        # all roots are on the device of the temporary directory
+        self.assertEqual(1, len(runner.maxBusy))
+        self.assertLessEqual(max(runner.maxBusy.values()), 2)
+        self.assertEqual([9] * 4, [result.kept for result in runner.results])
+        # the plans are reported in the order of the roots
+        text = stream.getvalue()
+        positions = [text.index(f"job {root} in") for root in self.roots]
+        self.assertEqual(sorted(positions), positions)
+
+    def testProcesses(self):
+        """
+        test expiring several roots in worker processes from the command line
+        """
+        pattern = os.path.join(self.tmpDir.name, "backup", "*")
+        args = ["expireBackups", "--rootPath", pattern, "--ext", ".tgz", "--minFileSize", "1"]
+        args.extend(["--days", "7", "--weeks", "2", "--months", "0", "--years", "0", "--shardWorkers", "2", "-f"])
+        exitCode = main(args)
+        self.assertEqual(0, exitCode)
+        for root in self.roots:
+            self.assertEqual(9, len(os.listdir(root)))
+        # the metrics of a single run are not silently dropped
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(2, main(args + ["--stats"]))
@@ -0,0 +1,107 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import random
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from expirebackups.expire import BackupFile, BackupFileTable, Expiration, main
+from expirebackups.simulate import IncrementalRuleEngine, PolicySimulator
+
+
+class TestSimulate(unittest.TestCase):
+    """
+    test the what-if simulation of retention policies
+    """
+
+    def setUp(self):
+        self.debug = False
+
+    def testIncrementalRuleEngine(self):
+        """
+        test that the incremental engine keeps the same files as a full applyRules run
+        """
+        random.seed(4711)
+        expiration = Expiration(days=3, weeks=2, months=2, years=1, minFileSize=10)
+        engine = IncrementalRuleEngine(expiration)
+        day = 0
+        for _step in range(300):
+            day += random.choice([1, 1, 2, 5, 9])
+            size = random.choice([5, 100, 200])
+            before = list(zip(engine.births, engine.sizes))
+            engine.add(day, size)
+            # the full run on the retained files plus the new one
+            table = BackupFileTable()
+            now = time.time()
+            for birth, fileSize in before + [(day, size)]:
+                table.append(f"backup-{birth}", fileSize, now - (day - birth) * 86400 - 3600)
+            expiration.applyRules(table, verbose=False)
+            kept = sorted(int(row.filePath.split("-")[1]) for row in table if not row.expire)
+            self.assertEqual(kept, engine.births)
+        self.assertLessEqual(len(engine), 3 + 2 + 2 + 1)
+
+    def testSimulate(self):
+        """
+        test simulating a policy over ten years with growing backups
+        """
+        simulator = PolicySimulator(years=10, size=1000, growth=0.5, interval=1)
+        result = simulator.simulate(Expiration(days=7, weeks=0, months=0, years=0, minFileSize=0))
+        if self.debug:
+            print(result)
+        self.assertEqual(3650, result.backups)
+        self.assertEqual(7, result.count)
+        self.assertEqual(6, result.steadyFrom)
+        self.assertEqual(list(range(6, -1, -1)), result.ageDistribution["dayly"])
+        self.assertEqual(3649, result.peakDay)
+        self.assertAlmostEqual(8 * simulator.getSize(3646), result.peak, delta=result.peak * 0.01)
+
+    def testSweep(self):
+        """
+        test sweeping a grid of policies
+        """
+        policies = PolicySimulator.policyGrid(days=[3, 7], weeks=[2, 4], months=[1, 6], years=[1, 2])
+        self.assertEqual(16, len(policies))
+        simulator = PolicySimulator(years=3, size=BackupFile.parseSize("1GB"), interval=3)
+        results = simulator.sweep(policies, workers=2)
+        self.assertEqual(16, len(results))
+        for policy, result in zip(policies, results):
+            self.assertEqual(policy["days"], result.policy["days"])
+            self.assertLessEqual(result.maxCount, sum(result.policy.values()) + 1)
+            self.assertEqual(365, result.backups)
+
+    def testParseSize(self):
+        """
+        test parsing human readable sizes
+        """
+        self.assertEqual(500 * 1024**3, BackupFile.parseSize("500GB"))
+        self.assertEqual(1536, BackupFile.parseSize("1.5 KB"))
+        self.assertEqual(4096, BackupFile.parseSize("4096"))
+        self.assertEqual(2 * 1024**4, BackupFile.parseSize("2t"))
+        with self.assertRaises(Exception):
+            BackupFile.parseSize("many")
+
+    def testMain(self):
+        """
+        test that the simulate command line option forwards or rejects the rule options
+        """
+        argv = ["expireBackups", "--simulate", "1", "--days", "3", "--weeks", "0", "--months", "0", "--years", "0"]
+        with redirect_stdout(io.StringIO()) as stdout:
+            self.assertIsNone(main(argv))
+        self.assertIn("days=3 weeks=0 months=0 years=0: 3 files", stdout.getvalue())
+        # backups smaller than the minimum file size are not kept
+        with redirect_stdout(io.StringIO()) as stdout:
+            main(argv + ["--minFileSize", str(2 * 1024**3)])
+        self.assertIn("days=3 weeks=0 months=0 years=0: 0 files", stdout.getvalue())
+        for option in [["--hours", "6"], ["--tier", "quarterhourly:15m:8"]]:
+            with redirect_stderr(io.StringIO()) as stderr:
+                self.assertEqual(2, main(argv + option))
+            self.assertIn(f"{option[0]} can not be combined with --simulate", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
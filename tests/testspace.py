@@ -0,0 +1,110 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from expirebackups.expire import Expiration, ExpireBackups
+from expirebackups.space import FreeSpaceTarget
+
+
+class DirectoryTarget(FreeSpaceTarget):
+    """
+    free space target for a filesystem of the given capacity that only holds the files of a directory
+    """
+
+    capacity = 100000
+
+    def getUsage(self, path: str):
+        used = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+        return DirectoryTarget.capacity - used, DirectoryTarget.capacity
+
+
+class TestSpace(unittest.TestCase):
+    """
+    test the free space target
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsSpace-")
+        self.rootPath = self.tmpDir.name
+        for ageInDays in range(1, 21):
+            filePath = os.path.join(self.rootPath, f"backup-{ageInDays:03d}.tgz")
+            with open(filePath, "w") as backupFile:
+                backupFile.write("x" * 1000)
+            mtime = time.time() - ageInDays * 86400 - 3600
+            os.utime(filePath, (mtime, mtime))
+        self.expiration = Expiration(days=7, weeks=2, months=1, years=1, minFileSize=0)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testTarget(self):
+        """
+        test parsing the target and computing the shortfall
+        """
+        self.assertEqual(20000, FreeSpaceTarget("20%").getTargetBytes(100000))
+        self.assertEqual(500 * 1024**3, FreeSpaceTarget("500GB").getTargetBytes(100000))
+        for invalid in ["0%", "120%", "x%", "10XB"]:
+            with self.assertRaises(Exception):
+                FreeSpaceTarget(invalid)
+        with self.assertRaises(Exception):
+            FreeSpaceTarget("10%", order=["hourly"], ruleNames=list(self.expiration.rules))
+        free, total = FreeSpaceTarget.getUsage(self.rootPath)
+        self.assertGreater(total, 0)
+        self.assertLessEqual(free, total)
+        self.assertEqual(0, FreeSpaceTarget("1B").getShortfall(self.rootPath))
+        # free 80000 with 12000 planned by the rules
+        self.assertEqual(3000, DirectoryTarget("95000").getShortfall(self.rootPath, 12000))
+        self.assertEqual(0, DirectoryTarget("90%").getShortfall(self.rootPath, 12000))
+
+    def doExpire(self, target: FreeSpaceTarget, withDelete: bool) -> ExpireBackups:
+        """
+        expire my files with the given free space target
+        """
+        eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=self.expiration, dryRun=not withDelete)
+        eb.freeSpaceTarget = target
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            eb.doexpire(withDelete, show=False)
+        if self.debug:
+            print(stdout.getvalue())
+        return eb
+
+    def testExpireForSpace(self):
+        """
+        test that further files are expired oldest first in the lowest tier until the target is met
+        """
+        eb = self.doExpire(DirectoryTarget("85000"), False)
+        # the rules alone meet the target
+        self.assertEqual(12, eb.summary.count - eb.summary.kept)
+        eb = self.doExpire(DirectoryTarget("95000"), False)
+        self.assertEqual(15, eb.summary.count - eb.summary.kept)
+        # the additionally expired files are reported on the stream of the plan
+        eb.freeSpaceTarget = DirectoryTarget("95000")
+        stream = io.StringIO()
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            eb.doexpire(False, show=False, stream=stream)
+        self.assertEqual("", stdout.getvalue())
+        self.assertIn("expiring 3 more files", stream.getvalue())
+        eb = self.doExpire(DirectoryTarget("95000"), True)
+        self.assertEqual(15, eb.deleteResult.deleted)
+        names = sorted(os.listdir(self.rootPath))
+        expected = [f"backup-{ageInDays:03d}.tgz" for ageInDays in [1, 2, 3, 4, 14]]
+        self.assertEqual(expected, names)
+        # the youngest backup is never expired
+        eb = self.doExpire(DirectoryTarget("100%"), True)
+        self.assertEqual(["backup-001.tgz"], os.listdir(self.rootPath))
+
+
+if __name__ == "__main__":
+    unittest.main()
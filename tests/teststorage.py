@@ -0,0 +1,110 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from expirebackups.expire import BackupFile, Expiration, ExpireBackups
+from expirebackups.storage import FakeObjectStore, LocalStorage, ObjectStore
+
+
+class TestStorage(unittest.TestCase):
+    """
+    test the storage backends
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.now = time.time()
+        self.client = FakeObjectStore(pageSize=7)
+        # three hosts with a backup per day and some files that are no backups
+        for host in ["alpha", "beta", "gamma"]:
+            for ageInDays in range(40):
+                mtime = self.now - (ageInDays + 0.5) * 86400
+                self.client.put("backups", f"db/{host}/{host}-{ageInDays:03d}.tgz", 1000 + ageInDays, mtime)
+            self.client.put("backups", f"db/{host}/README.txt", 10, self.now)
+        self.client.put("backups", "db/.expireBackups.trash/old.tgz", 10, self.now - 400 * 86400)
+        self.client.put("backups", "other/unrelated.tgz", 10, self.now - 400 * 86400)
+
+    def getExpireBackups(self, listWorkers: int = 4, **kwargs) -> ExpireBackups:
+        storage = ObjectStore(self.client, "backups", "db", listWorkers=listWorkers)
+        expiration = Expiration(days=7, weeks=2, months=0, years=0, minFileSize=1)
+        eb = ExpireBackups("s3://backups/db", ext=".tgz", expiration=expiration, storage=storage, **kwargs)
+        return eb
+
+    def testListing(self):
+        """
+        test the paginated and concurrent listing of the prefixes
+        """
+        self.assertEqual(("backups", "db/daily"), ObjectStore.parseUrl("s3://backups/db/daily"))
+        with self.assertRaises(Exception):
+            ObjectStore.parseUrl("s3:///db")
+        objects, prefixes, token = self.client.listPage("backups", "db/", "/")
+        self.assertEqual([], objects)
+        self.assertEqual(["db/.expireBackups.trash/", "db/alpha/", "db/beta/", "db/gamma/"], prefixes)
+        self.assertIsNone(token)
+        paths = {}
+        for listWorkers in [1, 4]:
+            eb = self.getExpireBackups(listWorkers)
+            paths[listWorkers] = sorted(backupFile.filePath for backupFile in eb.getBackupFiles())
+        self.assertEqual(120, len(paths[1]))
+        self.assertEqual(paths[1], paths[4])
+        self.assertEqual("s3://backups/db/alpha/alpha-000.tgz", paths[1][0])
+        self.assertEqual(4, eb.scanStats.dirs)
+
+    def testExpire(self):
+        """
+        test expiring backups in an object store with batched deletes
+        """
+        eb = self.getExpireBackups(deleteWorkers=2)
+        stream = io.StringIO()
+        eb.doexpire(withDelete=True, stream=stream)
+        if self.debug:
+            print(stream.getvalue())
+        # the backups of all hosts are expired together
+        self.assertEqual(9, eb.summary.kept)
+        self.assertEqual(111, eb.deleteResult.deleted)
+        self.assertEqual(1, self.client.requests["delete"])
+        remaining = [key for key in self.client.buckets["backups"] if key.endswith(".tgz")]
+        # the backup in the state prefix and the one outside of the root are not touched
+        self.assertEqual(11, len(remaining))
+        # empty backups are expired since they are below the minFileSize
+        for i in range(2100):
+            self.client.put("backups", f"db/bulk/bulk-{i:04d}.tgz", 0, self.now - 1000 * 86400)
+        deleteRequests = self.client.requests["delete"]
+        eb = self.getExpireBackups(deleteWorkers=2)
+        eb.doexpire(withDelete=True, show=False)
+        self.assertEqual(2100, eb.deleteResult.deleted)
+        self.assertEqual(3, self.client.requests["delete"] - deleteRequests)
+        with self.assertRaises(Exception):
+            self.getExpireBackups(dedup=True)
+        # a plan can not be applied to an object store
+        with tempfile.TemporaryDirectory() as tmpDir:
+            planPath = os.path.join(tmpDir, "plan.jsonl")
+            with self.assertRaises(Exception):
+                self.getExpireBackups().savePlan(planPath)
+            self.assertEqual([], os.listdir(tmpDir))
+
+    def testLocalStorage(self):
+        """
+        test the local filesystem backend
+        """
+        with tempfile.TemporaryDirectory() as rootPath:
+            filePath = os.path.join(rootPath, "backup.tgz")
+            with open(filePath, "w") as backupFile:
+                backupFile.write("x")
+            storage = LocalStorage(rootPath)
+            eb = ExpireBackups(rootPath, ext=".tgz")
+            self.assertTrue(eb.storage.local)
+            self.assertEqual([filePath], [backupFile.filePath for backupFile in eb.getBackupFiles()])
+            backupFile = BackupFile(filePath)
+            backupFile.delete(storage)
+            self.assertFalse(os.path.exists(filePath))
+            # a missing backup is ignored
+            backupFile.delete(storage)
@@ -0,0 +1,96 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from expirebackups.expire import Expiration, ExpireBackups
+from expirebackups.stream import ExternalSorter
+
+
+class TestStream(unittest.TestCase):
+    """
+    test expiring as a stream with bounded memory
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.rootPath = self.tmpDir.name
+        now = time.time()
+        rnd = random.Random(1)
+        for i in range(120):
+            filePath = os.path.join(self.rootPath, f"sub{i % 3}", f"backup-{i:03d}.tgz")
+            os.makedirs(os.path.dirname(filePath), exist_ok=True)
+            with open(filePath, "wb") as backupFile:
+                backupFile.write(b"x" * rnd.randint(1, 100))
+            mtime = now - rnd.uniform(0, 800) * 86400
+            os.utime(filePath, (mtime, mtime))
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def getExpireBackups(self, memoryBudget: str = None) -> ExpireBackups:
+        expiration = Expiration(days=7, weeks=6, months=8, years=2, minFileSize=1)
+        eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=expiration, memoryBudget=memoryBudget)
+        return eb
+
+    def testExternalSorter(self):
+        """
+        test sorting with runs spilled to temporary files
+        """
+        rnd = random.Random(0)
+        records = [(rnd.randint(0, 50), seq, 0.0, 1, f"file{seq}") for seq in range(5000)]
+        sorter = ExternalSorter(memoryBudget=100000)
+        for record in records:
+            sorter.add(record)
+        self.assertTrue(len(sorter.runs) > 1)
+        self.assertEqual(sorted(records), list(sorter.sorted()))
+        self.assertEqual([], sorter.runs)
+        with self.assertRaises(Exception):
+            ExternalSorter(memoryBudget=0)
+
+    def testStreamingPlan(self):
+        """
+        test that the streaming expiration has the plan of the in memory expiration
+        """
+        plans = []
+        for memoryBudget in [None, "4KB"]:
+            stream = io.StringIO()
+            eb = self.getExpireBackups(memoryBudget)
+            eb.outputFormat = "jsonl"
+            eb.doexpire(withDelete=False, stream=stream)
+            plans.append([line.split('"mtime"')[0] for line in stream.getvalue().splitlines()])
+        if self.debug:
+            print(plans[1])
+        self.assertEqual(120, len(plans[1]))
+        self.assertEqual(plans[0], plans[1])
+
+    def testStreamingDelete(self):
+        """
+        test deleting in batches while streaming
+        """
+        eb = self.getExpireBackups("4KB")
+        eb.doexpire(withDelete=True, show=False)
+        expired = eb.summary.count - eb.summary.kept
+        self.assertTrue(expired > 0)
+        self.assertEqual(expired, eb.deleteResult.deleted)
+        self.assertEqual(expired, eb.metrics.counters["filesDeleted"])
+        eb = self.getExpireBackups("4KB")
+        eb.doexpire(withDelete=False, show=False)
+        self.assertEqual(eb.summary.count, eb.summary.kept)
+
+    def testConflicts(self):
+        """
+        test that options needing all files in memory are rejected
+        """
+        for option in [{"dedup": True}, {"targetFree": "10%"}, {"series": ["auto"]}, {"directories": True}]:
+            with self.assertRaises(Exception):
+                ExpireBackups(self.rootPath, memoryBudget="1MB", **option)
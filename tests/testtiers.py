@@ -0,0 +1,108 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import random
+import time
+import unittest
+
+from expirebackups.engine import VectorizedRuleEngine
+from expirebackups.expire import BackupFile, BackupFileTable, Expiration
+from expirebackups.index import IndexedStats
+from expirebackups.space import FreeSpaceTarget
+
+
+class TestTiers(unittest.TestCase):
+    """
+    test sub-day retention tiers
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.now = time.time()
+
+    def createSnapshots(self, numberOfFiles: int, interval: float, seed: int = 0) -> BackupFileTable:
+        """
+        create a table of snapshots taken every interval seconds with some jitter
+        """
+        rnd = random.Random(seed)
+        table = BackupFileTable()
+        for i in range(numberOfFiles):
+            mtime = self.now - (i + 0.5) * interval + rnd.uniform(-30, 30)
+            table.append(f"/backup/db-{i:06d}.dump", 1000, mtime)
+        return table
+
+    def testTierList(self):
+        """
+        test the ordering and parsing of the tiers
+        """
+        self.assertEqual(("quarterhourly", 15 / 1440, 8), Expiration.parseTier("quarterhourly:15m:8"))
+        self.assertEqual(("fortnightly", 14.0, 3), Expiration.parseTier("fortnightly:2w:3"))
+        for invalid in ["quarterhourly:15x:8", "15m:8", "zero:0m:1"]:
+            with self.assertRaises(Exception):
+                Expiration(tiers=[invalid])
+        with self.assertRaises(Exception):
+            Expiration(tiers=["dayly:1d:3"])
+        expiration = Expiration(hours=24, tiers=["quarterhourly:15m:8", ("fortnightly", 14.0, 3)])
+        names = ["quarterhourly", "hourly", "dayly", "weekly", "fortnightly", "monthly", "yearly"]
+        self.assertEqual(names, list(expiration.rules))
+        self.assertEqual(900, expiration.ageUnit)
+        self.assertEqual(names, FreeSpaceTarget("10%", ruleNames=list(expiration.rules)).order)
+        # without sub-day tiers the ages are full days as before
+        self.assertEqual(BackupFile.daySeconds, Expiration().ageUnit)
+        self.assertEqual(2, BackupFile.getAge(self.now - 2.9 * 86400, self.now))
+        self.assertAlmostEqual(2.875, BackupFile.getAge(self.now - 2.9 * 86400, self.now, 3600))
+
+    def testHourly(self):
+        """
+        test keeping hourly snapshots of 15 minute snapshots with both engines
+        """
+        expiration = Expiration(days=7, weeks=2, months=0, years=0, minFileSize=0, hours=24)
+        # twenty days of snapshots every 15 minutes
+        python = expiration.applyRules(self.createSnapshots(96 * 20, 900), verbose=False)
+        kept = [ruleName for ruleName in python.keptBy if ruleName is not None]
+        if self.debug:
+            print(kept)
+        self.assertEqual(24, kept.count("hourly"))
+        self.assertEqual(7, kept.count("dayly"))
+        self.assertEqual(1, kept.count("weekly"))
+        hourlyAges = [age for age, ruleName in zip(python.ages, python.keptBy) if ruleName == "hourly"]
+        gaps = [older - younger for younger, older in zip(hourlyAges, hourlyAges[1:])]
+        self.assertTrue(all(abs(gap - 1 / 24) < 1e-9 for gap in gaps), gaps)
+        engines = [VectorizedRuleEngine(expiration, useNumpy=False)]
+        if VectorizedRuleEngine(expiration).useNumpy:
+            engines.append(VectorizedRuleEngine(expiration, useNumpy=True))
+        for engine in engines:
+            vectorized = engine.apply(self.createSnapshots(96 * 20, 900), now=python.now)
+            self.assertEqual(python.filePaths, vectorized.filePaths)
+            self.assertEqual(python.expires, vectorized.expires)
+            self.assertEqual(python.keptBy, vectorized.keptBy)
+        table = self.createSnapshots(96 * 20, 900)
+        backupFiles = [BackupFile(row.filePath, IndexedStats(row.size, row.mtime)) for row in table]
+        filesByAge = expiration.applyRules(backupFiles, verbose=False)
+        self.assertEqual(python.keptBy, [backupFile.keptBy for backupFile in filesByAge])
+
+    def testManySnapshots(self):
+        """
+        test that 100k snapshots with sub-day tiers are expired in a single pass
+        """
+        expiration = Expiration(
+            days=7, weeks=4, months=12, years=2, minFileSize=0, hours=48, tiers=["fiveminutes:5m:12"]
+        )
+        expiration.engine = "vectorized"
+        table = self.createSnapshots(100000, 300)
+        start = time.perf_counter()
+        filesByAge = expiration.applyRules(table, verbose=False)
+        seconds = time.perf_counter() - start
+        if self.debug:
+            print(f"{len(table)} snapshots in {seconds:.3f} s")
+        kept = [ruleName for ruleName in filesByAge.keptBy if ruleName is not None]
+        self.assertEqual(12, kept.count("fiveminutes"))
+        self.assertEqual(48, kept.count("hourly"))
+        self.assertLess(seconds, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from expirebackups.expire import Expiration, ExpireBackups
+from expirebackups.index import IndexedStats
+from expirebackups.usage import SpaceUsage
+
+
+class TestUsage(unittest.TestCase):
+    """
+    test the hard link and sparse file aware accounting
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.rootPath = self.tmpDir.name
+        self.now = time.time()
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def createFile(self, name: str, ageInDays: float, size: int = 8192) -> str:
+        """
+        create a backup file with the given age and size
+        """
+        filePath = os.path.join(self.rootPath, name)
+        with open(filePath, "wb") as backupFile:
+            backupFile.write(b"x" * size)
+        self.setAge(filePath, ageInDays)
+        return filePath
+
+    def setAge(self, filePath: str, ageInDays: float):
+        mtime = self.now - ageInDays * 86400
+        os.utime(filePath, (mtime, mtime), follow_symlinks=False)
+
+    def testAccounting(self):
+        """
+        test that hard linked files only count as reclaimable if all their links are expired
+        """
+        usage = SpaceUsage()
+        paths = [os.path.join(self.rootPath, f"backup{i}.tgz") for i in range(4)]
+        self.createFile("backup0.tgz", 1)
+        # backup1 and backup2 are links of the same inode - backup3 is linked from outside of the plan
+        self.createFile("backup1.tgz", 2)
+        os.link(paths[1], paths[2])
+        self.createFile("backup3.tgz", 3)
+        os.link(paths[3], os.path.join(self.rootPath, "outside"))
+        allocated = SpaceUsage.getInodeKey(os.stat(paths[0]))[3]
+        for filePath in paths:
+            usage.record(filePath, os.stat(filePath))
+        actions = ["keep", "expire", "expire", "expire"]
+        records = [{"path": path, "size": 8192, "action": action} for path, action in zip(paths, actions)]
+        self.assertEqual(records, list(usage.tally(records)))
+        self.assertEqual(3 * 8192, usage.apparent["expire"])
+        self.assertEqual(2 * allocated, usage.getAllocated("expire"))
+        self.assertEqual(allocated, usage.getAllocated("keep"))
+        self.assertEqual(allocated, usage.reclaimable)
+        # files from the scan index have no inode and are looked up
+        usage = SpaceUsage()
+        usage.record(paths[0], IndexedStats(8192, 0.0))
+        list(usage.tally(records[:1]))
+        self.assertEqual(1, usage.statCalls)
+        self.assertEqual(allocated, usage.getAllocated("keep"))
+
+    def testSparse(self):
+        """
+        test that sparse files only count with their allocated blocks
+        """
+        filePath = os.path.join(self.rootPath, "vm.img")
+        with open(filePath, "wb") as image:
+            image.truncate(64 * 1024 * 1024)
+        stats = os.stat(filePath)
+        if not hasattr(stats, "st_blocks") or stats.st_blocks * 512 >= stats.st_size:
+            self.skipTest("the filesystem does not support sparse files")
+        usage = SpaceUsage()
+        list(usage.tally([{"path": filePath, "size": stats.st_size, "action": "expire"}]))
+        self.assertEqual(stats.st_size, usage.apparent["expire"])
+        self.assertTrue(usage.reclaimable < stats.st_size)
+
+    def testExpireWithAccounting(self):
+        """
+        test the accounting of a plan
+        """
+        for i in range(6):
+            self.createFile(f"backup{i}.tgz", i + 0.5)
+        os.link(os.path.join(self.rootPath, "backup5.tgz"), os.path.join(self.rootPath, "backup4.tgz.link"))
+        expiration = Expiration(days=3, weeks=0, months=0, years=0, minFileSize=1)
+        eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=expiration, accounting=True)
+        stream = io.StringIO()
+        eb.doexpire(withDelete=False, stream=stream)
+        if self.debug:
+            print(stream.getvalue())
+        allocated = SpaceUsage.getInodeKey(os.stat(os.path.join(self.rootPath, "backup0.tgz")))[3]
+        self.assertEqual(0, eb.usage.statCalls)
+        self.assertEqual(3 * 8192, eb.usage.apparent["expire"])
+        self.assertEqual(2 * allocated, eb.usage.reclaimable)
+        self.assertEqual(2 * allocated, eb.metrics.counters["bytesReclaimable"])
+        self.assertIn("reclaimable", stream.getvalue())
+        with self.assertRaises(Exception):
+            ExpireBackups(self.rootPath, accounting=True, directories=True)
@@ -0,0 +1,161 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from expirebackups.expire import Expiration, ExpireBackups
+from expirebackups.watch import BackupWatcher, Inotify
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify needs Linux")
+class TestWatch(unittest.TestCase):
+    """
+    test the inotify based watch mode
+    """
+
+    def setUp(self):
+        self.debug = False
+        self.tmpDir = tempfile.TemporaryDirectory(prefix="expireBackupsWatch-")
+        self.rootPath = self.tmpDir.name
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def createBackup(self, ageInDays: int, dirPath: str = None) -> str:
+        """
+        create a backup file of the given age
+        """
+        if dirPath is None:
+            dirPath = self.rootPath
+        filePath = os.path.join(dirPath, f"backup-{ageInDays:03d}.tgz")
+        with open(filePath, "w") as backupFile:
+            backupFile.write("x" * 10)
+        # a day minus an hour so that the age in days is stable during the test
+        mtime = time.time() - ageInDays * 86400 - 3600 if ageInDays > 0 else time.time()
+        os.utime(filePath, (mtime, mtime))
+        return filePath
+
+    def testInotify(self):
+        """
+        test the events for a file that is written and deleted
+        """
+        inotify = Inotify()
+        try:
+            inotify.addWatch(self.rootPath, BackupWatcher.watchMask)
+            self.assertEqual([], inotify.read(0))
+            filePath = self.createBackup(1)
+            os.unlink(filePath)
+            events = inotify.read(1)
+            masks = {}
+            for _wd, mask, name in events:
+                masks[name] = masks.get(name, 0) | mask
+            self.assertTrue(masks["backup-001.tgz"] & Inotify.IN_CLOSE_WRITE)
+            self.assertTrue(masks["backup-001.tgz"] & Inotify.IN_DELETE)
+        finally:
+            inotify.close()
+
+    def testWatcher(self):
+        """
+        test that arriving backups are expired without a rescan
+        """
+        for ageInDays in range(1, 11):
+            self.createBackup(ageInDays)
+        expiration = Expiration(days=3, weeks=1, months=1, years=1, minFileSize=0)
+        eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=expiration, dryRun=False)
+        watcher = BackupWatcher(eb, withDelete=True, settle=0.05, show=False)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            watcher.start()
+            try:
+                self.assertEqual(10, len(watcher.files))
+                # the backups found by the initial scan are expired right away
+                self.assertTrue(watcher.step(0))
+                self.assertEqual(4, len(watcher.files))
+                self.assertFalse(watcher.step(0.05))
+                # a new backup in a directory created after the start
+                subDir = os.path.join(self.rootPath, "new")
+                os.mkdir(subDir)
+                self.createBackup(0, subDir)
+                self.assertTrue(watcher.step(1))
+                self.assertEqual(2, watcher.runs)
+            finally:
+                watcher.close()
+        if self.debug:
+            print(stdout.getvalue())
+        names = sorted(os.path.basename(filePath) for filePath in watcher.files)
+        self.assertEqual(["backup-000.tgz", "backup-001.tgz", "backup-002.tgz", "backup-010.tgz"], names)
+        remaining = []
+        for _root, _dirs, fileNames in os.walk(self.rootPath):
+            remaining.extend(fileNames)
+        self.assertEqual(names, sorted(remaining))
+
+    def testDirectoryBackups(self):
+        """
+        test that arriving and vanishing directory backups are recorded and not descended into
+        """
+        for ageInDays in range(1, 4):
+            os.mkdir(os.path.join(self.rootPath, f"snapshot-{ageInDays:03d}"))
+        expiration = Expiration(days=7, weeks=0, months=0, years=0, minFileSize=0)
+        eb = ExpireBackups(self.rootPath, baseName="snapshot-", expiration=expiration, directories=True)
+        watcher = BackupWatcher(eb, settle=0.05, show=False)
+        with redirect_stdout(io.StringIO()):
+            watcher.start()
+            try:
+                self.assertEqual(3, len(watcher.files))
+                self.assertTrue(watcher.step(0))
+                newPath = os.path.join(self.rootPath, "snapshot-000")
+                os.mkdir(newPath)
+                self.createBackup(0, newPath)
+                self.assertTrue(watcher.step(1))
+                self.assertEqual(2, watcher.runs)
+                self.assertIn(newPath, watcher.files)
+                self.assertNotIn(newPath, watcher.dirs.values())
+                os.rename(newPath, os.path.join(self.rootPath, "moved-away"))
+                watcher.poll(1)
+                self.assertNotIn(newPath, watcher.files)
+                self.assertEqual(3, len(watcher.files))
+            finally:
+                watcher.close()
+
+    def testLinkArrival(self):
+        """
+        test that backups arriving as hard or symbolic links are recorded although they are never written
+        """
+        sourceDir = tempfile.TemporaryDirectory(prefix="expireBackupsWatchSource-")
+        self.addCleanup(sourceDir.cleanup)
+        sourcePaths = [self.createBackup(ageInDays, sourceDir.name) for ageInDays in [1, 2]]
+        expiration = Expiration(days=7, weeks=0, months=0, years=0, minFileSize=0)
+        eb = ExpireBackups(self.rootPath, ext=".tgz", expiration=expiration)
+        watcher = BackupWatcher(eb, settle=0.05, show=False)
+        watcher.start()
+        try:
+            self.assertEqual(0, len(watcher.files))
+            hardLinkPath = os.path.join(self.rootPath, os.path.basename(sourcePaths[0]))
+            os.link(sourcePaths[0], hardLinkPath)
+            symLinkPath = os.path.join(self.rootPath, os.path.basename(sourcePaths[1]))
+            os.symlink(sourcePaths[1], symLinkPath)
+            watcher.poll(1)
+            self.assertIn(hardLinkPath, watcher.files)
+            self.assertIn(symLinkPath, watcher.files)
+            # a file that is still being written is only recorded when it is closed
+            with open(os.path.join(self.rootPath, "backup-000.tgz"), "w") as backupFile:
+                watcher.poll(1)
+                self.assertEqual(2, len(watcher.files))
+                backupFile.write("x" * 10)
+            watcher.poll(1)
+            self.assertEqual(3, len(watcher.files))
+        finally:
+            watcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()